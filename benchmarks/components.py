@@ -0,0 +1,240 @@
+"""
+Offline component benchmarks: throughput and latency for each building block.
+
+Everything runs in-process against the StubLlm (configurable time to first
+token and token rate) and fake A2A peers, so results are deterministic and
+need no network or API key. Measured components:
+
+- llm_complete:            one completion through my_a2a.llm.model
+- generate_plan:           planner prompt, structured completion and plan parsing
+- sentiment/pos/planner/greeting_executor:
+                           each AgentExecutor behind a DefaultRequestHandler
+- client_loop:             the Client orchestration loop (plan, then every step)
+                           against fake peers, dispatched in-process
+- client_loop_speculative: the same with speculative sub-agent execution
+
+Every request carries distinct text, so the single-flight layer never
+coalesces work. Results are written as JSON. --compare checks them against
+a report from an earlier commit.
+
+Usage:
+    python benchmarks/components.py --requests 500 --concurrency 32 --output bench.json
+    python benchmarks/components.py --compare bench.json --tolerance 0.15
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import Message, MessageSendParams, Part, Role, Task, TaskState, TextPart
+
+import my_a2a.llm.model as llm_model
+from my_a2a.llm.routing import model_for
+from my_a2a.multi_a2a.common.fake_peer import fake_peer_server
+from my_adk.llm.stub import StubLlm
+
+TEXTS = [
+    "I love this phone, the battery is great",
+    "The delivery was slow and the food was cold",
+    "The meeting is at ten in the main room",
+    "What a fantastic day for a walk in the park",
+]
+
+PEERS = ("planner", "greeting", "sentiment", "pos")
+
+
+def text_for(index: int) -> str:
+    return f"{TEXTS[index % len(TEXTS)]} (request {index})"
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+
+    def percentile(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 3) if latencies else None
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def measure(call, requests: int, concurrency: int) -> dict:
+    """Runs call(index) `requests` times with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(index):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await call(index)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def executor_call(executor, text_of=text_for):
+    request_handler = DefaultRequestHandler(agent_executor=executor, task_store=InMemoryTaskStore())
+
+    async def call(index):
+        message = Message(
+            role=Role.user,
+            message_id=str(uuid.uuid4()),
+            parts=[Part(root=TextPart(text=text_of(index)))],
+        )
+        result = await request_handler.on_message_send(MessageSendParams(message=message))
+        if not isinstance(result, Task) or result.status.state != TaskState.completed:
+            raise RuntimeError(f"Request {index} did not complete")
+
+    return call
+
+
+def planner_input(index: int) -> str:
+    return json.dumps({
+        "user_input": f"Give me sentiment and POS tags for '{text_for(index)}'",
+        "available_agents": ["sentiment", "pos"],
+    })
+
+
+def client_call(speculative: bool):
+    from my_a2a.multi_a2a.client.nlp_client_agent.agent import Client
+
+    agent_cards = {}
+
+    async def call(index):
+        # One client per conversation: speculation state is per conversation
+        client = Client(speculative=speculative)
+        if not agent_cards:
+            agent_cards.update(await client.get_all_agent_cards())
+        client.agents_info = agent_cards
+        plan = await client.send_message("planner", planner_input(index))
+        for step in plan["steps"]:
+            await client.send_message(step["agent"], step["input"])
+
+    return call
+
+
+def components() -> dict:
+    # Imported here so the stub model is in place before any agent module loads
+    from my_a2a.multi_a2a.greeting_agent.agent_executor import GreetingAgentExecutor
+    from my_a2a.multi_a2a.planner_agent.agent import generate_plan
+    from my_a2a.multi_a2a.planner_agent.agent_executor import PlannerAgentExecutor
+    from my_a2a.multi_a2a.pos_tag_agent.agent_executor import PosTagAgentExecutor
+    from my_a2a.multi_a2a.sentiment_agent.agent_executor import SentimentAgentExecutor
+
+    return {
+        "llm_complete": lambda index: llm_model.llm_complete(text_for(index)),
+        "generate_plan": lambda index: generate_plan(
+            f"Give me sentiment and POS tags for '{text_for(index)}'", ["sentiment", "pos"]
+        ),
+        "sentiment_executor": executor_call(SentimentAgentExecutor()),
+        "pos_executor": executor_call(PosTagAgentExecutor()),
+        "planner_executor": executor_call(PlannerAgentExecutor(), text_of=planner_input),
+        "greeting_executor": executor_call(GreetingAgentExecutor(), text_of=lambda index: f"Hello! ({index})"),
+        "client_loop": client_call(speculative=False),
+        "client_loop_speculative": client_call(speculative=True),
+    }
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Lists components whose throughput fell or p99 latency rose by more than `tolerance`."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        if previous["throughput_rps"] and current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} rps")
+        if previous["p99_ms"] and current["p99_ms"] and current["p99_ms"] > previous["p99_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p99 {previous['p99_ms']} -> {current['p99_ms']} ms")
+    return regressions
+
+
+async def main(args):
+    stub = StubLlm(latency=args.llm_latency, tokens_per_second=args.tokens_per_second, seed=args.seed)
+    llm_model.model = stub
+    for agent_name in PEERS:
+        model_for(agent_name).tiers = [stub]
+
+    # Fake peers for the client loop, reachable in-process under these URLs
+    os.environ["A2A_AGENT_REGISTRY"] = json.dumps({name: f"http://fake-peers/{name}/" for name in PEERS})
+    for name in PEERS:
+        fake_peer_server(name, f"http://fake-peers/{name}/", latency=args.peer_latency)
+
+    results = {}
+    selected = components()
+    for name in args.only or selected:
+        call = selected[name]
+        # The components print progress; keep the report readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            await measure(call, args.warmup, args.concurrency)
+            results[name] = await measure(call, args.requests, args.concurrency)
+        print(f"{name}: {results[name]}", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "llm_latency": args.llm_latency,
+            "tokens_per_second": args.tokens_per_second,
+            "peer_latency": args.peer_latency,
+        },
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["regressions"] = compare(results, json.load(f), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per component")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Stub model time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Stub model output rate (0 = instant)")
+    parser.add_argument("--peer-latency", type=float, default=0.05, help="Fake peer reply delay (s)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--only", nargs="+", help="Components to run")
+    parser.add_argument("--compare", help="Earlier JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Allowed relative slowdown")
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
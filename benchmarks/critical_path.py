@@ -0,0 +1,181 @@
+"""
+Critical-path analysis of the spans exported with A2A_TRACE.
+
+Spans from every process (client, planner, sub-agents, or the combined host)
+are grouped into traces, one per user query. For each trace the critical path
+is walked back from the end of the root span: at every level the child that
+finished last is on the path, then the one that finished last before it
+started, and so on. Time on the path not covered by a child is the span's
+own (self) time. Each span belongs to a hop: the agent named by its
+a2a.agent attribute, inherited from its parent otherwise (so ADK's internal
+spans count towards the agent running them), else its process's service.
+
+The report gives, per hop, its critical-path time at p50/p99 across traces
+and its mean share in the slowest 1% of traces, and names the hop that
+dominates that tail.
+
+Usage:
+    A2A_TRACE=/tmp/spans.jsonl python -m my_a2a.multi_a2a.host &
+    A2A_TRACE=/tmp/spans.jsonl python benchmarks/loadgen.py orchestrator --rate 5 --duration 60
+    python benchmarks/critical_path.py /tmp/spans.jsonl
+    python benchmarks/critical_path.py /tmp/spans.jsonl --slowest 3 --json
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+AGENT_ATTRIBUTE = "a2a.agent"
+
+
+def load_spans(paths: list[str]) -> dict[str, list[dict]]:
+    """Trace id -> spans, from one or more JSONL span files."""
+    traces = defaultdict(list)
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    span = json.loads(line)
+                    traces[span["trace_id"]].append(span)
+    return traces
+
+
+def hop_of(span: dict, by_id: dict[str, dict]) -> str:
+    while span is not None:
+        agent = span["attributes"].get(AGENT_ATTRIBUTE)
+        if agent:
+            return agent
+        parent = by_id.get(span["parent_id"])
+        if parent is None:
+            return span["service"] or "unknown"
+        span = parent
+    return "unknown"
+
+
+def critical_path(spans: list[dict]) -> tuple[dict, list[tuple[dict, float]]]:
+    """
+    Returns the root span of a trace and its critical path as
+    (span, self seconds on the path) pairs, in order of time.
+    """
+    by_id = {span["span_id"]: span for span in spans}
+    children = defaultdict(list)
+    roots = []
+    for span in spans:
+        if span["parent_id"] in by_id:
+            children[span["parent_id"]].append(span)
+        else:
+            # Parentless, or its parent was not exported (e.g. a trace started elsewhere)
+            roots.append(span)
+    root = max(roots, key=lambda span: span["end_ns"] - span["start_ns"])
+
+    path = []
+
+    def walk(span: dict, end_ns: int):
+        # (self ns, child, child end) steps, collected backwards in time
+        steps = []
+        cursor = min(span["end_ns"], end_ns)
+        for child in sorted(children[span["span_id"]], key=lambda child: child["end_ns"], reverse=True):
+            if child["start_ns"] >= cursor:
+                # Runs alongside a later child already on the path
+                continue
+            child_end = min(child["end_ns"], cursor)
+            steps.append((cursor - child_end, None, None))
+            steps.append((0, child, child_end))
+            cursor = max(child["start_ns"], span["start_ns"])
+        steps.append((cursor - span["start_ns"], None, None))
+        for self_ns, child, child_end in reversed(steps):
+            if child is not None:
+                walk(child, child_end)
+            elif self_ns > 0:
+                path.append((span, self_ns / 1e9))
+
+    walk(root, root["end_ns"])
+    return root, path
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def analyze(traces: dict[str, list[dict]], slowest: int = 0) -> dict:
+    results = []
+    for trace_id, spans in traces.items():
+        by_id = {span["span_id"]: span for span in spans}
+        root, path = critical_path(spans)
+        hops = defaultdict(float)
+        for span, seconds in path:
+            hops[hop_of(span, by_id)] += seconds
+        results.append({
+            "trace_id": trace_id,
+            "root": root["name"],
+            "duration_s": (root["end_ns"] - root["start_ns"]) / 1e9,
+            "hops": dict(hops),
+            "path": [(span["name"], hop_of(span, by_id), seconds) for span, seconds in path],
+        })
+    if not results:
+        return {"traces": 0}
+
+    results.sort(key=lambda result: result["duration_s"])
+    p99 = percentile([result["duration_s"] for result in results], 0.99)
+    tail = [result for result in results if result["duration_s"] >= p99]
+    hop_names = sorted({hop for result in results for hop in result["hops"]})
+
+    hops = {}
+    for hop in hop_names:
+        times = [result["hops"].get(hop, 0.0) for result in results]
+        tail_share = [result["hops"].get(hop, 0.0) / result["duration_s"] for result in tail if result["duration_s"]]
+        hops[hop] = {
+            "p50_ms": round(percentile(times, 0.50) * 1000, 2),
+            "p99_ms": round(percentile(times, 0.99) * 1000, 2),
+            "tail_share": round(sum(tail_share) / len(tail_share), 3) if tail_share else 0.0,
+        }
+
+    def round_path(result):
+        return {
+            "trace_id": result["trace_id"],
+            "duration_ms": round(result["duration_s"] * 1000, 2),
+            "path": [
+                {"span": name, "hop": hop, "self_ms": round(seconds * 1000, 2)}
+                for name, hop, seconds in result["path"]
+            ],
+        }
+
+    return {
+        "traces": len(results),
+        "p50_ms": round(percentile([result["duration_s"] for result in results], 0.50) * 1000, 2),
+        "p99_ms": round(p99 * 1000, 2),
+        "dominant_hop_at_p99": max(hops, key=lambda hop: hops[hop]["tail_share"]),
+        "hops": hops,
+        "slowest": [round_path(result) for result in reversed(results[-slowest:])] if slowest else [],
+    }
+
+
+def print_report(report: dict) -> None:
+    if not report["traces"]:
+        print("No traces found.")
+        return
+    print(f"{report['traces']} traces, end-to-end p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms")
+    print(f"{'hop':<16}{'p50 ms':>10}{'p99 ms':>10}{'share of p99 tail':>20}")
+    for hop, stats in sorted(report["hops"].items(), key=lambda item: -item[1]["tail_share"]):
+        print(f"{hop:<16}{stats['p50_ms']:>10}{stats['p99_ms']:>10}{stats['tail_share']:>20.1%}")
+    print(f"Dominant hop at p99: {report['dominant_hop_at_p99']}")
+    for trace in report["slowest"]:
+        print(f"\nTrace {trace['trace_id']} ({trace['duration_ms']} ms):")
+        for segment in trace["path"]:
+            print(f"  {segment['self_ms']:>9} ms  {segment['hop']:<12} {segment['span']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("spans", nargs="+", help="JSONL span files written with A2A_TRACE")
+    parser.add_argument("--slowest", type=int, default=0, help="Also print the critical path of the N slowest traces")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = analyze(load_spans(args.spans), slowest=args.slowest)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(report)
@@ -0,0 +1,203 @@
+"""
+Front door benchmark: many concurrent user/session conversations against the
+HTTP front door of the NLP client agent or the expense manager.
+
+--sessions conversations run at once, spread over --users users. Each one
+sends --turns messages, one after the other (a user waiting for each answer);
+with --pipelined, a session sends all its messages at once instead, and the
+front door must run them in order. Streaming requests (--stream) also record
+the time to the first chunk.
+
+Reports throughput, latency percentiles (and time to first chunk), 429s and
+errors. Afterwards the transcript of every session whose turns all succeeded is
+checked: two user messages in a row mean two turns of the session overlapped.
+
+To run offline, use the stub model, e.g.
+    A2A_STUB_LLM='{"latency": 0.2, "tokens_per_second": 200}' python benchmarks/front_door.py --serve expense
+
+Usage:
+    python benchmarks/front_door.py http://localhost:8020 --sessions 200 --turns 5
+    python benchmarks/front_door.py --serve nlp --sessions 500 --users 100 --stream --output front_door.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import socket
+import ssl
+import time
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    "Spent 12 on lunch",
+    "Paid 40 for the electricity bill",
+    "How much did I spend on food?",
+    "Bought a movie ticket for 9",
+    "What is my total?",
+]
+
+PERCENTILES = (0.50, 0.90, 0.99)
+
+
+def percentiles(seconds: list[float]) -> dict:
+    if not seconds:
+        return {}
+    seconds = sorted(seconds)
+    return {f"p{q * 100:g}_ms": round(seconds[min(len(seconds) - 1, int(q * len(seconds)))] * 1000, 1) for q in PERCENTILES}
+
+
+@contextlib.asynccontextmanager
+async def served(app_name: str):
+    """Serves the front door of `app_name` in this process, on a free port."""
+    import uvicorn
+
+    if app_name == "nlp":
+        from my_a2a.multi_a2a.client.nlp_client_agent.server import build_app
+    else:
+        from my_a2a.multi_a2a.expense_manager import build_app
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(build_app(), log_level="warning", lifespan="off"))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{sock.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        await serving
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.first_chunk: list[float] = []
+        self.rejected = 0
+        self.errors: dict[str, int] = {}
+        # Sessions with a failed turn: its user message has no reply
+        self.failed_sessions: set[str] = set()
+
+
+async def send(http: httpx.AsyncClient, url: str, body: dict) -> tuple[str, float, float | None]:
+    """Sends one message: (outcome, latency, time to first chunk); outcome is "ok", "rejected" or an error."""
+    started = time.perf_counter()
+    first = None
+    try:
+        if not body.get("stream"):
+            response = await http.post(url + "/run", json=body)
+            if response.status_code != 200:
+                return "rejected" if response.status_code == 429 else f"HTTP {response.status_code}", 0.0, None
+        else:
+            async with http.stream("POST", url + "/run", json=body) as response:
+                if response.status_code != 200:
+                    return "rejected" if response.status_code == 429 else f"HTTP {response.status_code}", 0.0, None
+                event = None
+                async for line in response.aiter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                        if event == "message" and first is None:
+                            first = time.perf_counter() - started
+                if event != "done":
+                    return "stream error" if event == "error" else "stream ended early", 0.0, None
+    except httpx.HTTPError as e:
+        return type(e).__name__, 0.0, None
+    return "ok", time.perf_counter() - started, first
+
+
+async def record(http: httpx.AsyncClient, url: str, body: dict, recorder: Recorder) -> None:
+    outcome, latency, first = await send(http, url, body)
+    if outcome == "ok":
+        recorder.latencies.append(latency)
+        if first is not None:
+            recorder.first_chunk.append(first)
+    elif outcome == "rejected":
+        recorder.rejected += 1
+    else:
+        recorder.errors[outcome] = recorder.errors.get(outcome, 0) + 1
+        recorder.failed_sessions.add(body["session_id"])
+
+
+async def conversation(url: str, user: str, session: str, args, recorder: Recorder, tls: ssl.SSLContext) -> None:
+    bodies = [
+        {"user_id": user, "session_id": session, "message": DEFAULT_MESSAGES[turn % len(DEFAULT_MESSAGES)], "stream": args.stream}
+        for turn in range(args.turns)
+    ]
+    # A client per conversation: one shared pool of hundreds of connections
+    # costs the benchmark more CPU (httpcore scans the pool per request) than the
+    # server does. They share one TLS context: loading the CA bundle takes ~35 ms
+    async with httpx.AsyncClient(timeout=args.timeout, verify=tls) as http:
+        if args.pipelined:
+            await asyncio.gather(*(record(http, url, body, recorder) for body in bodies))
+        else:
+            for body in bodies:
+                await record(http, url, body, recorder)
+
+
+async def overlapping_sessions(http, url: str, sessions: list[tuple[str, str]], failed: set[str]) -> int:
+    """Sessions whose transcript has two user messages in a row (sessions with a failed turn are skipped)."""
+    overlapping = 0
+    for user, session in sessions:
+        if session in failed:
+            continue
+        response = await http.get(f"{url}/sessions/{user}/{session}")
+        if response.status_code != 200:
+            continue
+        authors = [event["author"] for event in response.json()["events"]]
+        if any(first == second == "user" for first, second in zip(authors, authors[1:])):
+            overlapping += 1
+    return overlapping
+
+
+async def run(url: str, args) -> dict:
+    sessions = [(f"user-{index % args.users}", f"session-{index}") for index in range(args.sessions)]
+    recorder = Recorder()
+    tls = ssl.create_default_context()
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(url, user, session, args, recorder, tls) for user, session in sessions))
+    elapsed = time.perf_counter() - started
+    async with httpx.AsyncClient(timeout=args.timeout) as http:
+        overlapping = await overlapping_sessions(http, url, sessions, recorder.failed_sessions)
+    return {
+        "sessions": args.sessions,
+        "users": args.users,
+        "turns": args.turns,
+        "pipelined": args.pipelined,
+        "stream": args.stream,
+        "seconds": round(elapsed, 2),
+        "requests_per_second": round(len(recorder.latencies) / elapsed, 1),
+        "ok": len(recorder.latencies),
+        "rejected": recorder.rejected,
+        "errors": recorder.errors,
+        "failed_sessions": len(recorder.failed_sessions),
+        "latency": percentiles(recorder.latencies),
+        "first_chunk": percentiles(recorder.first_chunk),
+        "overlapping_sessions": overlapping,
+    }
+
+
+async def main(args) -> None:
+    if args.serve:
+        async with served(args.serve) as url:
+            report = await run(url, args)
+    else:
+        report = await run(args.url.rstrip("/"), args)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", nargs="?", default="http://localhost:8020", help="Front door URL")
+    parser.add_argument("--serve", choices=["nlp", "expense"], help="Serve this app's front door in-process instead")
+    parser.add_argument("--sessions", type=int, default=200, help="Concurrent conversations")
+    parser.add_argument("--users", type=int, default=50, help="Users the sessions are spread over")
+    parser.add_argument("--turns", type=int, default=5, help="Messages per session")
+    parser.add_argument("--pipelined", action="store_true", help="Send a session's messages at once instead of in turn")
+    parser.add_argument("--stream", action="store_true", help="Request streamed responses")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write the report as JSON")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,290 @@
+"""
+Open-loop load generator for the A2A agents.
+
+Requests are sent on a schedule (fixed-rate or Poisson arrivals), independent
+of how fast responses come back, so queueing shows up as latency instead of
+silently lowering the offered load. A ramp schedule steps the rate up to find
+the knee of the system.
+
+Latency is reported twice:
+- service: from the moment the request was actually sent;
+- corrected: from the moment it was scheduled to be sent. This corrects for
+  coordinated omission, e.g. when the generator itself falls behind.
+
+Both come with percentiles and a log-bucketed histogram, per ramp stage and
+overall, along with throughput and error classes.
+
+Targets:
+- an agent URL (any agent card URL: planner, greeting, sentiment, pos,
+  or one mounted in the combined host);
+- "orchestrator": the Client orchestration loop (plan, then every step)
+  across the agents in the Client registry (A2A_AGENT_REGISTRY).
+
+To run offline, start the servers with the stub model, e.g.
+    A2A_STUB_LLM='{"latency": 0.2}' python -m my_a2a.multi_a2a.host
+
+Usage:
+    python benchmarks/loadgen.py http://localhost:8003/ --rate 20 --duration 30
+    python benchmarks/loadgen.py http://localhost:8000/sentiment/ --ramp 10:20 20:20 40:20 80:20 --arrival poisson
+    python benchmarks/loadgen.py orchestrator --rate 5 --duration 60 --corpus texts.txt --output load.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import sys
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+from a2a.client import A2ACardResolver, A2AClientHTTPError, A2AClientTimeoutError, ClientFactory
+from a2a.client.client import ClientConfig
+from a2a.types import Message, Part, Role, Task, TaskState, TextPart
+
+DEFAULT_CORPUS = [
+    "I love this phone, the battery is great",
+    "The delivery was slow and the food was cold",
+    "The meeting is at ten in the main room",
+    "What a fantastic day for a walk in the park",
+    "Service was slow but the food was fine",
+    "The cat sat on the mat",
+]
+
+PERCENTILES = (0.50, 0.90, 0.99, 0.999)
+
+# Histogram buckets: 1 ms upwards, four per doubling
+_BUCKETS_PER_DOUBLING = 4
+
+
+def load_corpus(path: str | None) -> list[str]:
+    """Texts to send: one per line, or JSONL objects with a "text" field."""
+    if not path:
+        return DEFAULT_CORPUS
+    texts = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            texts.append(json.loads(line)["text"] if line.startswith("{") else line)
+    return texts
+
+
+def parse_ramp(stages: list[str]) -> list[tuple[float, float]]:
+    """["10:30", "50:30"] -> [(10.0 rps, 30.0 s), (50.0 rps, 30.0 s)]"""
+    schedule = []
+    for stage in stages:
+        rate, duration = stage.split(":")
+        schedule.append((float(rate), float(duration)))
+    return schedule
+
+
+def bucket_of(latency: float) -> float:
+    """Upper bound (ms) of the log bucket holding a latency given in seconds."""
+    ms = max(latency * 1000, 1.0)
+    index = math.ceil(math.log2(ms) * _BUCKETS_PER_DOUBLING)
+    return round(2 ** (index / _BUCKETS_PER_DOUBLING), 2)
+
+
+@dataclass
+class Recorder:
+    """Latencies and outcomes for one ramp stage."""
+    rate: float
+    duration: float
+    scheduled: int = 0
+    service: list = field(default_factory=list)
+    corrected: list = field(default_factory=list)
+    errors: Counter = field(default_factory=Counter)
+    max_send_lag: float = 0.0
+
+    def summary(self) -> dict:
+        def distribution(latencies):
+            latencies = sorted(latencies)
+            if not latencies:
+                return None
+            return {
+                **{
+                    f"p{q * 100:g}_ms": round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+                    for q in PERCENTILES
+                },
+                "max_ms": round(latencies[-1] * 1000, 2),
+                "histogram_ms": dict(sorted(Counter(bucket_of(latency) for latency in latencies).items())),
+            }
+
+        completed = len(self.service)
+        return {
+            "offered_rps": self.rate,
+            "duration_s": self.duration,
+            "scheduled": self.scheduled,
+            "completed": completed,
+            "throughput_rps": round(completed / self.duration, 2) if self.duration else None,
+            "errors": dict(self.errors),
+            "max_send_lag_ms": round(self.max_send_lag * 1000, 2),
+            "service_latency": distribution(self.service),
+            "corrected_latency": distribution(self.corrected),
+        }
+
+
+def classify(error: BaseException) -> str:
+    if isinstance(error, (A2AClientTimeoutError, httpx.TimeoutException, asyncio.TimeoutError)):
+        return "timeout"
+    if isinstance(error, A2AClientHTTPError):
+        return f"http_{error.status_code}"
+    if isinstance(error, httpx.ConnectError):
+        return "connect"
+    if isinstance(error, httpx.TransportError):
+        return "transport"
+    return type(error).__name__
+
+
+class TaskFailed(Exception):
+    pass
+
+
+class AgentTarget:
+    """Sends one message per request to a single agent through ClientFactory."""
+
+    def __init__(self, url: str, http: httpx.AsyncClient):
+        self.url = url
+        self.http = http
+        self.client = None
+
+    async def setup(self):
+        card = await A2ACardResolver(httpx_client=self.http, base_url=self.url).get_agent_card()
+        self.client = ClientFactory(config=ClientConfig(httpx_client=self.http)).create(card)
+
+    async def send(self, text: str):
+        message = Message(role=Role.user, message_id=str(uuid.uuid4()), parts=[Part(root=TextPart(text=text))])
+        final = None
+        async for response in self.client.send_message(request=message):
+            final = response[0] if isinstance(response, tuple) else response
+        if isinstance(final, Task) and final.status.state != TaskState.completed:
+            raise TaskFailed(final.status.state.value)
+
+
+class OrchestratorTarget:
+    """Runs the Client orchestration loop: ask the planner, then call every planned step."""
+
+    def __init__(self):
+        self.agents_info = None
+
+    async def setup(self):
+        from my_a2a.multi_a2a.client.nlp_client_agent.agent import Client
+        from my_a2a.multi_a2a.common.tracing import tracer
+
+        self.client_class = Client
+        self.tracer = tracer
+        self.agents_info = await Client().get_all_agent_cards()
+
+    async def send(self, text: str):
+        client = self.client_class()
+        client.agents_info = self.agents_info
+        available_agents = [name for name in self.agents_info if name not in ("planner", "greeting")]
+        # With A2A_TRACE set, every query is one trace (see benchmarks/critical_path.py)
+        with self.tracer.start_as_current_span("query"):
+            plan = await client.send_message(
+                "planner",
+                json.dumps({"user_input": f"Give me complete NLP analysis for '{text}'", "available_agents": available_agents}),
+            )
+            if not isinstance(plan, dict):
+                raise TaskFailed("no plan")
+            for step in plan.get("steps", []):
+                await client.send_message(step["agent"], step["input"])
+
+
+async def run_stage(target, recorder: Recorder, corpus: list[str], arrival: str, rng: random.Random, timeout: float):
+    loop = asyncio.get_running_loop()
+    in_flight = set()
+
+    async def one(intended: float, text: str):
+        sent = loop.time()
+        recorder.max_send_lag = max(recorder.max_send_lag, sent - intended)
+        try:
+            await asyncio.wait_for(target.send(text), timeout)
+        except Exception as e:
+            recorder.errors[classify(e)] += 1
+            return
+        done = loop.time()
+        recorder.service.append(done - sent)
+        recorder.corrected.append(done - intended)
+
+    start = loop.time()
+    intended = start
+    end = start + recorder.duration
+    while True:
+        gap = rng.expovariate(recorder.rate) if arrival == "poisson" else 1.0 / recorder.rate
+        intended += gap
+        if intended >= end:
+            break
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        recorder.scheduled += 1
+        task = asyncio.create_task(one(intended, rng.choice(corpus)))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    # Requests still running belong to this stage
+    if in_flight:
+        await asyncio.gather(*in_flight)
+
+
+async def main(args):
+    schedule = parse_ramp(args.ramp) if args.ramp else [(args.rate, args.duration)]
+    corpus = load_corpus(args.corpus)
+    rng = random.Random(args.seed)
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as http:
+        target = OrchestratorTarget() if args.target == "orchestrator" else AgentTarget(args.target, http)
+        await target.setup()
+
+        stages = []
+        # The Client prints every response; keep the report readable
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for rate, duration in schedule:
+                recorder = Recorder(rate=rate, duration=duration)
+                await run_stage(target, recorder, corpus, args.arrival, rng, args.timeout)
+                stages.append(recorder)
+                print(f"stage {rate} rps: {recorder.summary()['throughput_rps']} rps, "
+                      f"errors {dict(recorder.errors)}", file=sys.stderr)
+
+    overall = Recorder(rate=sum(r.rate * r.duration for r in stages) / sum(r.duration for r in stages),
+                       duration=sum(r.duration for r in stages))
+    for recorder in stages:
+        overall.scheduled += recorder.scheduled
+        overall.service += recorder.service
+        overall.corrected += recorder.corrected
+        overall.errors.update(recorder.errors)
+        overall.max_send_lag = max(overall.max_send_lag, recorder.max_send_lag)
+
+    report = {
+        "target": args.target,
+        "arrival": args.arrival,
+        "stages": [recorder.summary() for recorder in stages],
+        "overall": overall.summary(),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("target", help='Agent URL (e.g. http://localhost:8003/) or "orchestrator"')
+    parser.add_argument("--arrival", choices=("fixed", "poisson"), default="poisson")
+    parser.add_argument("--rate", type=float, default=10.0, help="Requests per second (without --ramp)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds (without --ramp)")
+    parser.add_argument("--ramp", nargs="+", metavar="RATE:SECONDS", help="Stages of increasing load")
+    parser.add_argument("--corpus", help="Text file (one text per line) or JSONL with a \"text\" field")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout (s)")
+    parser.add_argument("--max-connections", type=int, default=512)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,220 @@
+"""
+Semantic cache benchmark: lookup cost at scale and how often it serves a
+wrong answer.
+
+1. Latency: the cache is filled with --entries synthetic texts, then timed
+   for single lookups (one request) and batched lookups (--batch texts at
+   once, as a batch request does), plus inserts once the cache is full and
+   evicting. Reports percentiles per lookup and the size of the vector matrix.
+2. Accuracy, on a labeled fixture of (cached text, its label, query text, its
+   label) pairs: near-duplicates that must hit (case, punctuation, emoji,
+   small wording changes) and look-alikes that must not (negations, antonyms,
+   other requests). The cached texts go into a cache that also holds
+   --background unrelated entries; then, for each threshold, every query is
+   looked up. A hit whose cached label differs from the query's label is a
+   false hit. Reports the false-hit rate and the hit rate on true
+   near-duplicates for every threshold.
+
+Usage:
+    python benchmarks/semantic_cache.py --entries 100000
+    python benchmarks/semantic_cache.py --dimensions 256 512 1024 --fixture pairs.jsonl --output semantic_cache.json
+"""
+import argparse
+import json
+import random
+import time
+
+from my_a2a.multi_a2a.common.semantic_cache import (
+    DEFAULT_DIMENSIONS,
+    DEFAULT_THRESHOLDS,
+    HashingVectorizer,
+    SemanticCache,
+)
+
+# (agent, cached text, its label, query text, its label)
+FIXTURE = [
+    # Same request, different surface
+    ("sentiment", "I love this phone, the battery is great", "POS", "i love this phone the battery is great", "POS"),
+    ("sentiment", "I love this phone, the battery is great", "POS", "I LOVE this phone!!! the battery is great 😍", "POS"),
+    ("sentiment", "The delivery was slow and the food was cold", "NEG", "The delivery was slow, and the food was cold.", "NEG"),
+    ("sentiment", "The delivery was slow and the food was cold", "NEG", "the delivery was so slow and the food was cold 😡", "NEG"),
+    ("sentiment", "What a fantastic day for a walk in the park", "POS", "What a fantastic day for a walk in the park!", "POS"),
+    ("sentiment", "What a fantastic day for a walk in the park", "POS", "what a fantastic day for a walk in the park 🌞🌳", "POS"),
+    ("sentiment", "The meeting is at ten in the main room", "NEU", "The meeting is at 10 in the main room", "NEU"),
+    ("sentiment", "The meeting is at ten in the main room", "NEU", "the meeting is at ten in the main room.", "NEU"),
+    ("sentiment", "Service was slow but the food was fine", "NEU", "Service was slow, but the food was fine", "NEU"),
+    ("sentiment", "I really enjoyed the concert last night", "POS", "I really enjoyed the concert last night!!", "POS"),
+    ("sentiment", "I really enjoyed the concert last night", "POS", "I really really enjoyed the concert last night", "POS"),
+    ("sentiment", "This is the worst customer service I have ever had", "NEG", "This is the worst customer service I've ever had", "NEG"),
+    ("sentiment", "This is the worst customer service I have ever had", "NEG", "this is the worst customer service i have ever had!!!", "NEG"),
+    ("sentiment", "The hotel room was clean and the staff were friendly", "POS", "The hotel room was clean and the staff was friendly", "POS"),
+    ("sentiment", "The package arrived on Tuesday", "NEU", "The package arrived on Tuesday.", "NEU"),
+    ("sentiment", "My laptop keeps crashing and support never answers", "NEG", "my laptop keeps crashing and support never answers 😤", "NEG"),
+    ("sentiment", "Great value for the price", "POS", "great value for the price!", "POS"),
+    ("sentiment", "Great value for the price", "POS", "Great value for the money", "POS"),
+    # Look-alikes with another answer
+    ("sentiment", "I love this phone, the battery is great", "POS", "I don't love this phone, the battery is great", "NEU"),
+    ("sentiment", "The food was good", "POS", "The food was not good", "NEG"),
+    ("sentiment", "The food was good", "POS", "The food was bad", "NEG"),
+    ("sentiment", "The movie was great", "POS", "The movie was terrible", "NEG"),
+    ("sentiment", "The movie was great", "POS", "The movie was not great", "NEG"),
+    ("sentiment", "I am happy with the service", "POS", "I am unhappy with the service", "NEG"),
+    ("sentiment", "I am happy with the service", "POS", "I am not happy with the service", "NEG"),
+    ("sentiment", "The room was clean", "POS", "The room was dirty", "NEG"),
+    ("sentiment", "The delivery was fast", "POS", "The delivery was slow", "NEG"),
+    ("sentiment", "I would recommend this restaurant", "POS", "I would never recommend this restaurant", "NEG"),
+    ("sentiment", "The staff were helpful", "POS", "The staff were unhelpful", "NEG"),
+    ("sentiment", "The meeting is at ten in the main room", "NEU", "The meeting at ten in the main room was a disaster", "NEG"),
+    ("sentiment", "The package arrived on Tuesday", "NEU", "The package finally arrived on Tuesday, thank you so much", "POS"),
+    ("sentiment", "This is the worst customer service I have ever had", "NEG", "This is the best customer service I have ever had", "POS"),
+    # Greetings
+    ("greeting", "Hello there", "hello", "hello there!", "hello"),
+    ("greeting", "Hello there", "hello", "Hello there 👋", "hello"),
+    ("greeting", "Hi, how are you?", "how_are_you", "hi how are you", "how_are_you"),
+    ("greeting", "Hi, how are you?", "how_are_you", "Hi, how are you doing?", "how_are_you"),
+    ("greeting", "Good morning everyone", "morning", "good morning, everyone!", "morning"),
+    ("greeting", "Good morning everyone", "morning", "Good evening everyone", "evening"),
+    ("greeting", "Hi, how are you?", "how_are_you", "Hi, who are you?", "who_are_you"),
+    ("greeting", "Hello there", "hello", "Goodbye there", "goodbye"),
+    # Personalized greetings: a hit hands one person's reply to another
+    ("greeting", "Hi, I'm Alice, nice to meet you", "alice", "Hi, I'm Bob, nice to meet you", "bob"),
+    ("greeting", "Good morning, Dr. Smith", "smith", "Good morning, Dr. Jones", "jones"),
+    ("greeting", "Hello from Maria in Madrid", "maria", "Hello from Mario in Madrid", "mario"),
+]
+
+_WORDS = (
+    "service food delivery phone battery meeting room staff price movie hotel concert "
+    "order package screen app update team project weather train flight ticket coffee "
+    "great slow cold fine good bad late early clean noisy quiet friendly rude cheap "
+    "the a was is were and but very really quite today yesterday again never always"
+).split()
+
+PERCENTILES = (0.50, 0.90, 0.99)
+
+
+def synthetic_texts(count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 14))) + f" #{i}" for i in range(count)]
+
+
+def load_fixture(path: str | None) -> list[tuple]:
+    """The built-in fixture, or JSONL objects with agent, cached, cached_label, query and query_label."""
+    if not path:
+        return FIXTURE
+    with open(path) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["agent"], row["cached"], row["cached_label"], row["query"], row["query_label"]) for row in rows]
+
+
+def percentiles(seconds: list[float]) -> dict:
+    seconds = sorted(seconds)
+    return {
+        f"p{q * 100:g}_us": round(seconds[min(len(seconds) - 1, int(q * len(seconds)))] * 1e6, 1)
+        for q in PERCENTILES
+    }
+
+
+def measure_latency(dimensions: int, args) -> dict:
+    texts = synthetic_texts(args.entries, seed=1)
+    cache = SemanticCache(threshold=0.9, capacity=args.entries, vectorizer=HashingVectorizer(dimensions))
+    started = time.perf_counter()
+    for start in range(0, len(texts), 1000):
+        cache.put_many(texts[start:start + 1000], list(range(start, start + 1000)))
+    fill = time.perf_counter() - started
+
+    # Half of the queries are near-duplicates of cached entries, half are new
+    rng = random.Random(2)
+    queries = [
+        rng.choice(texts).upper() + "!" if i % 2 else " ".join(rng.choice(_WORDS) for _ in range(9))
+        for i in range(args.lookups)
+    ]
+    single = []
+    for query in queries:
+        started = time.perf_counter()
+        cache.lookup(query)
+        single.append(time.perf_counter() - started)
+
+    batched = []
+    for start in range(0, len(queries), args.batch):
+        chunk = queries[start:start + args.batch]
+        started = time.perf_counter()
+        cache.lookup_many(chunk)
+        batched.append((time.perf_counter() - started) / len(chunk))
+
+    # The cache is full: every insert evicts the least recently used entry
+    inserts = []
+    for query in queries[:1000]:
+        started = time.perf_counter()
+        cache.put(query, None)
+        inserts.append(time.perf_counter() - started)
+
+    return {
+        "entries": len(cache),
+        "dimensions": dimensions,
+        "matrix_mb": round(cache.vectors.nbytes / 2**20, 1),
+        "fill_seconds": round(fill, 2),
+        "lookup": percentiles(single),
+        f"batched_lookup_per_item_{args.batch}": percentiles(batched),
+        "insert_evicting": percentiles(inserts),
+    }
+
+
+def measure_accuracy(dimensions: int, fixture: list[tuple], args) -> dict:
+    vectorizer = HashingVectorizer(dimensions)
+    background = synthetic_texts(args.background, seed=3)
+    by_threshold = {}
+    for threshold in args.thresholds:
+        by_agent = {}
+        for agent in sorted({row[0] for row in fixture}):
+            rows = [row for row in fixture if row[0] == agent]
+            cache = SemanticCache(threshold, capacity=len(rows) + len(background), vectorizer=vectorizer)
+            # Background entries carry a label of their own: hitting one is a false hit
+            cache.put_many(background, ["<background>"] * len(background))
+            cache.put_many([row[1] for row in rows], [row[2] for row in rows])
+            found = cache.lookup_many([row[3] for row in rows])
+            same = [(row, label) for row, label in zip(rows, found) if row[2] == row[4]]
+            different = [(row, label) for row, label in zip(rows, found) if row[2] != row[4]]
+            false_hits = [row for row, label in zip(rows, found) if label is not None and label != row[4]]
+            by_agent[agent] = {
+                "hit_rate_on_duplicates": round(sum(label == row[4] for row, label in same) / len(same), 3) if same else None,
+                "false_hit_rate": round(len(false_hits) / len(rows), 3),
+                "false_hits_on_lookalikes": round(sum(label is not None for _, label in different) / len(different), 3) if different else None,
+                "false_hits": [f"{row[3]!r} -> cached {row[1]!r}" for row in false_hits][: args.show],
+            }
+        by_threshold[str(threshold)] = by_agent
+    return by_threshold
+
+
+def main(args) -> None:
+    fixture = load_fixture(args.fixture)
+    report = {"default_thresholds": DEFAULT_THRESHOLDS, "results": []}
+    for dimensions in args.dimensions:
+        latency = measure_latency(dimensions, args)
+        accuracy = measure_accuracy(dimensions, fixture, args)
+        report["results"].append({**latency, "accuracy": accuracy})
+
+        print(f"{dimensions} dimensions, {latency['entries']} entries ({latency['matrix_mb']} MB):")
+        for name in ("lookup", f"batched_lookup_per_item_{args.batch}", "insert_evicting"):
+            print(f"  {name:<32}" + "  ".join(f"{key}={value}" for key, value in latency[name].items()))
+        print(f"  {'threshold':<10}{'agent':<11}{'dup hits':>9}{'false hits':>12}{'on look-alikes':>16}")
+        for threshold, by_agent in accuracy.items():
+            for agent, result in by_agent.items():
+                print(f"  {threshold:<10}{agent:<11}{result['hit_rate_on_duplicates']!s:>9}"
+                      f"{result['false_hit_rate']!s:>12}{result['false_hits_on_lookalikes']!s:>16}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=100000, help="Cache size for the latency runs")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=64, help="Texts per batched lookup")
+    parser.add_argument("--dimensions", type=int, nargs="+", default=[DEFAULT_DIMENSIONS])
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.75, 0.8, 0.85, 0.9, 0.95])
+    parser.add_argument("--background", type=int, default=10000, help="Unrelated entries cached next to the fixture")
+    parser.add_argument("--fixture", help="Labeled pairs as JSONL (default: the built-in fixture)")
+    parser.add_argument("--show", type=int, default=5, help="False hits listed per agent and threshold in the JSON report")
+    parser.add_argument("--output", help="Write the report as JSON")
+    main(parser.parse_args())
@@ -0,0 +1,154 @@
+"""
+Soak test: fails if an agent server retains memory per request.
+
+Drives one agent with a steady stream of requests and measures, through the
+server's memory diagnostics routes, how much of what those requests
+allocated is still held afterwards:
+
+1. warm-up requests, so lazy imports, connection pools and caches fill up;
+2. a tracemalloc snapshot on the server (after a full collection);
+3. the soak requests;
+4. a diff against that snapshot: bytes still allocated per request, the top
+   growing allocation sites, and how each tracked subsystem (ADK session
+   events, sessions, A2A tasks, caches) grew.
+
+Exits with status 1 when retained bytes per request exceed --max-bytes-per-request,
+so it can gate a CI job. Requests from other clients during the soak are
+counted too: run it against an otherwise idle server.
+
+The server needs the diagnostics routes:
+    A2A_DIAGNOSTICS=1 A2A_ADMIN_TOKEN=secret A2A_STUB_LLM='{"latency": 0.01}' \\
+        python -m my_a2a.multi_a2a.host
+
+Usage:
+    A2A_ADMIN_TOKEN=secret python benchmarks/soak.py http://localhost:8000/sentiment/ --requests 2000
+    A2A_ADMIN_TOKEN=secret python benchmarks/soak.py http://localhost:8003/ --max-bytes-per-request 512 --output soak.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from loadgen import AgentTarget, load_corpus
+
+
+def subsystem_growth(before: dict, after: dict, requests: int) -> dict:
+    """Per-request growth of every tracked subsystem, in objects and bytes."""
+    growth = {}
+    for subsystem, entries in after["subsystems"].items():
+        for name, now in entries.items():
+            then = before["subsystems"].get(subsystem, {}).get(name, {"objects": 0, "bytes": 0})
+            objects = now["objects"] - then["objects"]
+            size = now["bytes"] - then["bytes"] if now["bytes"] is not None and then["bytes"] is not None else None
+            if objects or size:
+                growth[f"{subsystem}/{name}"] = {
+                    "objects_per_request": round(objects / requests, 3),
+                    "bytes_per_request": round(size / requests, 1) if size is not None else None,
+                }
+    return growth
+
+
+async def drive(target: AgentTarget, corpus: list[str], requests: int, concurrency: int) -> int:
+    """Sends `requests` messages, `concurrency` at a time; returns how many failed."""
+    failures = 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        for index in next_index:
+            try:
+                await target.send(f"{corpus[index % len(corpus)]} ({index})")
+            except Exception:
+                failures += 1
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return failures
+
+
+async def main(args) -> int:
+    token = args.admin_token or os.getenv("A2A_ADMIN_TOKEN")
+    if not token:
+        print("Set A2A_ADMIN_TOKEN (or --admin-token) to the server's admin token.", file=sys.stderr)
+        return 2
+    parts = urlsplit(args.url)
+    admin_url = args.admin_url or f"{parts.scheme}://{parts.netloc}"
+    corpus = load_corpus(args.corpus)
+
+    async with httpx.AsyncClient(timeout=args.timeout) as http:
+        admin = httpx.AsyncClient(base_url=admin_url, headers={"Authorization": f"Bearer {token}"}, timeout=300)
+        async with admin:
+            target = AgentTarget(args.url, http)
+            await target.setup()
+
+            print(f"Warming up with {args.warmup} requests ...")
+            await drive(target, corpus, args.warmup, args.concurrency)
+
+            before = (await admin.get("/admin/memory", params={"gc": "1"})).raise_for_status().json()
+            snapshot = (await admin.post("/admin/memory/snapshot")).raise_for_status().json()
+
+            print(f"Soaking with {args.requests} requests ...")
+            started = time.perf_counter()
+            failures = await drive(target, corpus, args.requests, args.concurrency)
+            elapsed = time.perf_counter() - started
+
+            diff = (await admin.get(
+                "/admin/memory/diff", params={"since": snapshot["id"], "top": args.top}
+            )).raise_for_status().json()
+            after = (await admin.get("/admin/memory", params={"gc": "1"})).raise_for_status().json()
+            if args.stop_tracing:
+                await admin.delete("/admin/memory/snapshot")
+
+    requests = diff["requests"] or args.requests
+    per_request = diff["size_diff_bytes"] / requests
+    rss_growth = (
+        (after["rss_bytes"] - before["rss_bytes"]) / requests
+        if after["rss_bytes"] is not None and before["rss_bytes"] is not None else None
+    )
+    report = {
+        "url": args.url,
+        "requests": requests,
+        "failures": failures,
+        "throughput_rps": round(args.requests / elapsed, 1),
+        "retained_bytes_per_request": round(per_request, 1),
+        "rss_bytes_per_request": round(rss_growth, 1) if rss_growth is not None else None,
+        "max_bytes_per_request": args.max_bytes_per_request,
+        "passed": per_request <= args.max_bytes_per_request,
+        "subsystems": subsystem_growth(before, after, requests),
+        "top_sites": diff["top"],
+    }
+
+    print(f"{requests} requests ({failures} failed) at {report['throughput_rps']} rps")
+    print(f"Retained per request: {report['retained_bytes_per_request']} bytes traced, "
+          f"{report['rss_bytes_per_request']} bytes resident")
+    for name, growth in report["subsystems"].items():
+        print(f"  {name:<32} {growth['objects_per_request']:>8} objects/request  {growth['bytes_per_request']} bytes/request")
+    print("Top growing allocation sites:")
+    for site in report["top_sites"][:10]:
+        print(f"  {site['size_diff']:>+12} B {site['count_diff']:>+8}  {site['site'][0] if site['site'] else '?'}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print("PASS" if report["passed"] else f"FAIL: more than {args.max_bytes_per_request} bytes retained per request")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("url", help="Agent card URL to soak")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-bytes-per-request", type=float, default=1024, help="Retained bytes per request that fail the run")
+    parser.add_argument("--corpus", help="Texts to send: one per line, or JSONL with a text field")
+    parser.add_argument("--admin-url", help="Where the /admin routes are served (default: the agent URL's origin)")
+    parser.add_argument("--admin-token", help="Default: A2A_ADMIN_TOKEN")
+    parser.add_argument("--top", type=int, default=20, help="Allocation sites to report")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--stop-tracing", action="store_true", help="Stop tracemalloc on the server afterwards")
+    parser.add_argument("--output", help="Write the report as JSON")
+    sys.exit(asyncio.run(main(parser.parse_args())))
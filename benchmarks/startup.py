@@ -0,0 +1,157 @@
+"""
+Measures cold-start cost per entry point and checks it against a budget.
+
+For every entry point, in fresh interpreters:
+- import: wall-clock time of `python -X importtime -c "import <module>"`,
+  with the self time grouped by top-level package to show where it goes;
+- first_request (servers only): time from spawning `python -m <module>` to the
+  first successfully served agent-card request.
+
+Each figure is the median of `--repeat` runs. Any figure above its budget
+(scaled by `--budget-scale` for slower machines) makes the script exit with
+status 1, so it can gate changes that regress startup.
+
+Usage:
+    python benchmarks/startup.py --repeat 3 --output startup.json
+    python benchmarks/startup.py --only planner pos --budget-scale 1.5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+# name -> (module, agent card path when the module serves HTTP, or None)
+ENTRY_POINTS = {
+    "planner": ("my_a2a.multi_a2a.planner_agent.main", "/.well-known/agent-card.json"),
+    "greeting": ("my_a2a.multi_a2a.greeting_agent.main", "/.well-known/agent-card.json"),
+    "sentiment": ("my_a2a.multi_a2a.sentiment_agent.main", "/.well-known/agent-card.json"),
+    "pos": ("my_a2a.multi_a2a.pos_tag_agent.main", "/.well-known/agent-card.json"),
+    "host": ("my_a2a.multi_a2a.host", "/planner/.well-known/agent-card.json"),
+    "nlp_client": ("my_a2a.multi_a2a.client.nlp_client_agent.agent", None),
+    "adk_sentiment": ("my_adk.simple_agent.sentiment_agent.agent", None),
+}
+
+# Seconds. Planner and POS load neither ADK nor LangChain/LangGraph until their
+# first request; the others need ADK agents at startup.
+BUDGETS = {
+    "planner": {"import_s": 2.0, "first_request_s": 3.0},
+    "greeting": {"import_s": 10.0, "first_request_s": 10.0},
+    "sentiment": {"import_s": 10.0, "first_request_s": 10.0},
+    "pos": {"import_s": 2.0, "first_request_s": 3.0},
+    "host": {"import_s": 2.0, "first_request_s": 12.0},
+    "nlp_client": {"import_s": 10.0},
+    "adk_sentiment": {"import_s": 10.0},
+}
+
+
+def package_of(module: str) -> str:
+    parts = module.split(".")
+    # Namespace packages are only meaningful one level down (google.adk, google.genai)
+    return ".".join(parts[:2]) if parts[0] == "google" else parts[0]
+
+
+def measure_import(module: str) -> tuple[float, dict]:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if result.returncode:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    by_package = defaultdict(int)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        by_package[package_of(name.strip())] += int(self_us)
+    return elapsed, by_package
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_first_request(module: str, path: str, timeout: float = 120.0) -> float:
+    port = free_port()
+    env = dict(os.environ, A2A_PORT=str(port), A2A_HOST="127.0.0.1", A2A_WORKERS="1")
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", module],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        with httpx.Client() as client:
+            while time.perf_counter() - started < timeout:
+                if server.poll() is not None:
+                    raise RuntimeError(f"{module} exited with status {server.returncode}")
+                try:
+                    if client.get(f"http://127.0.0.1:{port}{path}").status_code == 200:
+                        return time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.02)
+        raise TimeoutError(f"{module} served no request within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main(args):
+    report = {}
+    regressions = []
+    for name in args.only or ENTRY_POINTS:
+        module, path = ENTRY_POINTS[name]
+        imports = [measure_import(module) for _ in range(args.repeat)]
+        by_package = imports[-1][1]
+        entry = {
+            "module": module,
+            "import_s": round(statistics.median(elapsed for elapsed, _ in imports), 3),
+            "heaviest_packages_s": {
+                package: round(us / 1e6, 3)
+                for package, us in sorted(by_package.items(), key=lambda item: -item[1])[: args.top]
+            },
+        }
+        if path is not None:
+            entry["first_request_s"] = round(
+                statistics.median(measure_first_request(module, path) for _ in range(args.repeat)), 3
+            )
+
+        for metric, budget in BUDGETS.get(name, {}).items():
+            budget *= args.budget_scale
+            if metric in entry and entry[metric] > budget:
+                regressions.append(f"{name} {metric}: {entry[metric]}s > budget {budget:.2f}s")
+        report[name] = entry
+        print(f"{name}: {entry}", file=sys.stderr)
+
+    report["regressions"] = regressions
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(ENTRY_POINTS), help="Entry points to measure")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=8, help="Packages to list per entry point")
+    parser.add_argument("--budget-scale", type=float, default=1.0)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    main(parser.parse_args())
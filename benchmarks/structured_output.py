@@ -0,0 +1,123 @@
+"""
+Compares prose-mode "strict JSON" prompting against native structured output.
+
+Both modes run the same planner / POS / sentiment style requests against the
+offline StubLlm, which mangles a seeded fraction of prose-mode replies the way
+real models do. Reported per mode: LLM calls, retries, parse failures and
+requests that failed outright.
+
+Usage:
+    python benchmarks/structured_output.py --requests 500 --output structured_output.json
+"""
+import argparse
+import asyncio
+import json
+import re
+
+from pydantic import ValidationError
+
+import my_a2a.llm.model as llm_model
+from my_a2a.llm.json_repair import JSONRepairError, parse_stats
+from my_a2a.multi_a2a.common.schemas import Plan, PosTagResult, SentimentResult
+from my_adk.llm.stub import StubLlm
+
+TASKS = {
+    "planner": (
+        Plan,
+        lambda text: {"steps": [{"agent": "sentiment", "input": text}, {"agent": "pos", "input": text}]},
+    ),
+    "pos": (
+        PosTagResult,
+        lambda text: {"tags": [{"word": word, "tag": "NN"} for word in text.split()]},
+    ),
+    "sentiment": (
+        SentimentResult,
+        lambda text: {"sentiment": "POS" if "love" in text else "NEU"},
+    ),
+}
+
+TEXTS = [
+    "I love Groq models!",
+    "The cat sat on the mat",
+    "Service was slow but the food was fine",
+    "What a fantastic day for a walk in the park",
+]
+
+
+def responder(prompt: str):
+    task, text = prompt.split("|", 1)
+    return TASKS[task][1](text)
+
+
+async def legacy_complete(prompt: str, schema, retries: int, stats: dict):
+    """The pre-structured-output path: prose prompt, regex fence strip, json.loads."""
+    for attempt in range(retries + 1):
+        if attempt:
+            stats["retries"] += 1
+        stats["llm_calls"] += 1
+        response = await llm_model.llm_complete(prompt)
+        response = re.sub(r"^```json\n|```$", "", response, flags=re.MULTILINE).strip()
+        try:
+            return schema.model_validate(json.loads(response))
+        except (json.JSONDecodeError, ValidationError):
+            stats["parse_failures"] += 1
+    raise ValueError("Invalid JSON in response")
+
+
+async def structured_complete(prompt: str, schema, retries: int, stats: dict):
+    """The structured-output path: response schema + JSON MIME type, repair parser fallback."""
+    calls_before = llm_model.completion_stats.llm_calls
+    failures_before = parse_stats.failed + parse_stats.invalid
+    try:
+        return await llm_model.llm_complete_json(prompt, schema, retries=retries)
+    finally:
+        calls = llm_model.completion_stats.llm_calls - calls_before
+        stats["llm_calls"] += calls
+        stats["retries"] += calls - 1
+        stats["parse_failures"] += parse_stats.failed + parse_stats.invalid - failures_before
+
+
+async def run_mode(complete, requests: int, retries: int) -> dict:
+    stats = {"requests": requests, "llm_calls": 0, "retries": 0, "parse_failures": 0, "failed_requests": 0}
+    for index in range(requests):
+        task = sorted(TASKS)[index % len(TASKS)]
+        prompt = f"{task}|{TEXTS[index % len(TEXTS)]}"
+        try:
+            await complete(prompt, TASKS[task][0], retries, stats)
+        except (ValueError, JSONRepairError):
+            stats["failed_requests"] += 1
+    return stats
+
+
+async def main(args):
+    results = {}
+    for mode, complete in (("prose", legacy_complete), ("structured", structured_complete)):
+        llm_model.model = StubLlm(
+            responder=responder,
+            prose_defect_rate=args.prose_defect_rate,
+            json_defect_rate=args.json_defect_rate,
+            seed=args.seed,
+        )
+        results[mode] = await run_mode(complete, args.requests, args.retries)
+
+    prose, structured = results["prose"], results["structured"]
+    results["reduction"] = {
+        key: round(1 - structured[key] / prose[key], 3) if prose[key] else 0.0
+        for key in ("llm_calls", "retries", "parse_failures", "failed_requests")
+    }
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--retries", type=int, default=1)
+    parser.add_argument("--prose-defect-rate", type=float, default=0.3)
+    parser.add_argument("--json-defect-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,242 @@
+"""
+Per-hop cost of the A2A transports on one host: JSON-RPC over HTTP/1.1 on
+TCP loopback, the same over a Unix domain socket, and the gRPC binding.
+
+A fake sentiment peer (no model, configurable latency) runs in a child
+process and serves all of them. The same requests are then sent over each
+transport, with a persistent connection each (one httpx.AsyncClient, one gRPC
+channel), and reported per transport:
+
+- per-hop latency percentiles and throughput;
+- CPU per request in the client process and in the server process
+  (server CPU is read from /proc, so Linux only).
+
+With --streaming the peer advertises streaming, so the calls become SSE
+streams over HTTP and server-streaming RPCs over gRPC. With
+--fresh-connections every HTTP call opens its own connection, as the Client
+does for agents it does not reach over gRPC.
+
+Usage:
+    python benchmarks/transports.py --requests 2000 --concurrency 1
+    python benchmarks/transports.py --requests 5000 --concurrency 32 --streaming --output transports.json
+    python benchmarks/transports.py --transports jsonrpc jsonrpc_uds --fresh-connections
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+from a2a.client import A2ACardResolver, ClientFactory
+from a2a.client.client import ClientConfig
+from a2a.types import Message, Part, Role, Task, TaskState, TextPart, TransportProtocol
+
+TEXTS = [
+    "I love this phone, the battery is great",
+    "The delivery was slow and the food was cold",
+    "The meeting is at ten in the main room",
+    "What a fantastic day for a walk in the park",
+]
+
+PERCENTILES = (0.50, 0.90, 0.99)
+
+TRANSPORTS = ("jsonrpc", "jsonrpc_uds", "grpc")
+
+
+async def serve_peer(args) -> None:
+    """Child process: the fake peer on both bindings."""
+    import uvicorn
+
+    from my_a2a.multi_a2a.common.fake_peer import fake_peer_server
+    from my_a2a.multi_a2a.common.grpc_binding import GrpcBinding, advertise
+    from my_a2a.multi_a2a.common.runtime import ServerSettings, _bind
+
+    server = fake_peer_server("sentiment", f"http://127.0.0.1:{args.http_port}/", latency=args.latency)
+    server.agent_card.capabilities.streaming = args.streaming
+    advertise(server.agent_card, f"127.0.0.1:{args.grpc_port}")
+    binding = GrpcBinding("sentiment", server, args.grpc_port, host="127.0.0.1")
+    await binding.start()
+    settings = ServerSettings(host="127.0.0.1", port=args.http_port, uds=args.uds)
+    config = uvicorn.Config(server.build(), log_level="warning")
+    try:
+        # One server on both the TCP port and the socket
+        await uvicorn.Server(config).serve(sockets=_bind(settings))
+    finally:
+        await binding.stop()
+        os.unlink(args.uds)
+
+
+def process_cpu_seconds(pid: int) -> float | None:
+    """User + system CPU time of a process, from /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    # utime and stime are fields 14 and 15, counted from the one after the command name
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def send(client, index: int) -> None:
+    message = Message(
+        role=Role.user,
+        message_id=str(uuid.uuid4()),
+        parts=[Part(root=TextPart(text=f"{TEXTS[index % len(TEXTS)]} ({index})"))],
+    )
+    final = None
+    async for response in client.send_message(request=message):
+        final = response[0] if isinstance(response, tuple) else response
+    if isinstance(final, Task) and final.status.state != TaskState.completed:
+        raise RuntimeError(final.status.state.value)
+
+
+def http_sender(card, make_transport, fresh_connections: bool, concurrency: int):
+    """
+    Sends over JSON-RPC through transports from `make_transport(**kwargs)`, on
+    shared or per-call connections. Returns (send, httpx client to close or None).
+    """
+    if fresh_connections:
+        async def send_fresh(index: int):
+            async with httpx.AsyncClient(transport=make_transport(), timeout=60) as http:
+                await send(ClientFactory(ClientConfig(httpx_client=http)).create(card), index)
+
+        return send_fresh, None
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    http = httpx.AsyncClient(transport=make_transport(limits=limits), timeout=60)
+    client = ClientFactory(ClientConfig(httpx_client=http)).create(card)
+    return (lambda index: send(client, index)), http
+
+
+def grpc_sender(card):
+    """Sends over the gRPC binding, on the shared channel."""
+    from my_a2a.multi_a2a.common.grpc_binding import channel
+
+    config = ClientConfig(grpc_channel_factory=channel, supported_transports=[TransportProtocol.grpc])
+    client = ClientFactory(config).create(card)
+    return (lambda index: send(client, index)), None
+
+
+async def measure(send_one, requests: int, concurrency: int, server_pid: int) -> dict:
+    latencies = []
+    errors = 0
+    next_index = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            started = time.perf_counter()
+            try:
+                await send_one(index)
+                latencies.append(time.perf_counter() - started)
+            except Exception:
+                errors += 1
+
+    server_cpu = process_cpu_seconds(server_pid)
+    client_cpu = time.process_time()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    client_cpu = time.process_time() - client_cpu
+    server_cpu_after = process_cpu_seconds(server_pid)
+
+    result = {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 1),
+        "client_cpu_us_per_request": round(client_cpu / requests * 1e6, 1),
+        "server_cpu_us_per_request": (
+            round((server_cpu_after - server_cpu) / requests * 1e6, 1) if server_cpu is not None else None
+        ),
+    }
+    for q in PERCENTILES:
+        result[f"p{q * 100:g}_ms"] = round(percentile(latencies, q) * 1000, 3)
+    return result
+
+
+async def wait_for_card(url: str, http: httpx.AsyncClient, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return await A2ACardResolver(httpx_client=http, base_url=url).get_agent_card()
+        except Exception:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.2)
+
+
+async def main(args) -> None:
+    socket_path = os.path.join(tempfile.mkdtemp(prefix="a2a-bench-"), "peer.sock")
+    peer = subprocess.Popen([
+        sys.executable, __file__, "--serve",
+        "--http-port", str(args.http_port), "--grpc-port", str(args.grpc_port),
+        "--uds", socket_path, "--latency", str(args.latency),
+    ] + (["--streaming"] if args.streaming else []))
+    try:
+        async with httpx.AsyncClient(timeout=60) as http:
+            card = await wait_for_card(f"http://127.0.0.1:{args.http_port}/", http)
+        senders = {
+            "jsonrpc": lambda: http_sender(card, httpx.AsyncHTTPTransport, args.fresh_connections, args.concurrency),
+            "jsonrpc_uds": lambda: http_sender(
+                card,
+                lambda **kwargs: httpx.AsyncHTTPTransport(uds=socket_path, **kwargs),
+                args.fresh_connections,
+                args.concurrency,
+            ),
+            "grpc": lambda: grpc_sender(card),
+        }
+        results = {}
+        for name in args.transports:
+            send_one, http = senders[name]()
+            # Warm-up: connections, lazy imports, allocator
+            await measure(send_one, args.warmup, args.concurrency, peer.pid)
+            results[name] = await measure(send_one, args.requests, args.concurrency, peer.pid)
+            if http is not None:
+                await http.aclose()
+    finally:
+        peer.terminate()
+        peer.wait()
+
+    report = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "streaming": args.streaming,
+        "fresh_connections": args.fresh_connections,
+        "peer_latency_s": args.latency,
+        "transports": results,
+    }
+    columns = ["p50_ms", "p90_ms", "p99_ms", "throughput_rps", "client_cpu_us_per_request", "server_cpu_us_per_request"]
+    print(f"{'transport':<10}" + "".join(f"{column:>{len(column) + 2}}" for column in columns))
+    for name, result in results.items():
+        print(f"{name:<10}" + "".join(f"{str(result[column]):>{len(column) + 2}}" for column in columns))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake peer waits before replying")
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=list(TRANSPORTS))
+    parser.add_argument("--streaming", action="store_true", help="Use streaming calls on every transport")
+    parser.add_argument("--fresh-connections", action="store_true", help="Open a new connection for every HTTP call")
+    parser.add_argument("--http-port", type=int, default=8790)
+    parser.add_argument("--grpc-port", type=int, default=9790)
+    parser.add_argument("--output", help="Write the report as JSON")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--uds", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    asyncio.run(serve_peer(args) if args.serve else main(args))
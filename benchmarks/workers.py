@@ -0,0 +1,160 @@
+"""
+Measures sentiment server throughput against the number of pre-forked workers.
+
+For each worker count the sentiment agent is served by the production runtime
+(my_a2a.multi_a2a.common.runtime) in a subprocess, with its model cascade
+replaced by the offline StubLlm. A closed-loop driver then keeps `--concurrency`
+JSON-RPC message/send requests in flight for `--duration` seconds. Every
+request carries distinct text, so nothing is coalesced by the single-flight
+layer. Reported per worker count: requests/s, p50/p99 latency, errors and the
+speedup over one worker.
+
+The server side is mostly CPU work (A2A and ADK plumbing around a stub model),
+so the speedup is bounded by the cores available to the server and the driver.
+
+Usage:
+    python benchmarks/workers.py --workers 1 2 4 --duration 10 --output workers.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+
+import httpx
+
+
+def serve(args):
+    """Runs the sentiment server with a stub model (the benchmark's subprocess)."""
+    from my_a2a.llm.routing import model_for
+    from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+    from my_a2a.multi_a2a.sentiment_agent.main import build_server
+    from my_adk.llm.stub import StubLlm
+
+    model_for("sentiment").tiers = [
+        StubLlm(responder=lambda prompt: {"sentiment": "POS", "confidence": 0.9}, latency=args.llm_latency)
+    ]
+    url = f"http://127.0.0.1:{args.port}/"
+    # Only blocking message/send requests, so any worker can take any request
+    settings = ServerSettings(host="127.0.0.1", port=args.port, workers=args.serve, stateless=True)
+    serve(build_server(url).build(), settings)
+
+
+def payload(index: int) -> dict:
+    return {
+        "jsonrpc": "2.0",
+        "id": index,
+        "method": "message/send",
+        "params": {
+            "message": {
+                "role": "user",
+                "messageId": str(uuid.uuid4()),
+                "parts": [{"kind": "text", "text": f"Review {index}: the service was great"}],
+            }
+        },
+    }
+
+
+async def wait_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(url + ".well-known/agent-card.json")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"Server at {url} did not come up")
+
+
+async def drive(url: str, concurrency: int, duration: float, warmup: float) -> dict:
+    latencies = []
+    errors = 0
+    counter = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        start = time.perf_counter()
+        measure_from = start + warmup
+        stop_at = measure_from + duration
+
+        async def loop():
+            nonlocal errors, counter
+            while (now := time.perf_counter()) < stop_at:
+                counter += 1
+                try:
+                    response = await client.post(url, json=payload(counter))
+                    ok = response.status_code == 200 and "error" not in response.json()
+                except httpx.HTTPError:
+                    ok = False
+                if now < measure_from:
+                    continue
+                if ok:
+                    latencies.append(time.perf_counter() - now)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+
+    latencies.sort()
+
+    def percentile(q):
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def main(args):
+    results = {"cpus": os.cpu_count(), "runs": {}}
+    for workers in args.workers:
+        url = f"http://127.0.0.1:{args.port}/"
+        server = subprocess.Popen(
+            [sys.executable, __file__, "--serve", str(workers), "--port", str(args.port),
+             "--llm-latency", str(args.llm_latency)],
+            stdout=subprocess.DEVNULL,
+        )
+        try:
+            await wait_ready(url)
+            results["runs"][workers] = await drive(url, args.concurrency, args.duration, args.warmup)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        print(f"workers={workers}: {results['runs'][workers]}", file=sys.stderr)
+
+    baseline = results["runs"][args.workers[0]]["rps"]
+    for run in results["runs"].values():
+        run["speedup"] = round(run["rps"] / baseline, 2) if baseline else None
+
+    report = json.dumps(results, indent=2)
+    print(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Simulated model latency in seconds")
+    parser.add_argument("--port", type=int, default=18003)
+    parser.add_argument("--output", help="Write the JSON report to this file")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args)
+    else:
+        asyncio.run(main(args))
@@ -0,0 +1,167 @@
+import ast
+import json
+import re
+from dataclasses import dataclass
+from typing import Any, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+_FENCE_PATTERN = re.compile(r"^```(?:json)?\s*\n?|\n?```\s*$", flags=re.MULTILINE)
+_TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+
+
+class JSONRepairError(ValueError):
+    """Raised when LLM output cannot be turned into JSON, even after repair."""
+
+
+@dataclass
+class ParseStats:
+    """Counters describing how LLM JSON output was parsed."""
+    strict: int = 0     # parsed as-is
+    repaired: int = 0   # parsed only after repair
+    failed: int = 0     # could not be parsed at all
+    invalid: int = 0    # parsed, but did not match the expected schema
+
+    def as_dict(self) -> dict:
+        return {
+            "strict": self.strict,
+            "repaired": self.repaired,
+            "failed": self.failed,
+            "invalid": self.invalid,
+        }
+
+
+# Process-wide parse counters, useful to compare structured vs prose output modes
+parse_stats = ParseStats()
+
+
+def _scan(text: str) -> tuple[int | None, list[str], bool]:
+    """
+    Walks a JSON fragment tracking string and bracket state.
+
+    Returns:
+        The index just past the first complete top-level value (None if the
+        value never closes), the stack of closers still pending, and whether
+        the fragment ends inside a string.
+    """
+    stack = []
+    in_string = False
+    escape = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return index + 1, [], False
+    return None, stack, in_string
+
+
+def _complete_truncated(text: str, stack: list[str], in_string: bool) -> str:
+    """Closes a value cut off mid-stream (e.g. a streamed or max-token-limited reply)."""
+    if in_string:
+        text += '"'
+    text = text.rstrip()
+    # A dangling key ("key" or "key":) inside an object has no value yet - drop it
+    if stack and stack[-1] == "}":
+        text = re.sub(r'([{,])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r"\1", text)
+    # Drop a separator that is not followed by anything
+    text = re.sub(r"[,:]\s*$", "", text)
+    return text + "".join(reversed(stack))
+
+
+def repair_json(text: str) -> str:
+    """
+    Rewrites common LLM JSON defects into parseable JSON.
+
+    Handles markdown fences, leading/trailing prose, trailing commas and
+    output truncated before its closing brackets.
+
+    Args:
+        text: Raw LLM output.
+
+    Returns:
+        The repaired JSON string (not guaranteed to be valid).
+    """
+    text = _FENCE_PATTERN.sub("", text).strip()
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index != -1]
+    if starts:
+        text = text[min(starts):]
+
+    end, stack, in_string = _scan(text)
+    if end is not None:
+        text = text[:end]
+    else:
+        text = _complete_truncated(text, stack, in_string)
+
+    return _TRAILING_COMMA_PATTERN.sub(r"\1", text)
+
+
+def parse_json(text: str) -> Any:
+    """
+    Parses JSON from LLM output, repairing it if a strict parse fails.
+
+    Args:
+        text: Raw LLM output.
+
+    Returns:
+        The decoded JSON value.
+
+    Raises:
+        JSONRepairError: If the output cannot be parsed even after repair.
+    """
+    try:
+        value = json.loads(text)
+        parse_stats.strict += 1
+        return value
+    except json.JSONDecodeError:
+        pass
+
+    repaired = repair_json(text)
+    try:
+        value = json.loads(repaired)
+    except json.JSONDecodeError:
+        # Last resort: Python-style literals ('single quotes', True/None)
+        try:
+            value = ast.literal_eval(repaired)
+        except (ValueError, SyntaxError):
+            parse_stats.failed += 1
+            raise JSONRepairError(f"Could not parse LLM output as JSON: {text[:200]!r}")
+
+    parse_stats.repaired += 1
+    return value
+
+
+def parse_model(text: str, schema: Type[T]) -> T:
+    """
+    Parses LLM output into a pydantic model, repairing the JSON if needed.
+
+    Args:
+        text: Raw LLM output.
+        schema: The pydantic model the output must conform to.
+
+    Returns:
+        The validated model instance.
+
+    Raises:
+        JSONRepairError: If the output cannot be parsed or does not match the schema.
+    """
+    value = parse_json(text)
+    try:
+        return schema.model_validate(value)
+    except ValidationError as e:
+        parse_stats.invalid += 1
+        raise JSONRepairError(f"LLM output does not match {schema.__name__}: {e}")
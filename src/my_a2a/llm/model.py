@@ -1,9 +1,17 @@
 import os
-from dotenv import load_dotenv
-from google.genai import types
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Type, TypeVar
+from pydantic import BaseModel
 
-# Load environment variables from .env file
-load_dotenv()
+from my_a2a.llm.json_repair import JSONRepairError, parse_model
+
+if TYPE_CHECKING:
+    from google.adk.models.base_llm import BaseLlm
+
+T = TypeVar("T", bound=BaseModel)
+
+# Importing this module is cheap: ADK, google.genai and the .env file are only
+# loaded when the default model is first used (see get_model below).
 
 ### Uncomment the following lines to use LiteLlm with Groq
 
@@ -35,37 +43,124 @@ load_dotenv()
 #     return content
 
 
-from google.adk.models.google_llm import Gemini
-from google.adk.models.llm_request import LlmRequest
-model = Gemini(
-    model="gemini-2.0-flash",
-    api_key=os.getenv("GEMINI_API_KEY")
-)
+DEFAULT_MODEL_NAME = "gemini-2.0-flash"
+
+
+def get_model() -> "BaseLlm":
+    """Returns the default model, constructing it on first use."""
+    global model
+    if "model" not in globals():
+        from dotenv import load_dotenv
+        from google.adk.models.google_llm import Gemini
+        from my_adk.llm.cassette import cassette_from_env
+        from my_adk.llm.stub import stub_from_env
+
+        # Load environment variables from .env file
+        load_dotenv()
+        # A2A_STUB_LLM swaps in the offline stub model, A2A_LLM_CASSETTE
+        # records the model's traffic or replays it
+        model = cassette_from_env(stub_from_env(DEFAULT_MODEL_NAME) or Gemini(
+            model=DEFAULT_MODEL_NAME,
+            api_key=os.getenv("GEMINI_API_KEY")
+        ), DEFAULT_MODEL_NAME)
+    return model
+
 
-async def llm_complete(prompt: str):
+def __getattr__(name: str):
+    # `from my_a2a.llm.model import model` keeps working, lazily
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@dataclass
+class CompletionStats:
+    """Counters for LLM calls made through llm_complete."""
+    llm_calls: int = 0
+    retries: int = 0
+
+
+completion_stats = CompletionStats()
+
+async def llm_complete(
+    prompt: str,
+    response_schema: Optional[Type[BaseModel]] = None,
+    llm: Optional["BaseLlm"] = None,
+):
     """
     Function to generate text using the initialized gemini model.
     
     Args:
         prompt: The prompt to use with the model.
+        response_schema: Optional pydantic model. When given, the model is asked
+            for native structured output (JSON MIME type + response schema).
+        llm: Optional model to use instead of the default one (e.g. an agent's
+            routed cascade from my_a2a.llm.routing).
     
     Returns:
         The generated text response from the model.
     """
+    from google.adk.models.llm_request import LlmRequest
+    from google.genai import types
+
+    llm = llm or get_model()
+    config = types.GenerateContentConfig()
+    if response_schema is not None:
+        config.response_mime_type = "application/json"
+        config.response_schema = response_schema
+
+    completion_stats.llm_calls += 1
     content = ""
-    async for chunk in model.generate_content_async(
+    async for chunk in llm.generate_content_async(
         llm_request=LlmRequest(
-            model=model.model,
+            model=llm.model,
             contents=[
                 types.Content(
                     parts=[types.Part(text=prompt)],
                     role="user"
                 )
-            ]
+            ],
+            config=config,
         )
     ):
         if hasattr(chunk, "content") and chunk.content.parts:
             for part in chunk.content.parts:
                 if hasattr(part, "text") and part.text:
                     content += part.text
-    return content
\ No newline at end of file
+    return content
+
+
+async def llm_complete_json(
+    prompt: str,
+    response_schema: Type[T],
+    retries: int = 1,
+    llm: Optional["BaseLlm"] = None,
+) -> T:
+    """
+    Generates a structured response validated against a pydantic schema.
+
+    Uses the model's native structured output and falls back to the repair
+    parser for malformed or truncated JSON. Only if that fails too is the
+    call retried.
+
+    Args:
+        prompt: The prompt to use with the model.
+        response_schema: The pydantic model the response must conform to.
+        retries: How many extra LLM calls to make if the response cannot be parsed.
+        llm: Optional model to use instead of the default one.
+
+    Returns:
+        The validated model instance.
+
+    Raises:
+        JSONRepairError: If no attempt produced a valid response.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            completion_stats.retries += 1
+        response = await llm_complete(prompt, response_schema=response_schema, llm=llm)
+        try:
+            return parse_model(response, response_schema)
+        except JSONRepairError:
+            if attempt == retries:
+                raise
@@ -0,0 +1,308 @@
+import json
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import AsyncGenerator, Callable
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import BaseModel, PrivateAttr
+
+from my_a2a.llm.json_repair import JSONRepairError, parse_model
+from my_a2a.llm.model import DEFAULT_MODEL_NAME, get_model
+from my_a2a.multi_a2a.common.log import get_logger
+from my_a2a.multi_a2a.common.metrics import AgentMetrics
+from my_a2a.multi_a2a.common.tracing import tracer
+from my_adk.llm.cassette import CassetteLlm, cassette_from_env
+from my_adk.llm.stub import stub_from_env
+
+logger = get_logger(__name__)
+
+### Model routing: every agent declares a cascade of model tiers.
+# The first tier answers unless its output fails validation (schema or
+# confidence), in which case the request escalates to the next tier.
+# By default every agent has a single tier, the default model. Cascades are
+# opt-in with A2A_MODEL_ROUTING: "tiered" for TIERED_CASCADES below, or
+# per-agent cascades as a JSON string or a path to a JSON file, e.g.
+#   {"sentiment": {"tiers": ["gemini-2.0-flash-lite", "gemini-2.0-flash"], "min_confidence": 0.7},
+#    "planner": ["gemini-2.0-flash"]}
+# Agents the JSON does not list keep the default model.
+TIERED_CASCADES = {
+    "greeting": {"tiers": ["gemini-2.0-flash-lite", "gemini-2.0-flash"]},
+    "sentiment": {"tiers": ["gemini-2.0-flash-lite", "gemini-2.0-flash"], "min_confidence": 0.6},
+    "pos": {"tiers": ["gemini-2.0-flash-lite", "gemini-2.0-flash"]},
+    "planner": {"tiers": ["gemini-2.0-flash"]},
+    "root": {"tiers": ["gemini-2.0-flash"]},
+}
+
+# USD per 1M (input, output) tokens, used to estimate the cost of each tier
+MODEL_PRICES = {
+    "gemini-2.0-flash-lite": (0.075, 0.30),
+    "gemini-2.0-flash": (0.10, 0.40),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.5-pro": (1.25, 10.00),
+}
+
+
+@dataclass
+class TierStats:
+    """Per-tier counters for one cascade."""
+    calls: int = 0
+    accepted: int = 0
+    escalated: int = 0
+    errors: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    latencies: deque = field(default_factory=lambda: deque(maxlen=1024))
+
+    def as_dict(self) -> dict:
+        latencies = sorted(self.latencies)
+
+        def percentile(q):
+            return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else None
+
+        return {
+            "calls": self.calls,
+            "accepted": self.accepted,
+            "escalated": self.escalated,
+            "errors": self.errors,
+            "escalation_rate": (self.escalated + self.errors) / self.calls if self.calls else 0.0,
+            "latency_p50_s": percentile(0.50),
+            "latency_p99_s": percentile(0.99),
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+def response_text(responses: list[LlmResponse]) -> str:
+    return "".join(
+        part.text
+        for response in responses
+        if response.content and response.content.parts
+        for part in response.content.parts
+        if part.text
+    )
+
+
+def default_accept(llm_request: LlmRequest, responses: list[LlmResponse], min_confidence: float) -> bool:
+    """
+    Decides whether a tier's output is good enough to return.
+
+    Tool calls are always accepted. When the request carries a pydantic
+    response schema, the output must validate against it and, if it reports
+    a `confidence`, reach min_confidence. Otherwise any non-empty text passes.
+    """
+    if any(
+        part.function_call
+        for response in responses
+        if response.content and response.content.parts
+        for part in response.content.parts
+    ):
+        return True
+    if any(response.error_code for response in responses):
+        return False
+
+    text = response_text(responses)
+    schema = llm_request.config.response_schema if llm_request.config else None
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        try:
+            result = parse_model(text, schema)
+        except JSONRepairError:
+            return False
+        confidence = getattr(result, "confidence", None)
+        return confidence is None or confidence >= min_confidence
+    return bool(text.strip())
+
+
+class CascadeLlm(BaseLlm):
+    """
+    An ADK model that tries a cascade of model tiers, cheapest first.
+
+    Every tier but the last is buffered and checked with `accept`; a rejected
+    or failing tier escalates the request to the next one. The last tier is
+    streamed through as-is. Latency, tokens, cost and escalations are
+    recorded per tier; the agent's /metrics get the overall LLM call time
+    and time to first chunk, and each call is traced as an `llm` span.
+    """
+    tiers: list[BaseLlm]
+    min_confidence: float = 0.6
+    accept: Callable[[LlmRequest, list[LlmResponse], float], bool] = default_accept
+
+    _stats: dict[str, TierStats] = PrivateAttr(default_factory=dict)
+
+    @property
+    def stats(self) -> dict[str, TierStats]:
+        for tier in self.tiers:
+            self._stats.setdefault(tier.model, TierStats())
+        return self._stats
+
+    def _record(self, tier: BaseLlm, started: float, responses: list[LlmResponse]) -> TierStats:
+        stats = self.stats[tier.model]
+        stats.latencies.append(time.perf_counter() - started)
+        usage = next((r.usage_metadata for r in reversed(responses) if r.usage_metadata), None)
+        if usage is not None:
+            input_tokens = usage.prompt_token_count or 0
+            output_tokens = usage.candidates_token_count or 0
+        else:
+            # Rough estimate when the provider does not report usage
+            input_tokens = 0
+            output_tokens = len(response_text(responses)) // 4
+        stats.input_tokens += input_tokens
+        stats.output_tokens += output_tokens
+        input_price, output_price = MODEL_PRICES.get(tier.model, (0.0, 0.0))
+        stats.cost_usd += (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+        return stats
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        metrics = AgentMetrics(self.model.removeprefix("cascade:"))
+        # Not made the current span: the generator may be closed from another context
+        span = tracer.start_span("llm", attributes={"llm.model": self.model})
+        started = time.perf_counter()
+        first_chunk = True
+        try:
+            async for response in self._cascade(llm_request, stream):
+                if first_chunk:
+                    metrics.observe("first_chunk", time.perf_counter() - started)
+                    span.add_event("first_chunk")
+                    first_chunk = False
+                yield response
+        finally:
+            metrics.observe("llm", time.perf_counter() - started)
+            span.end()
+
+    async def _cascade(self, llm_request: LlmRequest, stream: bool) -> AsyncGenerator[LlmResponse, None]:
+        for index, tier in enumerate(self.tiers):
+            tier_request = llm_request.model_copy(update={"model": tier.model})
+            stats = self.stats[tier.model]
+            stats.calls += 1
+            started = time.perf_counter()
+
+            if index == len(self.tiers) - 1:
+                # Last resort: not validated, streamed straight through
+                responses = []
+                failed = False
+                try:
+                    async for response in tier.generate_content_async(tier_request, stream=stream):
+                        responses.append(response)
+                        yield response
+                except Exception:
+                    failed = True
+                    stats.errors += 1
+                    raise
+                finally:
+                    # The caller may stop iterating after the final response
+                    if responses and not failed:
+                        stats.accepted += 1
+                    self._record(tier, started, responses)
+                return
+
+            responses = []
+            try:
+                async for response in tier.generate_content_async(tier_request, stream=stream):
+                    responses.append(response)
+            except Exception:
+                stats.errors += 1
+                logger.warning("Model tier %s failed, escalating to the next tier", tier.model, exc_info=True)
+                continue
+            finally:
+                # A failed tier's latency (and any partial output) is counted too
+                self._record(tier, started, responses)
+
+            if self.accept(llm_request, responses, self.min_confidence):
+                stats.accepted += 1
+                for response in responses:
+                    yield response
+                return
+            stats.escalated += 1
+
+
+def load_routing_config() -> dict:
+    """Returns the per-agent cascade config from A2A_MODEL_ROUTING (empty: default model everywhere)."""
+    config = {}
+    override = os.getenv("A2A_MODEL_ROUTING")
+    if override == "tiered":
+        return {name: dict(cascade) for name, cascade in TIERED_CASCADES.items()}
+    if override:
+        if os.path.isfile(override):
+            with open(override) as f:
+                override = f.read()
+        for name, cascade in json.loads(override).items():
+            config[name] = {"tiers": cascade} if isinstance(cascade, list) else cascade
+    return config
+
+
+# One client per model name, shared by every cascade that uses it
+_tier_models: dict[str, BaseLlm] = {}
+_cascades: dict[str, CascadeLlm] = {}
+
+
+def tier_model(name: str) -> BaseLlm:
+    if name not in _tier_models:
+        # Also loads .env, so GEMINI_API_KEY is set for the other tiers
+        default_model = get_model()
+        if name == default_model.model:
+            _tier_models[name] = default_model
+        else:
+            from google.adk.models.google_llm import Gemini
+
+            _tier_models[name] = cassette_from_env(
+                stub_from_env(name) or Gemini(model=name, api_key=os.getenv("GEMINI_API_KEY")), name
+            )
+    return _tier_models[name]
+
+
+def model_for(agent_name: str) -> CascadeLlm:
+    """
+    Returns the routed model for an agent (greeting, sentiment, pos, planner, root).
+
+    Agents without a configured cascade get the default model as a single tier.
+    """
+    if agent_name not in _cascades:
+        cascade = load_routing_config().get(agent_name, {"tiers": [DEFAULT_MODEL_NAME]})
+        _cascades[agent_name] = CascadeLlm(
+            model=f"cascade:{agent_name}",
+            tiers=[tier_model(name) for name in cascade["tiers"]],
+            min_confidence=cascade.get("min_confidence", 0.6),
+        )
+    return _cascades[agent_name]
+
+
+async def warm_up_connections(agent_name: str) -> None:
+    """
+    Opens (or refreshes) the HTTP connection to the model endpoint of every
+    tier of an agent's cascade.
+
+    Uses a model metadata lookup, which costs no tokens. Tiers that are not
+    Gemini clients (e.g. offline stubs, cassette replays) are skipped.
+    """
+    for tier in model_for(agent_name).tiers:
+        await _touch(tier)
+
+
+async def refresh_connections() -> None:
+    """Refreshes the connection of every model client in this process, once each."""
+    for tier in list(_tier_models.values()):
+        await _touch(tier)
+
+
+async def _touch(tier: BaseLlm) -> None:
+    from google.adk.models.google_llm import Gemini
+
+    if isinstance(tier, CassetteLlm):
+        tier = tier.inner
+    if isinstance(tier, Gemini):
+        await tier.api_client.aio.models.get(model=tier.model)
+
+
+def routing_report() -> dict:
+    """Per-agent, per-tier latency, escalation and cost figures for tuning the cascades."""
+    return {
+        agent_name: {tier: stats.as_dict() for tier, stats in cascade.stats.items()}
+        for agent_name, cascade in _cascades.items()
+    }
@@ -0,0 +1,46 @@
+import pytest
+from pydantic import BaseModel
+
+from my_a2a.llm.json_repair import JSONRepairError, parse_json, parse_model, repair_json
+
+
+class Sentiment(BaseModel):
+    sentiment: str
+    confidence: float
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"sentiment": "POS", "confidence": 0.9}',
+        '```json\n{"sentiment": "POS", "confidence": 0.9}\n```',
+        'Here is the JSON you asked for:\n{"sentiment": "POS", "confidence": 0.9}\nLet me know if you need more.',
+        '{"sentiment": "POS", "confidence": 0.9,}',
+        "{'sentiment': 'POS', 'confidence': 0.9}",
+    ],
+    ids=["strict", "fence", "prose", "trailing_comma", "single_quotes"],
+)
+def test_parse_model_repairs_common_defects(text):
+    assert parse_model(text, Sentiment) == Sentiment(sentiment="POS", confidence=0.9)
+
+
+def test_truncated_output_is_closed():
+    assert parse_json('{"tags": [["I", "PRP"], ["love", "VB') == {"tags": [["I", "PRP"], ["love", "VB"]]}
+
+
+def test_dangling_key_is_dropped():
+    assert parse_json('{"sentiment": "POS", "confidence"') == {"sentiment": "POS"}
+
+
+def test_repair_stops_after_first_value():
+    assert repair_json('{"a": 1} and then {"b": 2}') == '{"a": 1}'
+
+
+def test_refusal_raises():
+    with pytest.raises(JSONRepairError):
+        parse_json("Sorry, I can only describe the result in words.")
+
+
+def test_schema_mismatch_raises():
+    with pytest.raises(JSONRepairError, match="Sentiment"):
+        parse_model('{"sentiment": "POS"}', Sentiment)
@@ -0,0 +1,413 @@
+# Bulk runner: pushes a JSONL or CSV file of texts through the NLP agents
+# (sentiment, POS) and writes one JSON result line per input record.
+#
+#   python -m my_a2a.multi_a2a.bulk texts.jsonl results.jsonl --agents sentiment pos --concurrency 32
+#   python -m my_a2a.multi_a2a.bulk texts.csv.gz results.jsonl --in-process
+#   python -m my_a2a.multi_a2a.bulk texts.jsonl results.jsonl --resume       # after a crash
+#
+# Input records are read lazily and at most --concurrency are in flight, so
+# memory stays flat however large the file is. JSONL lines are objects with a
+# "text" field (or plain text); CSV files need a "text" column. An "id"
+# field, if present, is copied to the output.
+#
+# Agents are reached the way the Client reaches them: A2A_AGENT_REGISTRY, over
+# HTTP, gRPC or Unix domain sockets. With --in-process they are built in this
+# process instead and called through their request handlers (no servers
+# needed; A2A_STUB_LLM and A2A_LLM_CASSETTE apply as usual). With
+# A2A_PUSH_RECEIVER set, tasks are submitted to the servers without blocking
+# and their results pushed back to a local webhook (see common/push.py), so
+# no connection is held per task in flight. The agents must allow the
+# receiver's host (A2A_PUSH_ALLOWED_HOSTS, e.g. 127.0.0.1 for local servers).
+#
+# Each output line is {"index", "id", "results": {agent: result}} plus
+# "errors": {agent: message} for the agents that failed on that record; failed
+# records are also copied to results.jsonl.failures. The output file is the
+# record of what is done. results.jsonl.checkpoint notes how far it is
+# complete, so --resume only rereads what was written after the last
+# checkpoint, drops a torn last line, and skips every record already done.
+import argparse
+import asyncio
+import csv
+import gzip
+import json
+import os
+import sys
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import httpx
+from a2a.types import AgentCard, Message, Part, Role, Task, TaskState, TextPart
+from a2a.utils.parts import get_text_parts
+
+from my_a2a.multi_a2a.common import push
+from my_a2a.multi_a2a.common.in_process import local_request_handler
+from my_a2a.multi_a2a.common.schemas import extract_result
+
+DEFAULT_AGENTS = ["sentiment", "pos"]
+
+
+@dataclass
+class Record:
+    index: int
+    id: object
+    text: Optional[str]
+    error: Optional[str] = None  # the record could not be read
+
+
+def _open_text(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _is_csv(path: str) -> bool:
+    return path.removesuffix(".gz").endswith(".csv")
+
+
+def read_records(path: str, text_field: str = "text", id_field: str = "id") -> Iterator[Record]:
+    """Streams the records of a JSONL or CSV file (optionally gzipped), in order."""
+    with _open_text(path) as f:
+        if _is_csv(path):
+            for index, row in enumerate(csv.DictReader(f)):
+                text = row.get(text_field)
+                error = None if text else f"no {text_field!r} value"
+                yield Record(index, row.get(id_field, index), text, error)
+            return
+        index = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    item = json.loads(line)
+                    yield Record(index, item.get(id_field, index), item[text_field])
+                except (json.JSONDecodeError, KeyError) as e:
+                    yield Record(index, index, None, f"unreadable record: {e!r}")
+            else:
+                yield Record(index, index, line)
+            index += 1
+
+
+def count_records(path: str) -> int:
+    """Number of records, counted by lines (fast, and exact unless CSV fields span lines)."""
+    lines = 0
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            lines += chunk.count(b"\n")
+    return max(0, lines - 1) if _is_csv(path) else lines
+
+
+class Progress:
+    """
+    The set of finished record indexes, kept small: every index below
+    `committed` is done, plus the few in `done` above it. Records are
+    dispatched in order, so `done` never holds much more than the
+    concurrency window.
+    """
+
+    def __init__(self, committed: int = 0, done: tuple = ()):
+        self.committed = committed
+        self.done = set(done)
+
+    def add(self, index: int) -> None:
+        self.done.add(index)
+        while self.committed in self.done:
+            self.done.remove(self.committed)
+            self.committed += 1
+
+    def __contains__(self, index: int) -> bool:
+        return index < self.committed or index in self.done
+
+
+class Checkpoint:
+    """Where a run stands, saved atomically next to its output."""
+
+    def __init__(self, path: str, input_path: str, agents: list[str]):
+        self.path = path
+        self.input_path = os.path.abspath(input_path)
+        self.agents = agents
+
+    def load(self) -> dict:
+        if not os.path.exists(self.path):
+            return {"committed": 0, "done": [], "output_bytes": 0, "ok": 0, "failed": 0}
+        with open(self.path) as f:
+            state = json.load(f)
+        if state["input"] != self.input_path or state["agents"] != self.agents:
+            raise SystemExit(
+                f"{self.path} belongs to a run over {state['input']} with agents {state['agents']}; "
+                "use another output file or --overwrite"
+            )
+        return state
+
+    def save(self, progress: Progress, output_bytes: int, ok: int, failed: int) -> None:
+        state = {
+            "input": self.input_path,
+            "agents": self.agents,
+            "committed": progress.committed,
+            "done": sorted(progress.done),
+            "output_bytes": output_bytes,
+            "ok": ok,
+            "failed": failed,
+        }
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(state, f)
+        os.replace(temporary, self.path)
+
+
+def recover(output_path: str, state: dict) -> tuple[Progress, int, int, int]:
+    """
+    Rebuilds progress from the checkpoint plus the output lines written after
+    it, and truncates a torn last line.
+
+    Returns:
+        (progress, output size to append at, records ok, records failed)
+    """
+    progress = Progress(state["committed"], state["done"])
+    ok, failed = state["ok"], state["failed"]
+    offset = state["output_bytes"]
+    if not os.path.exists(output_path):
+        return progress, 0, 0, 0
+    with open(output_path, "rb+") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            record = json.loads(line)
+            progress.add(record["index"])
+            if record.get("errors"):
+                failed += 1
+            else:
+                ok += 1
+            offset += len(line)
+        f.truncate(offset)
+    return progress, offset, ok, failed
+
+
+class AgentCallError(Exception):
+    pass
+
+
+class BulkRunner:
+    def __init__(self, args):
+        self.args = args
+        self.agents = args.agents
+        self.client = None
+        self.cards = {}
+        self.http = None
+
+    async def connect(self) -> None:
+        # Imported here: the Client module pulls in ADK
+        from my_a2a.multi_a2a.client.nlp_client_agent.agent import Client
+
+        limits = httpx.Limits(max_connections=self.args.concurrency, max_keepalive_connections=self.args.concurrency)
+        self.http = httpx.AsyncClient(limits=limits, timeout=self.args.timeout)
+        self.client = Client(httpx_client=self.http, push_receiver=push.receiver_from_env())
+        if self.args.in_process:
+            self.cards = build_in_process(self.agents)
+            return
+        for agent in self.agents:
+            self.cards[agent] = await self.client.get_agent_card(self.client.agent_registry[agent])
+
+    async def close(self) -> None:
+        if self.client is not None and self.client.push_receiver is not None:
+            await self.client.push_receiver.stop()
+        if self.http is not None:
+            await self.http.aclose()
+
+    async def call(self, agent: str, message: Message) -> dict:
+        card = self.cards[agent]
+        response = await asyncio.wait_for(self.client.send_message_payload(card, message), self.args.timeout)
+        if isinstance(response, Task):
+            # Agents in this process would otherwise keep every finished task
+            handler = local_request_handler(card.url)
+            if handler is not None:
+                await handler.task_store.delete(response.id)
+            if response.status.state != TaskState.completed:
+                reason = " ".join(get_text_parts(response.status.message.parts)) if response.status.message else ""
+                raise AgentCallError(f"task {response.status.state.value}" + (f": {reason}" if reason else ""))
+        result = extract_result(response)
+        if result is None:
+            raise AgentCallError("no structured result")
+        return result.model_dump()
+
+    async def call_with_retries(self, agent: str, text: str) -> dict:
+        # Retries resend the same message: an agent still running (or done with)
+        # the first attempt answers from that run instead of starting another
+        message = Message(role=Role.user, message_id=str(uuid.uuid4()), parts=[Part(root=TextPart(text=text))])
+        for attempt in range(self.args.retries + 1):
+            try:
+                return await self.call(agent, message)
+            except Exception:
+                if attempt == self.args.retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def process(self, record: Record) -> dict:
+        line = {"index": record.index, "id": record.id, "results": {}}
+        if record.error is not None:
+            line["errors"] = {"input": record.error}
+            return line
+        outcomes = await asyncio.gather(
+            *(self.call_with_retries(agent, record.text) for agent in self.agents), return_exceptions=True
+        )
+        errors = {}
+        for agent, outcome in zip(self.agents, outcomes):
+            if isinstance(outcome, BaseException):
+                errors[agent] = f"{type(outcome).__name__}: {outcome}"
+            else:
+                line["results"][agent] = outcome
+        if errors:
+            line["errors"] = errors
+        return line
+
+
+def build_in_process(agents: list[str]) -> dict[str, AgentCard]:
+    """Builds the agents' servers in this process, registered for in-process calls; returns their cards."""
+    import importlib
+
+    from my_a2a.multi_a2a.common.in_process import register_local_agent
+    from my_a2a.multi_a2a.host import AGENT_MODULES, STANDALONE_URLS
+
+    cards = {}
+    for name in agents:
+        server = importlib.import_module(AGENT_MODULES[name]).build_server(url=STANDALONE_URLS[name])
+        register_local_agent(server.agent_card, server.handler.request_handler)
+        cards[name] = server.agent_card
+    return cards
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+
+
+async def run(args) -> dict:
+    checkpoint = Checkpoint(f"{args.output}.checkpoint", args.input, args.agents)
+    failures_path = args.failures or f"{args.output}.failures"
+    if args.overwrite:
+        for path in (args.output, checkpoint.path, failures_path):
+            if os.path.exists(path):
+                os.remove(path)
+    elif os.path.exists(args.output) and not args.resume:
+        raise SystemExit(f"{args.output} exists: pass --resume to continue that run, or --overwrite")
+
+    progress, output_bytes, ok, failed = recover(args.output, checkpoint.load())
+    already_done = ok + failed
+    if already_done:
+        print(f"Resuming: {already_done} records already done", file=sys.stderr)
+    total = None if args.no_count else count_records(args.input)
+    if total is not None and args.limit is not None:
+        total = min(total, args.limit)
+
+    runner = BulkRunner(args)
+    await runner.connect()
+    output = open(args.output, "ab")
+    failures = open(failures_path, "a")
+    started = time.perf_counter()
+    processed = 0
+    last_report = last_checkpoint = started
+    last_error = None
+
+    def finish(line: dict) -> None:
+        nonlocal output_bytes, ok, failed, processed, last_error
+        data = (json.dumps(line, ensure_ascii=False) + "\n").encode()
+        output.write(data)
+        output_bytes += len(data)
+        progress.add(line["index"])
+        processed += 1
+        if line.get("errors"):
+            failed += 1
+            last_error = f"record {line['id']}: {next(iter(line['errors'].values()))}"
+            failures.write(json.dumps(line, ensure_ascii=False) + "\n")
+        else:
+            ok += 1
+
+    def save_checkpoint() -> None:
+        output.flush()
+        os.fsync(output.fileno())
+        failures.flush()
+        checkpoint.save(progress, output_bytes, ok, failed)
+
+    def report(final: bool = False) -> None:
+        elapsed = time.perf_counter() - started
+        rate = processed / elapsed if elapsed else 0.0
+        done = ok + failed
+        line = f"{done}" + (f"/{total} ({done / total:.1%})" if total else "") + f" records, {rate:.1f}/s, {failed} failed"
+        if total and rate and not final:
+            line += f", ETA {format_duration((total - done) / rate)}"
+        if final:
+            line += f" in {format_duration(elapsed)}"
+        if last_error and not final:
+            line += f" | last error: {last_error[:160]}"
+        print(line, file=sys.stderr)
+
+    pending: set[asyncio.Task] = set()
+
+    async def collect(return_when) -> None:
+        nonlocal pending, last_report, last_checkpoint
+        done, pending = await asyncio.wait(pending, return_when=return_when)
+        for task in done:
+            finish(task.result())
+        now = time.perf_counter()
+        if progress.committed - checkpoint_committed[0] >= args.checkpoint_every or now - last_checkpoint >= 10:
+            save_checkpoint()
+            checkpoint_committed[0] = progress.committed
+            last_checkpoint = now
+        if now - last_report >= args.report_every:
+            report()
+            last_report = now
+
+    checkpoint_committed = [progress.committed]
+    try:
+        for record in read_records(args.input, args.text_field, args.id_field):
+            if args.limit is not None and record.index >= args.limit:
+                break
+            if record.index in progress:
+                continue
+            if len(pending) >= args.concurrency:
+                await collect(asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.create_task(runner.process(record)))
+        while pending:
+            await collect(asyncio.ALL_COMPLETED)
+    finally:
+        # Whatever finished is kept, even on Ctrl-C: --resume picks up from here
+        for task in pending:
+            task.cancel()
+        save_checkpoint()
+        output.close()
+        failures.close()
+        await runner.close()
+    report(final=True)
+    return {"records": ok + failed, "ok": ok, "failed": failed, "output": args.output, "failures": failures_path}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL or CSV file of texts through the NLP agents.")
+    parser.add_argument("input", help="JSONL or CSV file of records, optionally gzipped")
+    parser.add_argument("output", help="JSONL file of results, appended to as records finish")
+    parser.add_argument("--agents", nargs="+", default=DEFAULT_AGENTS, choices=["sentiment", "pos", "greeting"])
+    parser.add_argument("--concurrency", type=int, default=16, help="Records in flight at once")
+    parser.add_argument("--in-process", action="store_true", help="Build the agents in this process instead of calling servers")
+    parser.add_argument("--resume", action="store_true", help="Continue the run that wrote OUTPUT")
+    parser.add_argument("--overwrite", action="store_true", help="Start over, discarding OUTPUT and its checkpoint")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds per agent call")
+    parser.add_argument("--retries", type=int, default=2, help="Retries per agent call, with backoff")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="Records between checkpoints (also every 10s)")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument("--failures", help="Where failed records are copied (default: OUTPUT.failures)")
+    parser.add_argument("--limit", type=int, help="Only the first N records")
+    parser.add_argument("--no-count", action="store_true", help="Skip counting the input up front (no ETA)")
+    args = parser.parse_args()
+    summary = asyncio.run(run(args))
+    print(json.dumps(summary))
+
+
+if __name__ == "__main__":
+    main()
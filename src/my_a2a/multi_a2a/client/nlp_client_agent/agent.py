@@ -1,20 +1,62 @@
+import asyncio
+import json
+import os
 import uuid
+from contextlib import asynccontextmanager
 import httpx
 from a2a.client import ClientFactory, A2ACardResolver
 from a2a.client.client import ClientConfig
+from a2a.types import Message, MessageSendConfiguration, Part, Role, Task, TaskIdParams, TaskQueryParams, TextPart
+from opentelemetry.trace import SpanKind
+from a2a.utils.parts import get_text_parts
 from google.adk import Agent
-from my_a2a.llm.model import model
+from google.adk.tools import ToolContext
+from my_a2a.llm.routing import model_for
+from my_a2a.multi_a2a.common import grpc_binding, push, uds
+from my_a2a.multi_a2a.common.in_process import in_process_client, local_agent_card
+from my_a2a.multi_a2a.common.log import get_logger
+from my_a2a.multi_a2a.common.schemas import extract_result, response_parts
+from my_a2a.multi_a2a.common.tracing import inject_trace_context, setup_tracing, tracer
+from my_a2a.multi_a2a.client.nlp_client_agent.speculation import Speculator
+
+logger = get_logger(__name__)
 
 # A2A Client class to interact with multiple agents
 class Client:
-    def __init__(self):
+    def __init__(
+        self,
+        speculative: bool = False,
+        httpx_client: httpx.AsyncClient | None = None,
+        push_receiver: push.WebhookReceiver | None = None,
+    ):
         self.agent_registry = {
             "planner": "http://localhost:8001/",
             "greeting": "http://localhost:8002/",
             "sentiment": "http://localhost:8003/",
             "pos": "http://localhost:8004/"
         }
+        # A2A_AGENT_REGISTRY overrides agent URLs, e.g. for agents mounted in the
+        # combined host (my_a2a.multi_a2a.host) or listening on Unix domain
+        # sockets (unix:// addresses, see common/uds.py); a JSON string or a file path
+        override = os.getenv("A2A_AGENT_REGISTRY")
+        if override:
+            if os.path.isfile(override):
+                with open(override) as f:
+                    override = f.read()
+            self.agent_registry.update(json.loads(override))
         self.agents_info = None
+        # Concurrent first requests (e.g. through the front door) share one fetch of the cards
+        self._agents_info_lock = asyncio.Lock()
+        # Long-running callers (e.g. the bulk runner) pass one shared client;
+        # otherwise every HTTP call opens its own
+        self.httpx_client = httpx_client
+        # With a webhook receiver, tasks of agents that push notifications are
+        # submitted without blocking and their results delivered to it
+        self.push_receiver = push_receiver
+
+        # Speculative mode: likely sub-agent calls start while the planner runs;
+        # unused ones are cancelled on the agent with tasks/cancel
+        self.speculator = Speculator(self.dispatch, self.cancel_task) if speculative else None
     
     async def get_all_agent_cards(self):
         agent_cards = {}
@@ -24,54 +66,170 @@ class Client:
         return agent_cards
 
     async def get_agent_card(self, url):
+        # Agents served by this process are resolved without an HTTP round trip
+        agent_card = local_agent_card(url)
+        if agent_card is not None:
+            return agent_card
+        # Co-located agents listening on a Unix domain socket
+        if uds.is_unix(url):
+            async with uds.http_client(uds.parse_unix_url(url)[0]) as httpx_client:
+                resolver = A2ACardResolver(httpx_client=httpx_client, base_url=uds.card_base_url(url))
+                agent_card = await resolver.get_agent_card()
+            uds.register_unix_agent(agent_card, url)
+            return agent_card
         async with httpx.AsyncClient() as httpx_client:
             resolver = A2ACardResolver(httpx_client=httpx_client, base_url=url)
             return await resolver.get_agent_card()
     
-    async def send_message(self, agent_name: str, task: str):
+    async def send_message(self, agent_name: str, task: str, tool_context: ToolContext | None = None):
+        if self.speculator is None:
+            return await self.dispatch(agent_name, task)
+
+        # Speculation belongs to the user turn (ADK invocation) that started it:
+        # concurrent conversations sharing this client never touch each other's
+        scope = tool_context.invocation_id if tool_context is not None else None
+
+        if agent_name == "planner":
+            # Start predicted sub-agent calls in parallel with the planner,
+            # then keep only the ones the plan actually asks for
+            self.speculator.start(task, scope)
+            plan = await self.dispatch(agent_name, task)
+            self.speculator.reconcile(plan, scope)
+            return plan
+
+        speculation = self.speculator.claim(agent_name, task, scope)
+        if speculation is not None:
+            try:
+                return await speculation.call
+            except Exception as e:
+                logger.warning("Speculative call to %s failed (%s), retrying", agent_name, e)
+            # The same message id: if the agent is still running it, the retry
+            # attaches to that run instead of starting another
+            return await self.dispatch(agent_name, task, speculation.message_id)
+        return await self.dispatch(agent_name, task)
+
+    async def dispatch(self, agent_name: str, task: str, message_id: str | None = None):
         agent_card = self.agents_info[agent_name]
-        message_payload = {
-            "role": "user",
-            "kind": "message",
-            "message_id": str(uuid.uuid4()),
-            "parts": [
-                {
-                    "kind": "text",
-                    "text": task
-                }
-            ]
-        }
-        
-        # This now returns the full structured message
-        response_content = await self.send_message_payload(agent_card, message_payload)
-
-        # Process the structured response to extract useful information
-        final_response_text = ""
-        if response_content and response_content.get("kind") == "message":
-            for part in response_content.get("parts", []):
-                if part.get("kind") == "text":
-                    final_response_text += part.get("text", "") + " "
-        
-        print(f"Response from {agent_name} agent: {final_response_text.strip()}")
-        return final_response_text.strip()
+        with tracer.start_as_current_span(f"send {agent_name}", kind=SpanKind.CLIENT, attributes={"a2a.peer": agent_name}):
+            message_payload = Message(
+                role=Role.user,
+                message_id=message_id or str(uuid.uuid4()),
+                parts=[Part(root=TextPart(text=task))],
+                # The agent continues this trace (W3C traceparent)
+                metadata=inject_trace_context(),
+            )
+
+            # Only the final Task (or direct Message reply) is kept from the stream
+            final_response = await self.send_message_payload(agent_card, message_payload)
+
+        # Sub-agents reply with a schema-validated DataPart; hand the typed object back as-is
+        result = extract_result(final_response)
+        if result is not None:
+            logger.info("Response from %s agent: %r", agent_name, result)
+            return result.model_dump()
+
+        # Fall back to plain text for agents that do not publish structured results
+        final_response_text = " ".join(get_text_parts(response_parts(final_response))).strip()
+        logger.info("Response from %s agent: %s", agent_name, final_response_text)
+        return final_response_text
 
     async def send_message_payload(self, agent_card, message_payload):
+        # Same-process agents are called through their request handler directly
+        client = in_process_client(agent_card)
+        if client is not None:
+            return await self.collect_final_response(client, message_payload)
+
+        async with self.a2a_client(agent_card) as client:
+            return await self.collect(client, agent_card, message_payload)
+
+    @asynccontextmanager
+    async def a2a_client(self, agent_card):
+        """An A2A client for an agent, over the best transport it offers."""
+        client = in_process_client(agent_card)
+        if client is not None:
+            yield client
+            return
+
+        # Agents serving the gRPC binding are called over a persistent channel
+        if grpc_binding.prefers_grpc(agent_card):
+            yield ClientFactory(config=grpc_binding.client_config()).create(agent_card)
+            return
+
+        # Co-located agents are called over their Unix domain socket
+        socket_path = uds.unix_socket(agent_card)
+        if socket_path is not None:
+            yield ClientFactory(config=ClientConfig(httpx_client=uds.shared_client(socket_path))).create(agent_card)
+            return
+
+        if self.httpx_client is not None:
+            yield ClientFactory(config=ClientConfig(httpx_client=self.httpx_client)).create(agent_card)
+            return
+
         async with httpx.AsyncClient() as httpx_client:
-            client = ClientFactory(config=ClientConfig(httpx_client=httpx_client)).create(agent_card)
-            
-            # This variable will hold the final, complete message content
-            final_response_content = None
-
-            async for response in client.send_message(request=message_payload):
-                # Update with the latest response in the stream
-                final_response_content = response.model_dump(exclude_none=True)
-            
-            # Return the final structured message
-            return final_response_content
+            yield ClientFactory(config=ClientConfig(httpx_client=httpx_client)).create(agent_card)
+
+    async def cancel_task(self, agent_name: str, task_id: str):
+        """Asks an agent to cancel a task, e.g. a speculative call the plan did not use."""
+        async with self.a2a_client(self.agents_info[agent_name]) as client:
+            return await client.cancel_task(TaskIdParams(id=task_id))
+
+    def note_response(self, message_payload, response):
+        # Speculative calls need their task id to be cancelled on the agent
+        if self.speculator is not None and isinstance(response, Task):
+            self.speculator.note_task(message_payload.message_id, response.id)
+
+    async def collect(self, client, agent_card, message_payload):
+        if self.push_receiver is not None and agent_card.capabilities.push_notifications:
+            return await self.submit(client, message_payload)
+        return await self.collect_final_response(client, message_payload)
+
+    async def submit(self, client, message_payload):
+        # The agent answers at once with the task and posts it to our webhook
+        # when it settles: no connection is held while it runs
+        push_config, delivered = await self.push_receiver.expect()
+        try:
+            configuration = MessageSendConfiguration(blocking=False, push_notification_config=push_config)
+            submitted = None
+            async for response in client.send_message(request=message_payload, configuration=configuration):
+                submitted = response[0] if isinstance(response, tuple) else response
+                break
+            self.note_response(message_payload, submitted)
+
+            # Direct replies, and tasks already settled (e.g. a retry the agent had finished)
+            if not isinstance(submitted, Task) or submitted.status.state in push.SETTLED_STATES:
+                return submitted
+            try:
+                return await asyncio.wait_for(delivered, push.wait_timeout())
+            except asyncio.TimeoutError:
+                # The notification never came: ask the agent for the task instead
+                task = await client.get_task(TaskQueryParams(id=submitted.id))
+                if task.status.state not in push.SETTLED_STATES:
+                    raise TimeoutError(
+                        f"Task {task.id} is still {task.status.state.value} after "
+                        f"A2A_PUSH_WAIT={push.wait_timeout():g}s"
+                    )
+                return task
+        finally:
+            delivered.cancel()
+
+    async def collect_final_response(self, client, message_payload):
+        # This variable will hold the final Task or Message of the stream
+        final_response = None
+
+        async for response in client.send_message(request=message_payload):
+            # Streamed task events arrive as (task, update) pairs; the task
+            # is already aggregated by the SDK, so just keep a reference to it
+            final_response = response[0] if isinstance(response, tuple) else response
+            self.note_response(message_payload, final_response)
+
+        # Return the final typed response
+        return final_response
 
     async def get_root_instruction(self, ctx):
         if self.agents_info is None:
-            self.agents_info = await self.get_all_agent_cards()
+            async with self._agents_info_lock:
+                if self.agents_info is None:
+                    self.agents_info = await self.get_all_agent_cards()
 
         # ctx is a placeholder for context, not used here - mandatory for callable version of InstructionProvider and adk web cmd
         state_info = getattr(ctx, "state", None)
@@ -89,8 +247,8 @@ class Client:
         a. First, call `send_message` tool with:
             - `agent_name` = "planner"
             - `content` = A JSON string with two keys: "user_input" (value is the original user query) and "available_agents" (value is a list of agent names from the `Available Agents` section).  
-            This will return a structured plan containing subtasks.
-        b. For each subtask in the returned plan, call `send_message` tool with:
+            This will return a structured plan whose "steps" list contains the subtasks.
+        b. For each step in the returned plan, call `send_message` tool with:
             - `agent_name` = the agent specified for that subtask
             - `content` = the subtask's input text
         3. Aggregate all subtask results into a single coherent final response.
@@ -104,16 +262,25 @@ class Client:
         return prompt.strip()
 
 
-def main():
-    """ADK async initializer for root agent."""
-    client = Client()
+def client_from_env() -> Client:
+    return Client(speculative=os.getenv("A2A_SPECULATIVE") == "1", push_receiver=push.receiver_from_env())
+
+
+def build_root_agent(client: Client) -> Agent:
+    """The root agent, delegating through `client`."""
     # instruction can be callable methods too, here it is the async client.get_root_instruction
     return Agent(
-        model=model,
+        model=model_for("root"),
         name="nlp_client_agent",
         instruction=client.get_root_instruction,
         description="Host agent orchestrating NLP tasks and greetings.",
         tools=[client.send_message],
     )
 
+
+def main():
+    """ADK async initializer for root agent."""
+    setup_tracing("client")
+    return build_root_agent(client_from_env())
+
 root_agent = main()
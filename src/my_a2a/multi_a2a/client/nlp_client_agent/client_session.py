@@ -20,6 +20,13 @@ async def main():
     session_service_stateful = InMemorySessionService()
     input_text = None
 
+    # One runner for every query and session (server.py serves many users at once)
+    runner = Runner(
+        agent=root_agent,
+        app_name="nlp_client_app",
+        session_service=session_service_stateful,
+    )
+
     while input_text != "exit":
         print("\n=== New NLP Query ===")
         query_user_id = input("Enter user ID: ").strip()
@@ -49,13 +56,6 @@ async def main():
             print(f"\nError creating session: {str(e)}")
             return
 
-        # Runner for NLP agent
-        runner = Runner(
-            agent=root_agent,
-            app_name="nlp_client_app",
-            session_service=session_service_stateful,
-        )
-
         input_text = input("Enter your NLP query (or type 'exit' to quit): ")
         if input_text.lower() == "exit":
             break
@@ -0,0 +1,59 @@
+# HTTP front door for the NLP client agent: many users and sessions served
+# concurrently by one shared Runner (see common/front_door.py).
+#
+#   python -m my_a2a.multi_a2a.client.nlp_client_agent.server
+#   curl -s localhost:8010/run -d '{"user_id": "u1", "session_id": "s1", "message": "hi"}'
+#
+# A2A_PORT and A2A_HOST apply as for the agent servers; sessions live in this
+# process, so A2A_WORKERS is ignored.
+#
+# The sub-agents can run in this process too, mounted at /<agent>/ as in the
+# combined host: the orchestrator then calls them in-process, with no HTTP hop.
+#
+#   A2A_FRONT_DOOR_AGENTS=all                   or e.g. planner,sentiment,pos
+#   A2A_PUBLIC_URL=http://localhost:8010        URL advertised in their agent cards
+#
+# Agents not mounted here are reached as usual (A2A_AGENT_REGISTRY).
+import os
+
+from my_a2a.multi_a2a.client.nlp_client_agent.agent import build_root_agent, client_from_env
+from my_a2a.multi_a2a.common.front_door import FrontDoor, FrontDoorApp
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+from my_a2a.multi_a2a.common.tracing import setup_tracing
+from my_a2a.multi_a2a.common.warmup import WarmUp
+from my_a2a.multi_a2a.host import agent_registry, agents_from_env, mount_agents
+
+APP_NAME = "nlp_client_app"
+
+
+def build_app(base_url: str = "http://localhost:8010", agents: list[str] | None = None):
+    """
+    Args:
+        base_url: Public URL of the front door, used for the mounted agents' cards.
+        agents: Sub-agents to mount in this process; defaults to A2A_FRONT_DOOR_AGENTS (none).
+    """
+    agents = agents_from_env("A2A_FRONT_DOOR_AGENTS", []) if agents is None else agents
+    client = client_from_env()
+    mounts, warm_up = [], None
+    if agents:
+        registry = agent_registry(base_url, agents)
+        warm_up = WarmUp()
+        mounts = mount_agents(agents, registry, warm_up)
+        # The client resolves mounted agents to their request handlers
+        client.agent_registry.update({name: registry[name] for name in agents})
+
+    # Same initial session state as client_session.py
+    front_door = FrontDoor(build_root_agent(client), APP_NAME, initial_state={"state": {}})
+    return FrontDoorApp(front_door).build(mounts, warm_up)
+
+
+def main():
+    setup_tracing("client")
+    settings = ServerSettings.from_env(port=8010, name="nlp_client")
+    settings.workers = 1
+    base_url = os.getenv("A2A_PUBLIC_URL") or f"http://localhost:{settings.port}"
+    serve(build_app(base_url), settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# Speculative sub-agent execution for the NLP client.
+# While the planner LLM is still producing a plan, the sub-agent calls the plan
+# will most likely contain are started from a cheap local prediction. When the
+# plan arrives, speculative calls that match a planned step are kept and the
+# rest are cancelled: the local call is dropped, and the agent is sent
+# tasks/cancel for the task it started, so it stops the LLM work too. That
+# needs the task id: streamed calls and push-notification submissions
+# (A2A_PUSH_RECEIVER) report it at once, but a plain blocking call only with
+# its result, so cancelling one of those just discards it while the agent
+# finishes the work.
+#
+# Speculation is kept per scope, the ADK invocation (one user turn) the calls
+# belong to, so concurrent conversations through one Client (the front door)
+# never claim or cancel each other's calls. Calls no step claimed are
+# discarded after max_age seconds.
+import asyncio
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, Iterable, Optional
+
+from my_a2a.multi_a2a.common.single_flight import normalize_key
+
+# Agents worth speculating on: cheap, side-effect free NLP sub-agents
+SPECULATIVE_AGENTS = ("sentiment", "pos")
+
+_KEYWORDS = {
+    "sentiment": re.compile(r"sentiment|feel|emotion|opinion|positive|negative|tone", re.IGNORECASE),
+    "pos": re.compile(r"\bpos\b|part[- ]of[- ]speech|tag|noun|verb|grammar", re.IGNORECASE),
+}
+_ALL_AGENTS_PATTERN = re.compile(r"analy[sz]|nlp|complete|full|everything", re.IGNORECASE)
+_QUOTED_PATTERN = re.compile(r"[\"“‘'](.{3,}?)[\"”’']")
+
+
+def predict_steps(user_input: str, available_agents: Iterable[str]) -> list[tuple[str, str]]:
+    """
+    Guesses the (agent, input) steps the planner will produce, without an LLM.
+
+    The input text is the quoted part of the request if there is one, else
+    whatever follows a colon, else the whole request. Agents are picked by
+    keyword; a request naming no specific analysis (the usual "analyze this
+    text") predicts every speculative agent.
+
+    Args:
+        user_input: The original user query.
+        available_agents: Agent names the planner may choose from.
+
+    Returns:
+        Predicted (agent_name, input_text) pairs.
+    """
+    quoted = _QUOTED_PATTERN.search(user_input)
+    if quoted:
+        text = quoted.group(1)
+    elif ":" in user_input:
+        # "Analyze this text: <text>"
+        text = user_input.split(":", 1)[1].strip()
+    else:
+        text = user_input
+
+    candidates = [agent for agent in SPECULATIVE_AGENTS if agent in set(available_agents)]
+    named = [agent for agent in candidates if _KEYWORDS[agent].search(user_input)]
+    if not named or _ALL_AGENTS_PATTERN.search(user_input):
+        named = candidates
+    return [(agent, text) for agent in named]
+
+
+def speculation_key(agent_name: str, text: str) -> tuple:
+    return (agent_name, normalize_key(text.strip().strip("\"'“”‘’")))
+
+
+@dataclass
+class Speculation:
+    """A speculative sub-agent call, sent as message `message_id`."""
+    agent_name: str
+    message_id: str
+    call: asyncio.Task
+    started: float
+    # The task the agent started for it, once its first response arrived
+    task_id: Optional[str] = None
+
+
+class Speculator:
+    """
+    Starts likely sub-agent calls alongside the planner and reconciles them
+    with the plan once it arrives.
+
+    `dispatch(agent_name, text, message_id)` makes a call; `cancel(agent_name,
+    task_id)`, if given, asks the agent to cancel a task. Every method takes
+    the scope (e.g. the ADK invocation id) a call belongs to.
+
+    Tracks how many speculative calls were launched, how many were used by a
+    planned step (hits) and how many were cancelled or discarded (wasted).
+    """
+
+    def __init__(
+        self,
+        dispatch: Callable[[str, str, str], Awaitable[Any]],
+        cancel: Optional[Callable[[str, str], Awaitable[Any]]] = None,
+        max_age: float = 300.0,
+    ):
+        self.dispatch = dispatch
+        self.cancel = cancel
+        self.max_age = max_age
+        # Scope -> speculation key -> its call
+        self._pending: dict[Hashable, dict[tuple, Speculation]] = {}
+        # Message id -> speculative call not yet claimed or discarded
+        self._by_message: dict[str, Speculation] = {}
+        self.launched = 0
+        self.hits = 0
+        self.wasted = 0
+
+    def stats(self) -> dict:
+        return {
+            "launched": self.launched,
+            "hits": self.hits,
+            "wasted": self.wasted,
+            "hit_rate": self.hits / self.launched if self.launched else 0.0,
+        }
+
+    @property
+    def pending(self) -> int:
+        return len(self._by_message)
+
+    def note_task(self, message_id: str, task_id: str) -> None:
+        """Records the task an agent started for a message (ignored unless it is speculative)."""
+        speculation = self._by_message.get(message_id)
+        if speculation is not None:
+            speculation.task_id = task_id
+
+    def _take(self, scope: Hashable, key: tuple) -> Optional[Speculation]:
+        speculations = self._pending.get(scope)
+        if not speculations or key not in speculations:
+            return None
+        speculation = speculations.pop(key)
+        if not speculations:
+            del self._pending[scope]
+        self._by_message.pop(speculation.message_id, None)
+        return speculation
+
+    def _discard(self, scope: Hashable, key: tuple) -> None:
+        speculation = self._take(scope, key)
+        if not speculation.call.done():
+            if self.cancel is not None and speculation.task_id is not None:
+                stop = asyncio.ensure_future(self.cancel(speculation.agent_name, speculation.task_id))
+                # Best effort: the task may have finished in the meantime
+                stop.add_done_callback(lambda t: t.cancelled() or t.exception())
+            speculation.call.cancel()
+        self.wasted += 1
+
+    def _expire(self) -> None:
+        """Discards calls no step claimed within max_age (their turn is long over)."""
+        cutoff = time.monotonic() - self.max_age
+        for scope, speculations in list(self._pending.items()):
+            for key, speculation in list(speculations.items()):
+                if speculation.started < cutoff:
+                    self._discard(scope, key)
+
+    def start(self, planner_payload: str, scope: Hashable = None) -> None:
+        """Launches speculative calls for a planner request (the JSON payload sent to the planner)."""
+        self._expire()
+        # Speculation left over from a previous plan of this scope will never be claimed now
+        for key in list(self._pending.get(scope, ())):
+            self._discard(scope, key)
+
+        try:
+            payload = json.loads(planner_payload)
+            user_input = payload["user_input"]
+            available_agents = payload.get("available_agents", [])
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return
+
+        for agent_name, text in predict_steps(user_input, available_agents):
+            key = speculation_key(agent_name, text)
+            if key in self._pending.get(scope, ()):
+                continue
+            message_id = str(uuid.uuid4())
+            call = asyncio.ensure_future(self.dispatch(agent_name, text, message_id))
+            # Failures surface when (and if) the result is claimed
+            call.add_done_callback(lambda t: t.cancelled() or t.exception())
+            speculation = Speculation(agent_name, message_id, call, time.monotonic())
+            self._pending.setdefault(scope, {})[key] = speculation
+            self._by_message[message_id] = speculation
+            self.launched += 1
+
+    def reconcile(self, plan: Any, scope: Hashable = None) -> None:
+        """Keeps speculative calls that match a planned step and cancels the rest."""
+        steps = plan.get("steps", []) if isinstance(plan, dict) else []
+        planned = {
+            speculation_key(step.get("agent", ""), step.get("input", ""))
+            for step in steps
+            if isinstance(step, dict)
+        }
+        for key in list(self._pending.get(scope, ())):
+            if key not in planned:
+                self._discard(scope, key)
+
+    def claim(self, agent_name: str, text: str, scope: Hashable = None) -> Optional[Speculation]:
+        """Returns the speculative call for a step, if one was started."""
+        speculation = self._take(scope, speculation_key(agent_name, text))
+        if speculation is not None:
+            self.hits += 1
+        return speculation
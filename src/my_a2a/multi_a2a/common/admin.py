@@ -0,0 +1,35 @@
+# Admin-only routes for the agent servers (profiling, diagnostics).
+# They are only mounted when A2A_ADMIN_TOKEN is set, and every call must carry
+#   Authorization: Bearer <A2A_ADMIN_TOKEN>
+import hmac
+import os
+from typing import Awaitable, Callable, Mapping, Optional
+
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+ADMIN_PREFIX = "/admin"
+
+
+def admin_token() -> Optional[str]:
+    return os.getenv("A2A_ADMIN_TOKEN") or None
+
+
+def is_admin(headers: Mapping[str, str]) -> bool:
+    """Whether a request's headers carry the admin token."""
+    token = admin_token()
+    authorization = headers.get("authorization", "")
+    return token is not None and hmac.compare_digest(authorization, f"Bearer {token}")
+
+
+def admin_route(
+    path: str, endpoint: Callable[[Request], Awaitable[Response]], methods: list[str]
+) -> Route:
+    """A route under /admin that answers 401 unless the request carries the admin token."""
+    async def guarded(request: Request) -> Response:
+        if not is_admin(request.headers):
+            return JSONResponse({"error": "admin token required"}, status_code=401)
+        return await endpoint(request)
+
+    return Route(f"{ADMIN_PREFIX}{path}", guarded, methods=methods)
@@ -0,0 +1,174 @@
+# Multi-item batch requests for the NLP agents.
+# A message with a DataPart {"texts": [...]} asks an agent to process every
+# text in one task, instead of one task (and its status events) per text.
+# Items run with the best strategy the agent has: packed several to an LLM
+# prompt, through a local engine, or fanned out concurrently. The result is
+# one ordered list of {"index", "result", "error"}: a failing item does not
+# fail the batch.
+#
+#   A2A_BATCH_MAX_ITEMS=1000    larger batches are rejected as a whole
+#
+# Identical texts (after normalize_key) in a batch are processed once, and an
+# agent's semantic cache is looked up for all items in one go. Items a packed
+# prompt leaves out or garbles are retried on their own.
+import asyncio
+import os
+import re
+import uuid
+from typing import Awaitable, Callable, Optional, Sequence, TypeVar
+
+from a2a.types import DataPart, Message, Part, Role
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.log import get_logger
+from my_a2a.multi_a2a.common.single_flight import normalize_key
+
+T = TypeVar("T")
+
+# Upper bound on the characters of text in one packed prompt
+MAX_PACK_CHARS = 4000
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+logger = get_logger(__name__)
+
+batch_items_total = metrics.register(metrics.Counter(
+    "a2a_batch_items_total",
+    "Items of batch requests, by how they were processed and outcome.",
+    ("agent", "strategy", "outcome"),
+))
+
+
+def max_items() -> int:
+    return int(os.getenv("A2A_BATCH_MAX_ITEMS", "1000"))
+
+
+def batch_texts(message: Optional[Message]) -> Optional[list]:
+    """
+    Returns the texts of a batch request, or None if the message is not one.
+
+    Raises:
+        ValueError: If "texts" is not a list or holds more than A2A_BATCH_MAX_ITEMS items.
+    """
+    for part in message.parts if message else []:
+        if isinstance(part.root, DataPart) and "texts" in part.root.data:
+            texts = part.root.data["texts"]
+            if not isinstance(texts, list):
+                raise ValueError('"texts" must be a list of strings')
+            if len(texts) > max_items():
+                raise ValueError(f"A batch holds at most {max_items()} texts, got {len(texts)}")
+            return texts
+    return None
+
+
+def batch_message(texts: Sequence[str]) -> Message:
+    """A user message asking an agent to process `texts` as one batch."""
+    return Message(
+        role=Role.user,
+        message_id=str(uuid.uuid4()),
+        parts=[Part(root=DataPart(data={"texts": list(texts)}))],
+    )
+
+
+def pack_prompt(instruction: str, texts: Sequence[str]) -> str:
+    """An instruction followed by the texts, one per line, numbered from 0."""
+    lines = [f"[{index}] {_WHITESPACE_PATTERN.sub(' ', text).strip()}" for index, text in enumerate(texts)]
+    return instruction + "\n\n" + "\n".join(lines)
+
+
+def unpack(items: Sequence, count: int) -> list:
+    """
+    Places the items of a packed response (each with an `index`) at their
+    position; positions the model left out or numbered wrongly stay None.
+    """
+    results = [None] * count
+    for item in items:
+        if 0 <= item.index < count and results[item.index] is None:
+            results[item.index] = item
+    return results
+
+
+def _packs(indexes: list[int], texts: Sequence[str], pack_size: int) -> list[list[int]]:
+    packs, current, chars = [], [], 0
+    for index in indexes:
+        if current and (len(current) == pack_size or chars + len(texts[index]) > MAX_PACK_CHARS):
+            packs.append(current)
+            current, chars = [], 0
+        current.append(index)
+        chars += len(texts[index])
+    if current:
+        packs.append(current)
+    return packs
+
+
+async def run_batch(
+    agent: str,
+    texts: Sequence,
+    process_one: Callable[[str], Awaitable[T]],
+    process_pack: Optional[Callable[[list[str]], Awaitable[list[Optional[T]]]]] = None,
+    pack_size: int = 16,
+    max_concurrency: int = 8,
+    cache=None,
+) -> list[tuple[Optional[T], Optional[str]]]:
+    """
+    Processes the items of a batch and returns (result, error) per item, in order.
+
+    With `process_pack`, items go `pack_size` at a time through it (it returns
+    one result or None per text); otherwise each item goes through
+    `process_one`, which is also used for items a pack did not return. At most
+    `max_concurrency` packs or items run at once. Items found in `cache` (a
+    SemanticCache) are not processed, and new results are added to it.
+    """
+    results: list = [None] * len(texts) if cache is None else await cache.lookup_many_async(texts)
+    errors: list = [None] * len(texts)
+    semaphore = asyncio.Semaphore(max_concurrency)
+    batch_items_total.inc((agent, "cache", "ok"), sum(result is not None for result in results))
+
+    # Normalized text -> every index holding it; the first one is processed
+    duplicates: dict[tuple, list[int]] = {}
+    for index, text in enumerate(texts):
+        if not isinstance(text, str) or not text.strip():
+            errors[index] = "ValueError: item must be a non-empty string"
+            continue
+        if results[index] is not None:
+            continue
+        duplicates.setdefault(normalize_key(text), []).append(index)
+    unique = [indexes[0] for indexes in duplicates.values()]
+
+    async def one(index: int, strategy: str) -> None:
+        async with semaphore:
+            try:
+                results[index] = await process_one(texts[index])
+            except Exception as e:
+                errors[index] = f"{type(e).__name__}: {e}"
+        batch_items_total.inc((agent, strategy, "error" if errors[index] else "ok"))
+
+    async def packed(indexes: list[int]) -> None:
+        async with semaphore:
+            try:
+                returned = await process_pack([texts[index] for index in indexes])
+            except Exception as e:
+                logger.warning("Packed %s call for %d items failed, retrying them one by one: %s", agent, len(indexes), e)
+                returned = []
+        missing = []
+        for index, result in zip(indexes, list(returned) + [None] * (len(indexes) - len(returned))):
+            if result is None:
+                missing.append(index)
+            else:
+                results[index] = result
+                batch_items_total.inc((agent, "packed", "ok"))
+        # Left out or unusable: each one on its own
+        await asyncio.gather(*(one(index, "fallback") for index in missing))
+
+    if process_pack is not None and pack_size > 1 and len(unique) > 1:
+        await asyncio.gather(*(packed(indexes) for indexes in _packs(unique, texts, pack_size)))
+    else:
+        await asyncio.gather(*(one(index, "single") for index in unique))
+
+    if cache is not None:
+        done = [index for index in unique if results[index] is not None]
+        await cache.put_many_async([texts[index] for index in done], [results[index] for index in done])
+    for indexes in duplicates.values():
+        for index in indexes[1:]:
+            results[index], errors[index] = results[indexes[0]], errors[indexes[0]]
+    return list(zip(results, errors))
@@ -0,0 +1,337 @@
+# Memory accounting and leak detection for long-running agent servers.
+# Off by default; with
+#   A2A_DIAGNOSTICS=1 A2A_ADMIN_TOKEN=<secret>
+# each server gets, behind the admin token (see admin.py):
+#
+#   GET    /admin/memory                resident memory, plus the retained size of
+#                                       every tracked subsystem (ADK session events,
+#                                       sessions, A2A tasks and event queues, caches)
+#   POST   /admin/memory/snapshot       takes a tracemalloc snapshot (starting
+#                                       tracemalloc on first use) and returns its id
+#   GET    /admin/memory/diff?since=ID  top allocation sites grown since that snapshot
+#   DELETE /admin/memory/snapshot       drops the snapshots and stops tracemalloc
+#
+#   A2A_TRACEMALLOC_FRAMES=5    frames kept per allocation (for ?group=traceback)
+#
+# Sizes are computed on demand by walking the tracked objects, on the event
+# loop: fine for an admin call, not for every scrape. /metrics only gets the
+# cheap numbers (resident memory and object counts per subsystem).
+# `python benchmarks/soak.py` drives a server with these routes and fails if
+# memory retained per request exceeds a threshold.
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import types
+import weakref
+from collections import OrderedDict, deque
+from typing import Callable, Iterable, Optional
+
+from a2a.server.apps import A2AStarletteApplication
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.admin import admin_route, admin_token
+from my_a2a.multi_a2a.common.log import get_logger
+
+# Report order. Objects are counted once, in the first subsystem that reaches
+# them: session events are sized before the sessions holding them, so the
+# sessions line is the sessions' own overhead.
+SUBSYSTEMS = ("events", "sessions", "tasks", "caches")
+
+# Snapshots kept for /admin/memory/diff
+MAX_SNAPSHOTS = 8
+
+logger = get_logger(__name__)
+
+# Shared, immutable-in-practice objects that are never attributed to a subsystem
+_NOT_RETAINED = (
+    type,
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    types.CodeType,
+    types.FrameType,
+    weakref.ref,
+)
+_LEAVES = (str, bytes, int, float, bool, type(None))
+
+# (subsystem, name) -> measure(), returning (object count, roots to size or None)
+_trackers: dict[tuple[str, str], Callable[[], tuple[int, Optional[Iterable]]]] = {}
+
+
+def deep_size(roots: Iterable, seen: set[int]) -> int:
+    """
+    Bytes held by `roots` and everything they reach that is not in `seen`.
+
+    Follows containers, instance __dict__s and __slots__; skips modules,
+    classes and functions. Adds every visited object's id to `seen`.
+    """
+    size = 0
+    stack = list(roots)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _NOT_RETAINED):
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj, 0)
+        if isinstance(obj, _LEAVES):
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        else:
+            attributes = getattr(obj, "__dict__", None)
+            if attributes is not None:
+                stack.append(attributes)
+            for cls in type(obj).__mro__:
+                for slot in cls.__dict__.get("__slots__", ()):
+                    value = getattr(obj, slot, None)
+                    if value is not None:
+                        stack.append(value)
+    return size
+
+
+def track(subsystem: str, name: str, measure: Callable[[], tuple[int, Optional[Iterable]]]) -> None:
+    """
+    Adds something that retains memory to the report.
+
+    Args:
+        subsystem: One of SUBSYSTEMS.
+        name: What it is, e.g. the agent it belongs to.
+        measure: Returns (number of objects, roots to size); roots may be
+            None for things only worth counting.
+    """
+    if subsystem not in SUBSYSTEMS:
+        raise ValueError(f"Unknown subsystem {subsystem!r}, expected one of {SUBSYSTEMS}")
+    _trackers[(subsystem, name)] = measure
+
+
+def watch_agent(agent: str, server: A2AStarletteApplication) -> None:
+    """Tracks an agent server's tasks, event queues, ADK sessions, single-flight calls and semantic cache."""
+    handler = server.handler.request_handler
+
+    tasks = getattr(handler.task_store, "tasks", None)
+    if isinstance(tasks, dict):
+        track("tasks", agent, lambda: (len(tasks), [tasks]))
+    queues = getattr(getattr(handler, "_queue_manager", None), "_task_queue", None)
+    if isinstance(queues, dict):
+        track("tasks", f"{agent}.queues", lambda: (len(queues), [queues]))
+    # Results kept for retried messages (IdempotentRequestHandler)
+    results = getattr(handler, "results", None)
+    if results is not None:
+        track("caches", f"{agent}.idempotency", lambda: (len(results), [results]))
+    # Webhooks of non-blocking callers, and notifications waiting for delivery (WebhookDispatcher)
+    push_configs = getattr(getattr(handler, "_push_config_store", None), "_push_notification_infos", None)
+    if isinstance(push_configs, dict):
+        track("tasks", f"{agent}.push_configs", lambda: (len(push_configs), [push_configs]))
+    pending = getattr(getattr(handler, "_push_sender", None), "pending", None)
+    if pending is not None:
+        track("tasks", f"{agent}.push_pending", lambda: (len(pending), [pending]))
+
+    executor = handler.agent_executor
+    # app name -> user -> session id -> Session
+    sessions = getattr(getattr(executor, "session_service", None), "sessions", None)
+    if isinstance(sessions, dict):
+        def all_sessions():
+            return [session for users in sessions.values() for by_id in users.values() for session in by_id.values()]
+
+        def events():
+            histories = [session.events for session in all_sessions()]
+            return sum(len(history) for history in histories), histories
+
+        track("events", agent, events)
+        track("sessions", agent, lambda: (len(all_sessions()), [sessions]))
+
+    single_flight = getattr(executor, "single_flight", None)
+    if single_flight is not None:
+        track("caches", f"{agent}.single_flight", lambda: (single_flight.in_flight, None))
+    semantic = getattr(executor, "semantic_cache", None)
+    if semantic is not None:
+        track("caches", f"{agent}.semantic_cache", lambda: (len(semantic), [semantic]))
+
+
+def _track_process_caches() -> None:
+    from my_a2a.llm import cassette
+    from my_a2a.multi_a2a.common import in_process
+
+    local_agents = in_process._local_agents
+    track("caches", "agent_cards", lambda: (len(local_agents), [card for card, _ in local_agents.values()]))
+    track("caches", "cassettes", lambda: (
+        sum(len(recordings) for store in cassette._cassettes.values() for recordings in store.interactions.values()),
+        [store.interactions for store in cassette._cassettes.values()],
+    ))
+
+    def tier_models():
+        routing = sys.modules.get("my_a2a.llm.routing")
+        return (len(routing._tier_models) + len(routing._cascades), None) if routing else (0, None)
+
+    track("caches", "model_clients", tier_models)
+
+
+def resident_bytes() -> Optional[int]:
+    """Current resident set size, where /proc is available."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def peak_resident_bytes() -> Optional[int]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def handled_requests() -> int:
+    return int(sum(metrics.requests_total.values.values()))
+
+
+def memory_report() -> dict:
+    """Resident memory and the retained size of every tracked subsystem."""
+    seen: set[int] = set()
+    subsystems = {subsystem: {} for subsystem in SUBSYSTEMS}
+    for subsystem in SUBSYSTEMS:
+        for (tracked, name), measure in _trackers.items():
+            if tracked != subsystem:
+                continue
+            count, roots = measure()
+            subsystems[subsystem][name] = {
+                "objects": count,
+                "bytes": deep_size(roots, seen) if roots is not None else None,
+            }
+    traced, traced_peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (None, None)
+    return {
+        "pid": os.getpid(),
+        "requests": handled_requests(),
+        "rss_bytes": resident_bytes(),
+        "peak_rss_bytes": peak_resident_bytes(),
+        "gc_objects": len(gc.get_objects()),
+        "tracemalloc": {"tracing": tracemalloc.is_tracing(), "traced_bytes": traced, "peak_bytes": traced_peak},
+        "subsystems": subsystems,
+    }
+
+
+def _metric_lines() -> Iterable[str]:
+    rss = resident_bytes()
+    if rss is not None:
+        yield from metrics.gauge_lines(
+            "a2a_process_resident_memory_bytes", "Resident memory of this process.", (), {(): rss}
+        )
+    counts = {key: measure()[0] for key, measure in _trackers.items()}
+    yield from metrics.gauge_lines(
+        "a2a_retained_objects", "Objects held by each tracked subsystem.", ("subsystem", "name"), counts
+    )
+
+
+class Diagnostics:
+    def __init__(self):
+        self.frames = int(os.getenv("A2A_TRACEMALLOC_FRAMES", "5"))
+        self.snapshots: OrderedDict[int, tuple[float, int, tracemalloc.Snapshot]] = OrderedDict()
+        self.next_id = 1
+
+    def take_snapshot(self) -> tracemalloc.Snapshot:
+        # Only what survives a collection counts as retained
+        gc.collect()
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    async def report(self, request: Request) -> JSONResponse:
+        if request.query_params.get("gc") == "1":
+            gc.collect()
+        return JSONResponse(memory_report())
+
+    async def snapshot(self, request: Request) -> JSONResponse:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(int(request.query_params.get("frames", self.frames)))
+            logger.warning("tracemalloc started; DELETE /admin/memory/snapshot stops it")
+        snapshot_id = self.next_id
+        self.next_id += 1
+        self.snapshots[snapshot_id] = (time.time(), handled_requests(), self.take_snapshot())
+        while len(self.snapshots) > MAX_SNAPSHOTS:
+            self.snapshots.popitem(last=False)
+        return JSONResponse({
+            "id": snapshot_id,
+            "requests": handled_requests(),
+            "traced_bytes": tracemalloc.get_traced_memory()[0],
+        })
+
+    async def diff(self, request: Request) -> JSONResponse:
+        if not self.snapshots:
+            return JSONResponse({"error": "no snapshot: POST /admin/memory/snapshot first"}, status_code=409)
+        since = int(request.query_params.get("since", next(reversed(self.snapshots))))
+        if since not in self.snapshots:
+            return JSONResponse({"error": f"unknown snapshot {since}", "snapshots": list(self.snapshots)}, status_code=404)
+        group = request.query_params.get("group", "lineno")
+        if group not in ("lineno", "filename", "traceback"):
+            return JSONResponse({"error": "group must be lineno, filename or traceback"}, status_code=400)
+        top = int(request.query_params.get("top", "20"))
+
+        taken_at, requests_then, before = self.snapshots[since]
+        after = self.take_snapshot()
+        # Comparing large snapshots takes a while: keep the loop serving meanwhile
+        stats = await asyncio.to_thread(after.compare_to, before, group)
+        requests = handled_requests() - requests_then
+        size_diff = sum(stat.size_diff for stat in stats)
+        return JSONResponse({
+            "since": since,
+            "elapsed_s": round(time.time() - taken_at, 3),
+            "requests": requests,
+            "size_diff_bytes": size_diff,
+            "count_diff": sum(stat.count_diff for stat in stats),
+            "bytes_per_request": round(size_diff / requests, 1) if requests else None,
+            "top": [
+                {
+                    "site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                    "size_diff": stat.size_diff,
+                    "count_diff": stat.count_diff,
+                    "size": stat.size,
+                    "count": stat.count,
+                }
+                for stat in stats[:top]
+            ],
+        })
+
+    async def stop(self, request: Request) -> JSONResponse:
+        self.snapshots.clear()
+        tracemalloc.stop()
+        return JSONResponse({"tracing": False})
+
+
+def install(app: Starlette) -> Starlette:
+    """
+    Adds the memory diagnostics routes and metrics to an app when
+    A2A_DIAGNOSTICS=1 and an admin token is configured; otherwise returns the
+    app untouched.
+    """
+    if os.getenv("A2A_DIAGNOSTICS") != "1":
+        return app
+    if admin_token() is None:
+        logger.warning("A2A_DIAGNOSTICS=1 is ignored: set A2A_ADMIN_TOKEN to protect the diagnostics routes")
+        return app
+
+    diagnostics = Diagnostics()
+    _track_process_caches()
+    metrics.add_collector(_metric_lines)
+    app.router.routes.extend([
+        admin_route("/memory", diagnostics.report, methods=["GET"]),
+        admin_route("/memory/snapshot", diagnostics.snapshot, methods=["POST"]),
+        admin_route("/memory/snapshot", diagnostics.stop, methods=["DELETE"]),
+        admin_route("/memory/diff", diagnostics.diff, methods=["GET"]),
+    ])
+    return app
@@ -0,0 +1,109 @@
+# Fake A2A peers for offline benchmarks.
+# A FakePeerExecutor answers like one of the real agents (same artifact name and
+# result schema) after a fixed delay, without any model, so client-side
+# orchestration can be measured on its own.
+import asyncio
+import json
+
+from a2a.server.agent_execution import AgentExecutor
+from a2a.server.agent_execution.context import RequestContext
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.events.event_queue import EventQueue
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.types import AgentCapabilities, AgentCard, TaskState
+from pydantic import BaseModel
+
+from my_a2a.multi_a2a.common.in_process import register_local_agent
+from my_a2a.multi_a2a.common.schemas import (
+    GreetingResult,
+    Plan,
+    PosTagResult,
+    SentimentResult,
+    to_data_part,
+)
+from my_adk.llm.stub import canned_response
+
+# Agent name -> (artifact name, result schema), as published by the real agents
+PEER_RESULTS = {
+    "planner": ("plan", Plan),
+    "greeting": ("greeting", GreetingResult),
+    "sentiment": ("sentiment", SentimentResult),
+    "pos": ("pos_tags", PosTagResult),
+}
+
+
+def _planner_prompt(user_input: str) -> str:
+    # The planner receives {"user_input": ..., "available_agents": [...]}; reuse
+    # the stub model's plan logic by rendering it the way the real prompt does
+    try:
+        payload = json.loads(user_input)
+    except json.JSONDecodeError:
+        payload = {"user_input": user_input, "available_agents": ["sentiment", "pos"]}
+    agents = "\n".join(f"- {agent}" for agent in payload.get("available_agents", []))
+    return f"Available agents:\n{agents}\nNow, given the user request:\n\"{payload.get('user_input', '')}\""
+
+
+class FakePeerExecutor(AgentExecutor):
+    """
+    Replies with a canned, schema-valid result for one agent after `latency` seconds.
+
+    Supports tasks/cancel like the real agents: the request handler cancels the
+    sleeping execution, and the task ends canceled.
+    """
+
+    def __init__(self, agent_name: str, latency: float = 0.0):
+        self.agent_name = agent_name
+        self.latency = latency
+        self.artifact_name, self.schema = PEER_RESULTS[agent_name]
+        self.calls = 0
+        self.cancelled = 0
+
+    def result(self, text: str) -> BaseModel:
+        if self.schema is GreetingResult:
+            return GreetingResult(greeting=canned_response(text))
+        prompt = _planner_prompt(text) if self.schema is Plan else f'Text: "{text}"'
+        return self.schema.model_validate(canned_response(prompt, self.schema))
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        self.calls += 1
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        if not context.current_task:
+            await updater.update_status(TaskState.submitted)
+        await updater.update_status(TaskState.working)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        result = self.result(context.get_user_input())
+        await updater.add_artifact([to_data_part(result)], name=self.artifact_name)
+        await updater.update_status(TaskState.completed, final=True)
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue):
+        # The request handler then cancels the execution itself
+        self.cancelled += 1
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
+
+
+def fake_peer_server(
+    agent_name: str,
+    url: str,
+    latency: float = 0.0,
+) -> A2AStarletteApplication:
+    """Builds an A2A server for a fake peer and registers it for in-process dispatch."""
+    agent_card = AgentCard(
+        name=f"Fake {agent_name} agent",
+        description=f"Offline stand-in for the {agent_name} agent.",
+        url=url,
+        defaultInputModes=["text"],
+        defaultOutputModes=["application/json"],
+        skills=[],
+        version="1.0.0",
+        capabilities=AgentCapabilities(),
+    )
+    request_handler = DefaultRequestHandler(
+        agent_executor=FakePeerExecutor(agent_name, latency),
+        task_store=InMemoryTaskStore(),
+    )
+    server = A2AStarletteApplication(http_handler=request_handler, agent_card=agent_card)
+    register_local_agent(agent_card, request_handler)
+    return server
@@ -0,0 +1,386 @@
+# Concurrent multi-user HTTP front door for an ADK app.
+# One Runner and one session service per app serve every user and session;
+# requests for different sessions run concurrently, while the requests of one
+# session run one at a time, in arrival order (its history and state are
+# read-modify-write). Each user may have a bounded number of requests waiting
+# or running; past that they get 429 instead of piling up.
+#
+#   POST /run  {"user_id", "session_id", "message", "stream": false}
+#       -> {"user_id", "session_id", "response", "state"}
+#   POST /run  {..., "stream": true}
+#       -> text/event-stream: "message" events {"author", "text", "partial"},
+#          then "done" {"response", "state"} or "error" {"error"}
+#   GET  /sessions/{user_id}/{session_id}   -> {"state", "events": [{"author", "text"}]}
+#   GET  /ready, /metrics
+#
+#   A2A_FRONT_DOOR_USER_QUEUE=8       requests per user waiting or running at most
+#   A2A_FRONT_DOOR_SESSION_TTL=3600   seconds a session may sit idle before it is
+#                                     deleted (0: sessions are kept for good)
+#
+# Sessions live in this process (InMemorySessionService), so the front door
+# runs a single worker. Idle sessions are swept as requests come in; a request
+# for an expired session starts it afresh. Agents the app calls keep their own
+# per-turn state (e.g. the NLP client's speculation is scoped to the ADK
+# invocation), so sessions sharing one client do not interfere. Served apps: nlp_client_agent/server.py and
+# multi_a2a/expense_manager.py; benchmarks/front_door.py drives hundreds of
+# concurrent sessions against either.
+import asyncio
+import copy
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from contextlib import aclosing, asynccontextmanager
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, AsyncGenerator, Optional, Sequence
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.adk.sessions import BaseSessionService, InMemorySessionService
+from google.genai import types
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.log import get_logger
+
+if TYPE_CHECKING:
+    from my_a2a.multi_a2a.common.warmup import WarmUp
+
+logger = get_logger(__name__)
+
+front_door_requests_total = metrics.register(metrics.Counter(
+    "a2a_front_door_requests_total",
+    "Front door requests, by outcome (ok, error, rejected).",
+    ("app", "outcome"),
+))
+front_door_seconds = metrics.register(metrics.Histogram(
+    "a2a_front_door_seconds",
+    "Front door request time, by stage (queued: waiting for the session, run: running the agent).",
+    ("app", "stage"),
+))
+
+# App name -> its front door, for the gauges
+_front_doors: dict[str, "FrontDoor"] = {}
+
+
+class UserQueueFull(Exception):
+    pass
+
+
+@dataclass
+class TurnResult:
+    """The end of a session turn: the agent's final response and the session state after it."""
+    response: str
+    state: dict
+
+
+class FrontDoor:
+    """
+    Runs an agent for many users and sessions at once through one shared Runner.
+
+    Requests of the same session are serialized in arrival order; each user
+    has at most `max_per_user` requests admitted (waiting or running).
+    Sessions are created on first use with a copy of `initial_state`, and
+    deleted once idle for `session_ttl` seconds (None or 0: never).
+    """
+
+    def __init__(
+        self,
+        agent,
+        app_name: str,
+        initial_state: Optional[dict] = None,
+        session_service: Optional[BaseSessionService] = None,
+        max_per_user: Optional[int] = None,
+        session_ttl: Optional[float] = None,
+    ):
+        self.app_name = app_name
+        self.initial_state = initial_state or {}
+        self.session_service = session_service or InMemorySessionService()
+        self.runner = Runner(agent=agent, app_name=app_name, session_service=self.session_service)
+        self.max_per_user = max_per_user or int(os.getenv("A2A_FRONT_DOOR_USER_QUEUE", "8"))
+        # (user, session) -> its lock; asyncio.Lock hands over in FIFO order
+        self._locks: dict[tuple[str, str], asyncio.Lock] = {}
+        # (user, session) -> requests holding or waiting for its lock
+        self._holders: Counter = Counter()
+        # User -> requests admitted (waiting or running)
+        self.admitted: Counter = Counter()
+        if session_ttl is None:
+            session_ttl = float(os.getenv("A2A_FRONT_DOOR_SESSION_TTL", "3600"))
+        self.session_ttl = session_ttl or None
+        # Sessions known to exist, so the hot path skips get_session (it copies
+        # the whole session), with when each was last used, least recent first
+        self._known: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self._next_sweep = 0.0
+        _front_doors[app_name] = self
+
+    @asynccontextmanager
+    async def session_turn(self, user_id: str, session_id: str):
+        """
+        Admits a request and holds its session's turn.
+
+        Raises:
+            UserQueueFull: If the user already has max_per_user requests admitted.
+        """
+        await self.expire_sessions()
+        if self.admitted[user_id] >= self.max_per_user:
+            raise UserQueueFull(f"user {user_id!r} has {self.max_per_user} requests in progress")
+        key = (user_id, session_id)
+        self.admitted[user_id] += 1
+        queued = time.perf_counter()
+        try:
+            async with self.session_lock(key):
+                front_door_seconds.observe((self.app_name, "queued"), time.perf_counter() - queued)
+                await self.ensure_session(user_id, session_id)
+                yield
+        finally:
+            self.admitted[user_id] -= 1
+            if not self.admitted[user_id]:
+                del self.admitted[user_id]
+
+    @asynccontextmanager
+    async def session_lock(self, key: tuple[str, str]):
+        """Holds a session's turn, waiting behind the requests already holding or waiting for it."""
+        self._holders[key] += 1
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        try:
+            async with lock:
+                yield
+        finally:
+            self._holders[key] -= 1
+            if not self._holders[key]:
+                del self._holders[key]
+                del self._locks[key]
+
+    async def expire_sessions(self) -> None:
+        """Deletes the sessions idle for session_ttl; runs at most every tenth of the TTL."""
+        now = time.monotonic()
+        if self.session_ttl is None or now < self._next_sweep:
+            return
+        self._next_sweep = now + self.session_ttl / 10
+        cutoff = now - self.session_ttl
+        # Least recently used first: stop at the first session still in use
+        expired = []
+        for key, last_used in self._known.items():
+            if last_used >= cutoff:
+                break
+            if key not in self._holders:
+                expired.append(key)
+        for key in expired:
+            # In the session's turn, so a request arriving meanwhile waits and then recreates it
+            async with self.session_lock(key):
+                last_used = self._known.get(key)
+                if last_used is None or last_used >= cutoff:
+                    continue
+                del self._known[key]
+                await self.session_service.delete_session(
+                    app_name=self.app_name, user_id=key[0], session_id=key[1]
+                )
+        if expired:
+            logger.info("Expired %d idle %s sessions", len(expired), self.app_name)
+
+    async def ensure_session(self, user_id: str, session_id: str) -> None:
+        key = (user_id, session_id)
+        if key in self._known:
+            self._known[key] = time.monotonic()
+            self._known.move_to_end(key)
+            return
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            await self.session_service.create_session(
+                app_name=self.app_name,
+                user_id=user_id,
+                session_id=session_id,
+                state=copy.deepcopy(self.initial_state),
+            )
+        self._known[key] = time.monotonic()
+
+    async def run(self, user_id: str, session_id: str, text: str, stream: bool = False) -> AsyncGenerator:
+        """
+        Yields the agent's events for one message, in its session's turn, then
+        a TurnResult. With `stream`, partial text chunks are yielded as the
+        model produces them.
+        """
+        async with self.session_turn(user_id, session_id):
+            started = time.perf_counter()
+            response = ""
+            try:
+                # Closed here even when our caller stops early (e.g. a client disconnect),
+                # not later by the garbage collector, in the wrong tracing context
+                async with aclosing(self.runner.run_async(
+                    user_id=user_id,
+                    session_id=session_id,
+                    new_message=types.Content(role="user", parts=[types.Part(text=text)]),
+                    run_config=RunConfig(streaming_mode=StreamingMode.SSE if stream else StreamingMode.NONE),
+                )) as events:
+                    async for event in events:
+                        if event.is_final_response() and _event_text(event):
+                            response = _event_text(event)
+                        yield event
+            finally:
+                front_door_seconds.observe((self.app_name, "run"), time.perf_counter() - started)
+            # Read before the next request of the session can change it
+            session = await self.session_service.get_session(
+                app_name=self.app_name, user_id=user_id, session_id=session_id
+            )
+            yield TurnResult(response, session.state)
+
+    async def state(self, user_id: str, session_id: str) -> Optional[dict]:
+        """A session's state and transcript (None if it does not exist)."""
+        session = await self.session_service.get_session(
+            app_name=self.app_name, user_id=user_id, session_id=session_id
+        )
+        if session is None:
+            return None
+        events = [{"author": event.author, "text": _event_text(event)} for event in session.events]
+        return {"state": session.state, "events": events}
+
+
+def _event_text(event) -> str:
+    if not event.content or not event.content.parts:
+        return ""
+    return "".join(part.text or "" for part in event.content.parts)
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class FrontDoorApp:
+    """The HTTP routes of a FrontDoor."""
+
+    def __init__(self, front_door: FrontDoor):
+        self.front_door = front_door
+
+    async def parse(self, request: Request) -> tuple[str, str, str, bool]:
+        """
+        Raises:
+            ValueError: If the body is not a JSON object with user_id, session_id and message.
+        """
+        try:
+            body = await request.json()
+        except json.JSONDecodeError as e:
+            raise ValueError(f"invalid JSON: {e}")
+        if not isinstance(body, dict):
+            raise ValueError("the body must be a JSON object")
+        fields = [body.get(name) for name in ("user_id", "session_id", "message")]
+        if not all(isinstance(value, str) and value.strip() for value in fields):
+            raise ValueError("user_id, session_id and message must be non-empty strings")
+        return fields[0], fields[1], fields[2], bool(body.get("stream"))
+
+    async def run_endpoint(self, request: Request):
+        app_name = self.front_door.app_name
+        try:
+            user_id, session_id, text, stream = await self.parse(request)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=400)
+        # Admission is checked before answering, so a full queue is a plain 429
+        if self.front_door.admitted[user_id] >= self.front_door.max_per_user:
+            front_door_requests_total.inc((app_name, "rejected"))
+            return JSONResponse(
+                {"error": f"too many requests in progress for user {user_id!r}"},
+                status_code=429,
+                headers={"Retry-After": "1"},
+            )
+        events = self.front_door.run(user_id, session_id, text, stream=stream)
+        if stream:
+            return StreamingResponse(self.stream(user_id, session_id, events), media_type="text/event-stream")
+
+        try:
+            async for event in events:
+                result = event
+        except UserQueueFull as e:
+            front_door_requests_total.inc((app_name, "rejected"))
+            return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": "1"})
+        except Exception as e:
+            front_door_requests_total.inc((app_name, "error"))
+            logger.exception("Front door run for %s/%s failed", user_id, session_id)
+            return JSONResponse({"error": f"{type(e).__name__}: {e}"}, status_code=500)
+        front_door_requests_total.inc((app_name, "ok"))
+        return JSONResponse(json.loads(json.dumps(
+            {"user_id": user_id, "session_id": session_id, "response": result.response, "state": result.state},
+            default=str,
+        )))
+
+    async def stream(self, user_id: str, session_id: str, events: AsyncGenerator) -> AsyncGenerator[str, None]:
+        app_name = self.front_door.app_name
+        try:
+            async for event in events:
+                if isinstance(event, TurnResult):
+                    front_door_requests_total.inc((app_name, "ok"))
+                    yield _sse("done", {"response": event.response, "state": event.state})
+                    break
+                text = _event_text(event)
+                if not text:
+                    continue
+                # The final event repeats the streamed chunks in full: clients
+                # that render chunks skip the one with partial false
+                yield _sse("message", {"author": event.author, "text": text, "partial": bool(event.partial)})
+        except UserQueueFull as e:
+            front_door_requests_total.inc((app_name, "rejected"))
+            yield _sse("error", {"error": str(e)})
+            return
+        except Exception as e:
+            front_door_requests_total.inc((app_name, "error"))
+            logger.exception("Front door run for %s/%s failed", user_id, session_id)
+            yield _sse("error", {"error": f"{type(e).__name__}: {e}"})
+            return
+        finally:
+            await events.aclose()
+
+    async def session_endpoint(self, request: Request) -> JSONResponse:
+        state = await self.front_door.state(request.path_params["user_id"], request.path_params["session_id"])
+        if state is None:
+            return JSONResponse({"error": "no such session"}, status_code=404)
+        return JSONResponse(json.loads(json.dumps(state, default=str)))
+
+    async def ready_endpoint(self, request: Request) -> JSONResponse:
+        return JSONResponse({"ready": True, "pid": os.getpid()})
+
+    def build(self, mounts: Sequence[Mount] = (), warm_up: Optional["WarmUp"] = None) -> Starlette:
+        """
+        Args:
+            mounts: Other apps served alongside, e.g. co-located A2A agents.
+            warm_up: Their warm-up: it runs at startup and answers /ready.
+        """
+        ready = warm_up.route() if warm_up is not None else Route("/ready", self.ready_endpoint, methods=["GET"])
+        return Starlette(
+            routes=[
+                Route("/run", self.run_endpoint, methods=["POST"]),
+                Route("/sessions/{user_id}/{session_id}", self.session_endpoint, methods=["GET"]),
+                ready,
+                metrics.route(),
+                *mounts,
+            ],
+            lifespan=warm_up.lifespan if warm_up is not None else None,
+        )
+
+
+def _load_metric():
+    return [
+        *metrics.gauge_lines(
+            "a2a_front_door_sessions_busy",
+            "Sessions with a request running or waiting.",
+            ("app",),
+            {(app,): len(door._locks) for app, door in _front_doors.items()},
+        ),
+        *metrics.gauge_lines(
+            "a2a_front_door_sessions",
+            "Sessions held, busy or idle.",
+            ("app",),
+            {(app,): len(door._known) for app, door in _front_doors.items()},
+        ),
+        *metrics.gauge_lines(
+            "a2a_front_door_requests_admitted",
+            "Requests waiting or running.",
+            ("app",),
+            {(app,): sum(door.admitted.values()) for app, door in _front_doors.items()},
+        ),
+    ]
+
+
+metrics.add_collector(_load_metric)
@@ -0,0 +1,143 @@
+# Optional A2A gRPC binding for the agent servers and the Client.
+# With A2A_GRPC=1 every agent server also serves the A2A gRPC service on its
+# own port, next to JSON-RPC over HTTP, and lists both in its card's
+# additional_interfaces. JSON-RPC stays the card's preferred transport, so
+# clients without gRPC support are unaffected.
+#
+#   A2A_GRPC=1                              serve and advertise the gRPC binding
+#   A2A_GRPC_PORTS='{"sentiment": 9103}'    per-agent ports (default: planner 9001 ... pos 9004)
+#   A2A_GRPC_HOST=localhost                 host advertised in the card
+#   A2A_PREFER_GRPC=0                       Client: stay on JSON-RPC even when gRPC is offered
+#
+# The Client switches to gRPC for every agent whose card offers it, over one
+# persistent HTTP/2 channel per agent (calls are multiplexed on it, streamed
+# ones included). Pre-forked workers each bind the port with SO_REUSEPORT.
+# Needs grpcio: pip install "a2a-sdk[grpc]".
+import asyncio
+import importlib.util
+import json
+import os
+from typing import Optional
+
+from a2a.client.client import ClientConfig
+from a2a.server.apps import A2AStarletteApplication
+from a2a.types import AgentCard, AgentInterface, TransportProtocol
+
+from my_a2a.multi_a2a.common.log import get_logger
+
+DEFAULT_PORTS = {
+    "planner": 9001,
+    "greeting": 9002,
+    "sentiment": 9003,
+    "pos": 9004,
+}
+
+# Seconds in-flight gRPC calls get to finish on shutdown
+GRACE_PERIOD = 5.0
+
+logger = get_logger(__name__)
+
+# Target -> (event loop, channel); channels are bound to the loop they were made on
+_channels: dict[str, tuple[asyncio.AbstractEventLoop, object]] = {}
+
+
+def grpc_available() -> bool:
+    # Checked without importing grpc: pre-fork parents must not load it
+    return importlib.util.find_spec("grpc") is not None
+
+
+def grpc_port(agent: str) -> Optional[int]:
+    ports = dict(DEFAULT_PORTS)
+    ports.update(json.loads(os.getenv("A2A_GRPC_PORTS", "{}")))
+    return ports.get(agent)
+
+
+def grpc_url(agent_card: AgentCard) -> Optional[str]:
+    """The gRPC target an agent card advertises, if any."""
+    for interface in agent_card.additional_interfaces or []:
+        if interface.transport == TransportProtocol.grpc:
+            return interface.url
+    return None
+
+
+def advertise(agent_card: AgentCard, target: str) -> None:
+    """Lists JSON-RPC (at the card URL) and gRPC (at `target`) as the card's interfaces."""
+    agent_card.additional_interfaces = [
+        AgentInterface(transport=TransportProtocol.jsonrpc, url=agent_card.url),
+        AgentInterface(transport=TransportProtocol.grpc, url=target),
+    ]
+
+
+class GrpcBinding:
+    """Serves one agent's request handler over gRPC, started and stopped with the app."""
+
+    def __init__(self, agent: str, server: A2AStarletteApplication, port: int, host: str = "0.0.0.0"):
+        self.agent = agent
+        self.agent_card = server.agent_card
+        self.request_handler = server.handler.request_handler
+        self.address = f"{host}:{port}"
+        self.server = None
+
+    async def start(self) -> None:
+        import grpc
+        from a2a.grpc import a2a_pb2_grpc
+        from a2a.server.request_handlers import GrpcHandler
+
+        self.server = grpc.aio.server(options=[("grpc.so_reuseport", 1)])
+        a2a_pb2_grpc.add_A2AServiceServicer_to_server(GrpcHandler(self.agent_card, self.request_handler), self.server)
+        self.server.add_insecure_port(self.address)
+        await self.server.start()
+        logger.info("Serving %s over gRPC on %s", self.agent, self.address)
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            await self.server.stop(GRACE_PERIOD)
+            self.server = None
+
+
+def from_env(agent: str, server: A2AStarletteApplication) -> Optional[GrpcBinding]:
+    """
+    Returns the gRPC binding for an agent server when A2A_GRPC=1, and adds it
+    to the server's card; returns None otherwise.
+    """
+    if os.getenv("A2A_GRPC") != "1":
+        return None
+    if not grpc_available():
+        logger.warning("A2A_GRPC=1 is ignored: install grpcio (pip install \"a2a-sdk[grpc]\")")
+        return None
+    port = grpc_port(agent)
+    if port is None:
+        logger.warning("A2A_GRPC=1: no gRPC port for %s, set it in A2A_GRPC_PORTS", agent)
+        return None
+    advertise(server.agent_card, f"{os.getenv('A2A_GRPC_HOST', 'localhost')}:{port}")
+    return GrpcBinding(agent, server, port)
+
+
+def channel(target: str):
+    """A persistent channel to `target`, shared by every call from this event loop."""
+    import grpc
+
+    loop = asyncio.get_running_loop()
+    cached = _channels.get(target)
+    if cached is not None and cached[0] is loop:
+        return cached[1]
+    created = grpc.aio.insecure_channel(target)
+    _channels[target] = (loop, created)
+    return created
+
+
+def prefers_grpc(agent_card: AgentCard) -> bool:
+    """Whether the Client should call this agent over gRPC."""
+    return (
+        os.getenv("A2A_PREFER_GRPC", "1") != "0"
+        and grpc_url(agent_card) is not None
+        and grpc_available()
+    )
+
+
+def client_config() -> ClientConfig:
+    """Client configuration that talks gRPC over the shared channels."""
+    return ClientConfig(
+        grpc_channel_factory=channel,
+        supported_transports=[TransportProtocol.grpc],
+    )
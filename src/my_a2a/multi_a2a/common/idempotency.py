@@ -0,0 +1,197 @@
+# Idempotent message handling for the agent servers.
+# When a caller (the orchestrator, a load balancer) retries a send_message
+# after a timeout, the retry must not run the agent a second time. Every
+# message carries an idempotency key: metadata["idempotency_key"] if the
+# caller set one, else its message_id (a retry resends the same message).
+#
+# - A retry while the original is still running attaches to it (through
+#   SingleFlight) and gets the same result; a streaming retry resubscribes to
+#   the running task's events.
+# - A retry after it finished gets the stored result, without running anything.
+# - Runs that raise or end in a failed task are not stored: a retry runs again.
+#
+#   A2A_IDEMPOTENCY=0               turn it off
+#   A2A_IDEMPOTENCY_TTL=600         seconds a result is kept for retries
+#   A2A_IDEMPOTENCY_MAX_KEYS=10000  results kept at most (oldest dropped first)
+#
+# Suppressed duplicates are counted in a2a_duplicate_requests_total.
+import os
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Hashable, Optional
+
+from a2a.server.context import ServerCallContext
+from a2a.server.events import Event
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.types import (
+    Message,
+    MessageSendParams,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+from a2a.utils.errors import ServerError
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.single_flight import SingleFlight
+from my_a2a.multi_a2a.common.warmup import is_warm_up
+
+IDEMPOTENCY_METADATA_KEY = "idempotency_key"
+
+duplicate_requests_total = metrics.register(metrics.Counter(
+    "a2a_duplicate_requests_total",
+    "Retried messages answered without running the agent again, by the state of the original.",
+    ("agent", "original"),
+))
+
+
+def idempotency_key(message: Optional[Message]) -> Optional[str]:
+    """The key identifying retries of a message (None if it has none)."""
+    if message is None:
+        return None
+    key = (message.metadata or {}).get(IDEMPOTENCY_METADATA_KEY)
+    return str(key) if key is not None else message.message_id
+
+
+class TTLStore:
+    """
+    A map whose entries expire `ttl` seconds after they are set, holding at
+    most `max_entries` (the oldest are dropped first).
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Key -> (expiry, value), oldest first: every entry lives for the same TTL
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries.pop(key, None)
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        now = time.monotonic()
+        while self._entries:
+            expiry, _ = next(iter(self._entries.values()))
+            if expiry > now and len(self._entries) <= self.max_entries:
+                break
+            self._entries.popitem(last=False)
+
+
+def _reusable(result: Message | Task) -> bool:
+    return not (isinstance(result, Task) and result.status.state == TaskState.failed)
+
+
+def enabled() -> bool:
+    return os.getenv("A2A_IDEMPOTENCY", "1") != "0"
+
+
+class IdempotentRequestHandler(DefaultRequestHandler):
+    """A DefaultRequestHandler that answers retried messages without running them again."""
+
+    def __init__(self, agent: str, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.agent = agent
+        self.enabled = enabled()
+        # Idempotency key -> final result of its run
+        self.results = TTLStore(
+            ttl=float(os.getenv("A2A_IDEMPOTENCY_TTL", "600")),
+            max_entries=int(os.getenv("A2A_IDEMPOTENCY_MAX_KEYS", "10000")),
+        )
+        self.in_flight = SingleFlight()
+        # Idempotency key -> task of a streaming run in progress
+        self._streaming: dict[str, str] = {}
+
+    def key_for(self, message: Optional[Message]) -> Optional[str]:
+        """The message's idempotency key, or None if it bypasses the store (disabled, or a warm-up)."""
+        if not self.enabled or is_warm_up(message):
+            return None
+        return idempotency_key(message)
+
+    async def stored_result(self, key: str, context: Optional[ServerCallContext]) -> Optional[Message | Task]:
+        """The result stored for a key, with a task's current state (a non-blocking send stores it running)."""
+        stored = self.results.get(key)
+        if isinstance(stored, Task):
+            return await self.task_store.get(stored.id, context) or stored
+        return stored
+
+    async def on_message_send(
+        self,
+        params: MessageSendParams,
+        context: Optional[ServerCallContext] = None,
+    ) -> Message | Task:
+        key = self.key_for(params.message)
+        if key is None:
+            return await super().on_message_send(params, context)
+
+        stored = await self.stored_result(key, context)
+        if stored is not None:
+            duplicate_requests_total.inc((self.agent, "completed"))
+            return stored
+        if key in self.in_flight:
+            duplicate_requests_total.inc((self.agent, "in_flight"))
+
+        async def run():
+            result = await super(IdempotentRequestHandler, self).on_message_send(params, context)
+            if _reusable(result):
+                self.results.put(key, result)
+            return result
+
+        return await self.in_flight.do(key, run)
+
+    async def on_message_send_stream(
+        self,
+        params: MessageSendParams,
+        context: Optional[ServerCallContext] = None,
+    ) -> AsyncGenerator[Event, None]:
+        key = self.key_for(params.message)
+        if key is None:
+            async for event in super().on_message_send_stream(params, context):
+                yield event
+            return
+
+        stored = await self.stored_result(key, context)
+        if stored is None and key in self._streaming:
+            try:
+                async for event in self.on_resubscribe_to_task(TaskIdParams(id=self._streaming[key]), context):
+                    yield event
+            except ServerError:
+                # Finished in the meantime
+                stored = await self.stored_result(key, context)
+            else:
+                duplicate_requests_total.inc((self.agent, "in_flight"))
+                return
+        if stored is not None:
+            duplicate_requests_total.inc((self.agent, "completed"))
+            yield stored
+            return
+
+        final = None
+        try:
+            async for event in super().on_message_send_stream(params, context):
+                if isinstance(event, Task):
+                    self._streaming[key] = event.id
+                elif isinstance(event, (TaskStatusUpdateEvent, TaskArtifactUpdateEvent)):
+                    self._streaming.setdefault(key, event.task_id)
+                else:
+                    final = event
+                yield event
+            task_id = self._streaming.get(key)
+            if task_id is not None:
+                final = await self.task_store.get(task_id, context)
+            if final is not None and _reusable(final):
+                self.results.put(key, final)
+        finally:
+            self._streaming.pop(key, None)
@@ -0,0 +1,172 @@
+# In-process A2A short-circuit.
+# Agents mounted in the combined host register their request handler here.
+# A client running in the same process then calls the handler directly instead
+# of going through HTTP and JSON-RPC serialization.
+from typing import AsyncGenerator, Callable, Optional
+
+from a2a.client.base_client import BaseClient
+from a2a.client.client import ClientConfig
+from a2a.client.middleware import ClientCallContext
+from a2a.client.transports.base import ClientTransport
+from a2a.server.context import ServerCallContext
+from a2a.server.request_handlers import RequestHandler
+from a2a.types import (
+    AgentCard,
+    GetTaskPushNotificationConfigParams,
+    Message,
+    MessageSendParams,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskIdParams,
+    TaskPushNotificationConfig,
+    TaskQueryParams,
+    TaskStatusUpdateEvent,
+)
+
+# Card URL (without trailing slash) -> (card, handler) of agents served by this process
+_local_agents: dict[str, tuple[AgentCard, RequestHandler]] = {}
+
+
+def _key(url: str) -> str:
+    return url.rstrip("/")
+
+
+def register_local_agent(agent_card: AgentCard, request_handler: RequestHandler) -> None:
+    """Makes an agent served by this process reachable in-process under its card URL."""
+    _local_agents[_key(agent_card.url)] = (agent_card, request_handler)
+
+
+def unregister_local_agent(url: str) -> None:
+    _local_agents.pop(_key(url), None)
+
+
+def local_agent_card(url: str) -> Optional[AgentCard]:
+    """Returns the card of the agent at `url` if it is served by this process."""
+    local = _local_agents.get(_key(url))
+    return local[0] if local else None
+
+
+def local_request_handler(url: str) -> Optional[RequestHandler]:
+    """Returns the request handler of the agent at `url` if it is served by this process."""
+    local = _local_agents.get(_key(url))
+    return local[1] if local else None
+
+
+class InProcessTransport(ClientTransport):
+    """
+    A client transport that calls a DefaultRequestHandler directly.
+
+    Requests and responses are passed as the SDK's pydantic objects, so there is
+    no HTTP round trip and no JSON encoding on either side.
+    """
+
+    def __init__(self, agent_card: AgentCard, request_handler: RequestHandler):
+        self.agent_card = agent_card
+        self.request_handler = request_handler
+
+    @staticmethod
+    def _server_context(extensions: Optional[list[str]]) -> ServerCallContext:
+        return ServerCallContext(requested_extensions=set(extensions or []))
+
+    async def send_message(
+        self,
+        request: MessageSendParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> Task | Message:
+        return await self.request_handler.on_message_send(request, self._server_context(extensions))
+
+    async def send_message_streaming(
+        self,
+        request: MessageSendParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> AsyncGenerator[Message | Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent, None]:
+        async for event in self.request_handler.on_message_send_stream(
+            request, self._server_context(extensions)
+        ):
+            yield event
+
+    async def get_task(
+        self,
+        request: TaskQueryParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> Task:
+        return await self.request_handler.on_get_task(request, self._server_context(extensions))
+
+    async def cancel_task(
+        self,
+        request: TaskIdParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> Task:
+        return await self.request_handler.on_cancel_task(request, self._server_context(extensions))
+
+    async def set_task_callback(
+        self,
+        request: TaskPushNotificationConfig,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> TaskPushNotificationConfig:
+        return await self.request_handler.on_set_task_push_notification_config(
+            request, self._server_context(extensions)
+        )
+
+    async def get_task_callback(
+        self,
+        request: GetTaskPushNotificationConfigParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> TaskPushNotificationConfig:
+        return await self.request_handler.on_get_task_push_notification_config(
+            request, self._server_context(extensions)
+        )
+
+    async def resubscribe(
+        self,
+        request: TaskIdParams,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+    ) -> AsyncGenerator[Task | Message | TaskStatusUpdateEvent | TaskArtifactUpdateEvent, None]:
+        async for event in self.request_handler.on_resubscribe_to_task(
+            request, self._server_context(extensions)
+        ):
+            yield event
+
+    async def get_card(
+        self,
+        *,
+        context: Optional[ClientCallContext] = None,
+        extensions: Optional[list[str]] = None,
+        signature_verifier: Optional[Callable[[AgentCard], None]] = None,
+    ) -> AgentCard:
+        return self.agent_card
+
+    async def close(self) -> None:
+        pass
+
+
+def in_process_client(agent_card: AgentCard, config: Optional[ClientConfig] = None) -> Optional[BaseClient]:
+    """
+    Returns a client bound directly to the agent's request handler when the agent
+    is served by this process, or None when it has to be reached over the network.
+    """
+    local = _local_agents.get(_key(agent_card.url))
+    if local is None:
+        return None
+    local_card, request_handler = local
+    return BaseClient(
+        local_card,
+        config or ClientConfig(),
+        InProcessTransport(local_card, request_handler),
+        consumers=[],
+        middleware=[],
+    )
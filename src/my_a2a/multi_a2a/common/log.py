@@ -0,0 +1,60 @@
+# Non-blocking, sampled logging for the agents' request paths.
+# Log calls only put the record on a queue; a background thread formats and
+# writes it, so a slow stderr or log collector never stalls the event loop.
+# Per-request INFO/DEBUG lines are sampled; warnings and errors always pass.
+#
+#   A2A_LOG_LEVEL=INFO    minimum level
+#   A2A_LOG_SAMPLE=1.0    fraction of INFO/DEBUG records kept (e.g. 0.01 in production)
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from typing import Optional
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.handlers.QueueHandler] = None
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps `rate` of the records below WARNING, chosen at random."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+def _start_listener() -> None:
+    global _listener
+    records = queue.SimpleQueue()
+    output = logging.StreamHandler()
+    output.setFormatter(logging.Formatter("%(asctime)s %(process)d %(name)s %(levelname)s %(message)s"))
+    _handler.queue = records
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+
+
+def _configure() -> None:
+    global _handler
+    _handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    _handler.addFilter(SamplingFilter(float(os.getenv("A2A_LOG_SAMPLE", "1.0"))))
+    root = logging.getLogger("my_a2a")
+    root.addHandler(_handler)
+    root.setLevel(os.getenv("A2A_LOG_LEVEL", "INFO").upper())
+    root.propagate = False
+    _start_listener()
+    # Flush what is still queued on exit
+    atexit.register(lambda: _listener.stop())
+    # The writer thread does not survive a fork: pre-forked workers start their own
+    os.register_at_fork(after_in_child=_start_listener)
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Returns a logger under the `my_a2a` hierarchy, set up for queued, sampled output."""
+    if _handler is None:
+        _configure()
+    return logging.getLogger(name)
@@ -0,0 +1,262 @@
+# In-process metrics for the agent servers, served in the Prometheus text format.
+# Every executor times its stages (session creation, runner setup, LLM call,
+# first chunk, parse, enqueue) and counts in-flight requests and errors by
+# cause. GET /metrics renders them together with the single-flight, routing,
+# JSON parse and completion counters.
+#
+# Recording is a dict lookup and a bisect per observation, cheap enough to
+# leave on in production. Each pre-forked worker keeps its own registry; the
+# `pid` in a2a_worker_info tells the scraped workers apart. Requests opened
+# with record=False (the startup warm-up) and their stages are left out.
+import os
+import sys
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from my_a2a.multi_a2a.common.single_flight import SingleFlight
+
+METRICS_PATH = "/metrics"
+
+# False while a request left out of the metrics runs
+_recording: ContextVar[bool] = ContextVar("a2a_metrics_recording", default=True)
+
+# Seconds; LLM stages sit in the upper half, bookkeeping stages in the lower
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value:g}"
+
+
+class Gauge(Counter):
+    def dec(self, labels: tuple = (), amount: float = 1.0) -> None:
+        self.values[labels] = self.values.get(labels, 0.0) - amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (), buckets: tuple = STAGE_BUCKETS):
+        self.name, self.help, self.labelnames, self.buckets = name, help, labelnames, buckets
+        # labels -> [per-bucket counts (last one is +Inf), sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labelnames + ("le",)
+        for labels, (counts, total) in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total:g}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+stage_seconds = Histogram("a2a_stage_seconds", "Time spent per request stage.", ("agent", "stage"))
+requests_total = Counter("a2a_requests_total", "Requests handled, by outcome.", ("agent", "outcome"))
+errors_total = Counter("a2a_errors_total", "Failed requests, by cause.", ("agent", "cause"))
+in_flight = Gauge("a2a_in_flight_requests", "Requests currently being handled.", ("agent",))
+
+_metrics = [stage_seconds, requests_total, errors_total, in_flight]
+
+# Functions rendering extra metric lines on every scrape
+_collectors: list[Callable[[], Iterable[str]]] = []
+
+# Agent name -> its executor's SingleFlight
+_single_flights: dict[str, SingleFlight] = {}
+
+
+def add_collector(collector: Callable[[], Iterable[str]]) -> None:
+    _collectors.append(collector)
+
+
+def register(metric):
+    """Adds a Counter, Gauge or Histogram to what /metrics serves."""
+    if metric not in _metrics:
+        _metrics.append(metric)
+    return metric
+
+
+def gauge_lines(name: str, help: str, labelnames: tuple[str, ...], values: dict[tuple, float]) -> Iterable[str]:
+    """Renders a gauge computed at scrape time."""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} gauge"
+    for labels, value in values.items():
+        yield f"{name}{_labels(labelnames, labels)} {value:g}"
+
+
+class _StageTimer:
+    __slots__ = ("labels", "started")
+
+    def __init__(self, labels: tuple):
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if _recording.get():
+            stage_seconds.observe(self.labels, time.perf_counter() - self.started)
+
+
+class _RequestScope:
+    """Counts one request in flight and records its outcome, total time and error cause."""
+    __slots__ = ("agent", "cause", "started", "record", "_token")
+
+    def __init__(self, agent: str, record: bool = True):
+        self.agent = agent
+        self.cause: Optional[str] = None
+        self.record = record
+
+    def fail(self, cause: str) -> None:
+        """Names the cause of a failure about to be raised (default: the exception type)."""
+        self.cause = cause
+
+    def __enter__(self):
+        if not self.record:
+            self._token = _recording.set(False)
+            return self
+        in_flight.inc((self.agent,))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.record:
+            _recording.reset(self._token)
+            return
+        in_flight.dec((self.agent,))
+        stage_seconds.observe((self.agent, "total"), time.perf_counter() - self.started)
+        cause = self.cause or (exc_type.__name__ if exc_type else None)
+        if cause:
+            errors_total.inc((self.agent, cause))
+        requests_total.inc((self.agent, "error" if cause else "ok"))
+
+
+class AgentMetrics:
+    """
+    The metrics handle of one agent.
+
+        metrics = AgentMetrics("sentiment")
+        with metrics.request() as request:
+            with metrics.stage("session"):
+                ...
+            request.fail("schema")
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+
+    def request(self, record: bool = True) -> _RequestScope:
+        """A request's scope; with record=False, neither it nor its stages are recorded."""
+        return _RequestScope(self.agent, record)
+
+    def stage(self, name: str) -> _StageTimer:
+        return _StageTimer((self.agent, name))
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if _recording.get():
+            stage_seconds.observe((self.agent, stage), seconds)
+
+    def track_single_flight(self, single_flight: SingleFlight) -> None:
+        """Exports a SingleFlight's executed/coalesced/in-flight counts for this agent."""
+        _single_flights[self.agent] = single_flight
+
+
+def _process_metrics() -> Iterable[str]:
+    yield from gauge_lines("a2a_worker_info", "The worker serving this scrape.", ("pid",), {(os.getpid(),): 1})
+    yield from gauge_lines(
+        "a2a_single_flight", "Single-flight computations (executed, coalesced, in_flight).", ("agent", "kind"),
+        {(agent, kind): value for agent, flight in _single_flights.items() for kind, value in flight.stats().items()},
+    )
+
+    from my_a2a.llm.json_repair import parse_stats
+    from my_a2a.llm.model import completion_stats
+
+    yield from gauge_lines(
+        "a2a_json_parse", "How LLM JSON output was parsed (strict, repaired, failed, invalid).",
+        ("result",), {(result,): value for result, value in parse_stats.as_dict().items()},
+    )
+    yield from gauge_lines(
+        "a2a_llm_completions", "LLM calls and retries made through llm_complete.",
+        ("kind",), {("calls",): completion_stats.llm_calls, ("retries",): completion_stats.retries},
+    )
+
+    # Only report routing once it is in use; importing it here would pull in ADK
+    routing = sys.modules.get("my_a2a.llm.routing")
+    if routing is None:
+        return
+    report = routing.routing_report()
+    for field, help in (
+        ("calls", "Model tier calls."),
+        ("accepted", "Model tier outputs accepted."),
+        ("escalated", "Model tier outputs escalated to the next tier."),
+        ("errors", "Model tier calls that failed."),
+        ("input_tokens", "Model tier input tokens."),
+        ("output_tokens", "Model tier output tokens."),
+        ("cost_usd", "Estimated model tier cost in USD."),
+    ):
+        yield from gauge_lines(
+            f"a2a_model_tier_{field}", help, ("agent", "tier"),
+            {(agent, tier): stats[field] for agent, tiers in report.items() for tier, stats in tiers.items()},
+        )
+
+
+add_collector(_process_metrics)
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+def route() -> Route:
+    return Route(METRICS_PATH, metrics_endpoint, methods=["GET"])
@@ -0,0 +1,247 @@
+# On-demand profiling for live agent servers. Off by default; with
+#   A2A_PROFILER=1 A2A_ADMIN_TOKEN=<secret>
+# each server gets, behind the admin token (see admin.py):
+#
+#   POST /admin/profile?seconds=10&interval_ms=5
+#       samples the event loop thread's stack for a time window
+#   any request with "X-A2A-Profile: 1" (and the admin token)
+#       samples only while that request's own tasks are running on the loop
+#   GET /admin/profile/blocked
+#       stacks caught while the loop was blocked for longer than
+#       A2A_LOOP_BLOCK_MS (default 100), e.g. by a synchronous parse or print
+#
+# Profiles are collapsed stacks ("frame;frame;frame count" per line), readable
+# by flamegraph.pl, speedscope and inferno, and are also written to
+# A2A_PROFILE_DIR (default: profiles/). Event loop lag is exported on /metrics
+# as a2a_event_loop_lag_seconds.
+#
+# When disabled nothing is installed: no middleware, no routes, no threads.
+import asyncio
+import contextvars
+import itertools
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import Callable, Optional
+
+from starlette.applications import Starlette
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.admin import admin_route, admin_token, is_admin
+from my_a2a.multi_a2a.common.log import get_logger
+
+PROFILE_HEADER = "x-a2a-profile"
+
+logger = get_logger(__name__)
+
+loop_lag = metrics.Histogram(
+    "a2a_event_loop_lag_seconds", "How late the event loop ran a timer scheduled for now.", ()
+)
+
+
+def collapse(frame) -> str:
+    """Renders a stack as one collapsed-stack line, outermost frame first."""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def render_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+
+class StackSampler(threading.Thread):
+    """
+    Samples one thread's stack every `interval` seconds from a background thread.
+
+    `sink(frame)` returns the Counter a sample belongs to, or None to skip it.
+    """
+
+    def __init__(self, thread_id: int, interval: float, sink: Callable[[object], Optional[Counter]]):
+        super().__init__(name="a2a-stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.sink = sink
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            counts = self.sink(frame) if frame is not None else None
+            if counts is not None:
+                counts[collapse(frame)] += 1
+
+    def stop(self):
+        self.stopped.set()
+
+
+class Profiler:
+    def __init__(self):
+        self.directory = os.getenv("A2A_PROFILE_DIR", "profiles")
+        self.interval = float(os.getenv("A2A_PROFILE_INTERVAL_MS", "5")) / 1000
+        self.block_threshold = float(os.getenv("A2A_LOOP_BLOCK_MS", "100")) / 1000
+        self.blocked: Counter = Counter()
+        self.stalls = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: Optional[int] = None
+        self.heartbeat = time.perf_counter()
+        # Tasks of header-profiled requests -> their request's sample counts
+        self.profiled_tasks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self.request_sampler: Optional[StackSampler] = None
+        self.active_requests = 0
+        self.current_profile: contextvars.ContextVar[Optional[Counter]] = contextvars.ContextVar(
+            "a2a_profile", default=None
+        )
+        self.sequence = itertools.count()
+
+    # Called from inside the server's event loop, at startup (or on the first request)
+    def attach(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+
+        # Tasks created by a profiled request inherit its profile
+        previous_factory = self.loop.get_task_factory()
+
+        def task_factory(loop, coro, **kwargs):
+            task = previous_factory(loop, coro, **kwargs) if previous_factory else asyncio.Task(coro, loop=loop, **kwargs)
+            counts = self.current_profile.get()
+            if counts is not None:
+                self.profiled_tasks[task] = counts
+            return task
+
+        self.loop.set_task_factory(task_factory)
+        self.loop.create_task(self.beat())
+        threading.Thread(target=self.watch, name="a2a-loop-watchdog", daemon=True).start()
+
+    async def beat(self) -> None:
+        """Measures loop lag and proves the loop is alive to the watchdog."""
+        interval = self.block_threshold / 2
+        while True:
+            self.heartbeat = time.perf_counter()
+            await asyncio.sleep(interval)
+            loop_lag.observe((), max(0.0, time.perf_counter() - self.heartbeat - interval))
+
+    def watch(self) -> None:
+        """Watchdog thread: samples the loop thread's stack while the loop is blocked."""
+        stalled_since = None
+        while True:
+            time.sleep(self.block_threshold / 4)
+            blocked_for = time.perf_counter() - self.heartbeat - self.block_threshold / 2
+            if blocked_for < self.block_threshold:
+                if stalled_since is not None:
+                    logger.warning("Event loop was blocked for %.0f ms", (time.perf_counter() - stalled_since) * 1000)
+                    stalled_since = None
+                continue
+            frame = sys._current_frames().get(self.loop_thread)
+            if frame is None:
+                continue
+            if stalled_since is None:
+                stalled_since = time.perf_counter() - blocked_for
+                self.stalls += 1
+            self.blocked[collapse(frame)] += 1
+
+    def save(self, kind: str, counts: Counter) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(
+            self.directory, f"{kind}-{os.getpid()}-{int(time.time())}-{next(self.sequence)}.collapsed"
+        )
+        with open(path, "w") as f:
+            f.write(render_collapsed(counts))
+        return path
+
+    def request_sample(self, frame) -> Optional[Counter]:
+        # The task running on the loop right now, if it belongs to a profiled request
+        try:
+            task = asyncio.current_task(self.loop)
+        except RuntimeError:
+            return None
+        return self.profiled_tasks.get(task) if task is not None else None
+
+    async def profile_window(self, request: Request) -> PlainTextResponse:
+        seconds = min(float(request.query_params.get("seconds", "10")), 300.0)
+        interval = float(request.query_params.get("interval_ms", self.interval * 1000)) / 1000
+        counts = Counter()
+        sampler = StackSampler(self.loop_thread, interval, lambda frame: counts)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+        path = self.save("window", counts)
+        return PlainTextResponse(render_collapsed(counts), headers={"X-A2A-Profile-File": path})
+
+    async def blocked_report(self, request: Request) -> PlainTextResponse | JSONResponse:
+        if request.query_params.get("format") == "json":
+            return JSONResponse({
+                "stalls": self.stalls,
+                "threshold_ms": self.block_threshold * 1000,
+                "top": [{"stack": stack, "samples": count} for stack, count in self.blocked.most_common(20)],
+            })
+        return PlainTextResponse(render_collapsed(self.blocked))
+
+    async def profile_request(self, app, scope, receive, send) -> None:
+        counts = Counter()
+        self.profiled_tasks[asyncio.current_task()] = counts
+        token = self.current_profile.set(counts)
+        self.active_requests += 1
+        if self.request_sampler is None:
+            self.request_sampler = StackSampler(self.loop_thread, self.interval, self.request_sample)
+            self.request_sampler.start()
+        try:
+            await app(scope, receive, send)
+        finally:
+            self.current_profile.reset(token)
+            self.profiled_tasks.pop(asyncio.current_task(), None)
+            self.active_requests -= 1
+            if not self.active_requests:
+                self.request_sampler.stop()
+                self.request_sampler = None
+            path = self.save("request", counts)
+            logger.warning("Profiled %s %s (%d samples): %s", scope["method"], scope["path"], sum(counts.values()), path)
+
+
+class ProfilerMiddleware:
+    """Attaches the profiler to the loop and profiles requests that ask for it."""
+
+    def __init__(self, app, profiler: Profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if self.profiler.loop is None:
+            self.profiler.attach()
+        if scope["type"] == "http":
+            headers = Headers(scope=scope)
+            if headers.get(PROFILE_HEADER) and is_admin(headers):
+                return await self.profiler.profile_request(self.app, scope, receive, send)
+        return await self.app(scope, receive, send)
+
+
+def install(app: Starlette) -> Starlette:
+    """
+    Adds the profiling routes and middleware to an app when A2A_PROFILER=1 and
+    an admin token is configured; otherwise returns the app untouched.
+    """
+    if os.getenv("A2A_PROFILER") != "1":
+        return app
+    if admin_token() is None:
+        logger.warning("A2A_PROFILER=1 is ignored: set A2A_ADMIN_TOKEN to protect the profiling routes")
+        return app
+
+    profiler = Profiler()
+    metrics.register(loop_lag)
+    app.router.routes.extend([
+        admin_route("/profile", profiler.profile_window, methods=["POST"]),
+        admin_route("/profile/blocked", profiler.blocked_report, methods=["GET"]),
+    ])
+    app.add_middleware(ProfilerMiddleware, profiler=profiler)
+    return app
@@ -0,0 +1,349 @@
+# A2A push notifications for long-running tasks.
+# Instead of holding a request open for the whole life of a task, a client can
+# submit it non-blocking with a PushNotificationConfig (a webhook URL and a
+# token): the agent answers at once with the task, and POSTs the task to the
+# webhook as it progresses.
+#
+# Server side, WebhookDispatcher is the agents' push sender. Notifications are
+# queued and delivered by a few workers, so a slow webhook never holds up the
+# agent. Pending notifications are coalesced per task (only its latest state is
+# sent) and bounded; when the queue is full, progress updates are dropped but
+# final states wait for room. Failed deliveries are retried with backoff.
+#
+#   A2A_PUSH_WORKERS=4          concurrent deliveries per agent
+#   A2A_PUSH_MAX_PENDING=1000   tasks with a notification waiting at most
+#   A2A_PUSH_RETRIES=4          retries of a failed delivery (connection error, 429, 5xx)
+#   A2A_PUSH_TIMEOUT=10         seconds per delivery attempt
+#   A2A_PUSH_ALLOWED_HOSTS=     comma-separated webhook hosts to allow (unset: any public host)
+#
+# Webhook URLs come from the caller, so they are checked when a config is set
+# and again before each delivery: only http(s), and, unless the host is listed
+# in A2A_PUSH_ALLOWED_HOSTS, no loopback, link-local (cloud metadata), private
+# or otherwise non-public address. Local setups with the default receiver need
+# A2A_PUSH_ALLOWED_HOSTS=127.0.0.1,localhost.
+#
+# Client side, WebhookReceiver is a small local HTTP server resolving one
+# future per submitted task; Client.send_message_payload uses it for agents
+# advertising push notifications when A2A_PUSH_RECEIVER is set:
+#
+#   A2A_PUSH_RECEIVER=127.0.0.1:9100        where the receiver listens (port 0: any free port)
+#   A2A_PUSH_RECEIVER_URL=http://host:9100/ the URL agents post to, if not the listening address
+#   A2A_PUSH_WAIT=300                       seconds to wait for a final state before asking the agent
+#
+# Deliveries are counted in a2a_push_notifications_total.
+import asyncio
+import ipaddress
+import os
+import socket
+import uuid
+from collections import OrderedDict
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+import uvicorn
+from a2a.server.tasks import InMemoryPushNotificationConfigStore, PushNotificationSender
+from a2a.types import InvalidParamsError, PushNotificationConfig, Task, TaskState
+from a2a.utils.errors import ServerError
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.log import get_logger
+
+TOKEN_HEADER = "X-A2A-Notification-Token"
+
+WEBHOOK_PATH = "/a2a/push"
+
+# States after which a task sends no further notifications
+FINAL_STATES = {
+    TaskState.completed,
+    TaskState.failed,
+    TaskState.canceled,
+    TaskState.rejected,
+    TaskState.unknown,
+}
+
+# States a submitted task is waited for until: final, or waiting on the caller
+SETTLED_STATES = FINAL_STATES | {TaskState.input_required, TaskState.auth_required}
+
+logger = get_logger(__name__)
+
+push_notifications_total = metrics.register(metrics.Counter(
+    "a2a_push_notifications_total",
+    "Push notifications, by outcome (delivered, retried, failed, dropped, coalesced, blocked).",
+    ("agent", "outcome"),
+))
+
+# Agent name -> its dispatcher, for the pending gauge
+_dispatchers: dict[str, "WebhookDispatcher"] = {}
+
+
+def allowed_hosts() -> set[str]:
+    """Webhook hosts allowed whatever they resolve to, from A2A_PUSH_ALLOWED_HOSTS."""
+    return {host.strip().lower() for host in os.getenv("A2A_PUSH_ALLOWED_HOSTS", "").split(",") if host.strip()}
+
+
+async def check_webhook_url(url: str) -> None:
+    """
+    Checks that a caller-supplied webhook URL is safe to post to.
+
+    Raises:
+        ValueError: If it is not http(s), or is not in A2A_PUSH_ALLOWED_HOSTS
+            (when set), or resolves to a non-public address.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if parts.scheme not in ("http", "https") or not host:
+        raise ValueError(f"Webhook URL {url!r} is not an http(s) URL")
+    allowed = allowed_hosts()
+    if allowed:
+        if host not in allowed:
+            raise ValueError(f"Webhook host {host!r} is not in A2A_PUSH_ALLOWED_HOSTS")
+        return
+    try:
+        addresses = {ipaddress.ip_address(host)}
+    except ValueError:
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, parts.port or 0, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            raise ValueError(f"Webhook host {host!r} does not resolve: {e}") from e
+        # Scope ids ("fe80::1%eth0") are not part of the address
+        addresses = {ipaddress.ip_address(info[4][0].split("%")[0]) for info in infos}
+    for address in addresses:
+        if not address.is_global:
+            raise ValueError(
+                f"Webhook host {host!r} resolves to non-public address {address}; "
+                "list it in A2A_PUSH_ALLOWED_HOSTS to allow it"
+            )
+
+
+class WebhookConfigStore(InMemoryPushNotificationConfigStore):
+    """An in-memory push config store rejecting webhook URLs check_webhook_url() refuses."""
+
+    async def set_info(self, task_id: str, notification_config: PushNotificationConfig) -> None:
+        try:
+            await check_webhook_url(notification_config.url)
+        except ValueError as e:
+            raise ServerError(error=InvalidParamsError(message=str(e))) from e
+        await super().set_info(task_id, notification_config)
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+class WebhookDispatcher(PushNotificationSender):
+    """
+    A push sender delivering task notifications in the background, coalesced
+    per task, bounded and retried.
+
+    Pass it as the request handler's `push_sender`, with `config_store` as its
+    `push_config_store`. Workers start with the first notification.
+    """
+
+    def __init__(
+        self,
+        agent: str,
+        httpx_client: Optional[httpx.AsyncClient] = None,
+        workers: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        retries: Optional[int] = None,
+    ):
+        self.agent = agent
+        self.config_store = WebhookConfigStore()
+        self.httpx_client = httpx_client or httpx.AsyncClient(
+            timeout=float(os.getenv("A2A_PUSH_TIMEOUT", "10"))
+        )
+        self.workers = workers or int(os.getenv("A2A_PUSH_WORKERS", "4"))
+        self.max_pending = max_pending or int(os.getenv("A2A_PUSH_MAX_PENDING", "1000"))
+        self.retries = int(os.getenv("A2A_PUSH_RETRIES", "4")) if retries is None else retries
+        # Task id -> latest state not yet picked up by a worker
+        self.pending: OrderedDict[str, Task] = OrderedDict()
+        # Tasks a worker is delivering: a newer state waits until it is done
+        self.delivering: set[str] = set()
+        self._queue: Optional[asyncio.Queue] = None
+        self._room: Optional[asyncio.Condition] = None
+        self._tasks: list[asyncio.Task] = []
+        _dispatchers[agent] = self
+
+    def _start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._room = asyncio.Condition()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def send_notification(self, task: Task) -> None:
+        if self._queue is None:
+            self._start()
+        if task.id in self.pending:
+            self.pending[task.id] = task
+            push_notifications_total.inc((self.agent, "coalesced"))
+            return
+        if len(self.pending) >= self.max_pending:
+            if task.status.state not in FINAL_STATES:
+                push_notifications_total.inc((self.agent, "dropped"))
+                return
+            async with self._room:
+                await self._room.wait_for(lambda: len(self.pending) < self.max_pending)
+        self.pending[task.id] = task
+        if task.id not in self.delivering:
+            self._queue.put_nowait(task.id)
+
+    async def _work(self) -> None:
+        while True:
+            task_id = await self._queue.get()
+            task = self.pending.pop(task_id, None)
+            if task is None:
+                continue
+            self.delivering.add(task_id)
+            async with self._room:
+                self._room.notify()
+            try:
+                await self.deliver(task)
+            except Exception:
+                logger.exception("Push notification for task %s failed", task_id)
+            finally:
+                self.delivering.discard(task_id)
+            # A newer state arrived while this one was being delivered
+            if task_id in self.pending:
+                self._queue.put_nowait(task_id)
+
+    async def deliver(self, task: Task) -> None:
+        """Posts the task to each of its webhooks, retrying failures with backoff."""
+        # The handler updates the task in place: take its state before yielding
+        payload = task.model_dump(mode="json", exclude_none=True)
+        final = task.status.state in FINAL_STATES
+        configs = await self.config_store.get_info(task.id)
+        if not configs:
+            return
+        for config in configs:
+            # Checked again here: the host may resolve differently by now
+            try:
+                await check_webhook_url(config.url)
+            except ValueError as e:
+                push_notifications_total.inc((self.agent, "blocked"))
+                logger.warning("Push notification for task %s not sent: %s", task.id, e)
+                continue
+            headers = {TOKEN_HEADER: config.token} if config.token else None
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.httpx_client.post(config.url, json=payload, headers=headers)
+                    response.raise_for_status()
+                    push_notifications_total.inc((self.agent, "delivered"))
+                    break
+                except Exception as e:
+                    if attempt == self.retries or not _retryable(e):
+                        push_notifications_total.inc((self.agent, "failed"))
+                        logger.warning("Push notification for task %s to %s failed: %s", task.id, config.url, e)
+                        break
+                    push_notifications_total.inc((self.agent, "retried"))
+                    await asyncio.sleep(min(0.5 * 2 ** attempt, 10))
+        if final:
+            for config in configs:
+                await self.config_store.delete_info(task.id, config.id)
+
+    async def close(self) -> None:
+        """Stops the workers (pending notifications are lost) and closes the HTTP client."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        await self.httpx_client.aclose()
+
+
+async def close_dispatchers() -> None:
+    """Closes every dispatcher in this process; called on app shutdown."""
+    for dispatcher in list(_dispatchers.values()):
+        await dispatcher.close()
+
+
+def _pending_metric():
+    return metrics.gauge_lines(
+        "a2a_push_notifications_pending",
+        "Tasks with a push notification waiting for delivery.",
+        ("agent",),
+        {(agent,): len(dispatcher.pending) for agent, dispatcher in _dispatchers.items()},
+    )
+
+
+metrics.add_collector(_pending_metric)
+
+
+class WebhookReceiver:
+    """
+    A local webhook resolving a future per submitted task with the task's
+    first settled state (final, or waiting on the caller).
+
+    `expect()` returns a push config with a fresh token and the future it
+    resolves; notifications with an unknown token are rejected.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, public_url: Optional[str] = None):
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self.url: Optional[str] = None
+        # Token -> future of the task it was issued for
+        self.waiting: dict[str, asyncio.Future] = {}
+        self._server: Optional[uvicorn.Server] = None
+        self._serving: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._server is not None:
+                return
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            sock.bind((self.host, self.port))
+            self.port = sock.getsockname()[1]
+            self.url = (self.public_url or f"http://{self.host}:{self.port}").rstrip("/") + WEBHOOK_PATH
+            app = Starlette(routes=[Route(WEBHOOK_PATH, self.endpoint, methods=["POST"])])
+            self._server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="off"))
+            self._serving = asyncio.create_task(self._server.serve(sockets=[sock]))
+            while not self._server.started:
+                if self._serving.done():
+                    raise RuntimeError(f"Push receiver failed to start on {self.host}:{self.port}")
+                await asyncio.sleep(0.01)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            await self._serving
+            self._server = None
+
+    async def expect(self) -> tuple[PushNotificationConfig, asyncio.Future]:
+        """A push config to submit a task with, and the future its settled state resolves."""
+        await self.start()
+        token = uuid.uuid4().hex
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[token] = future
+        future.add_done_callback(lambda _: self.waiting.pop(token, None))
+        return PushNotificationConfig(url=self.url, token=token), future
+
+    async def endpoint(self, request: Request) -> Response:
+        future = self.waiting.get(request.headers.get(TOKEN_HEADER, ""))
+        if future is None:
+            return Response(status_code=404)
+        task = Task.model_validate(await request.json())
+        if task.status.state in SETTLED_STATES and not future.done():
+            future.set_result(task)
+        return Response(status_code=204)
+
+
+def receiver_from_env() -> Optional[WebhookReceiver]:
+    """The Client's receiver when A2A_PUSH_RECEIVER is set, else None."""
+    address = os.getenv("A2A_PUSH_RECEIVER")
+    if not address:
+        return None
+    host, _, port = address.rpartition(":")
+    return WebhookReceiver(host or "127.0.0.1", int(port or 0), os.getenv("A2A_PUSH_RECEIVER_URL"))
+
+
+def wait_timeout() -> float:
+    return float(os.getenv("A2A_PUSH_WAIT", "300"))
@@ -0,0 +1,304 @@
+# Production server runtime for the A2A agents.
+# With one worker this is a tuned uvicorn.Server. With several, the parent
+# imports the agent modules and builds the app, binds the listening socket,
+# then pre-forks the workers: imported code, compiled graphs and any local
+# model weights are shared copy-on-write, and the kernel spreads accepted
+# connections across the workers. Workers that die are replaced; one that
+# dies before it is ready is restarted with exponential backoff, and the
+# server gives up after A2A_MAX_STARTUP_FAILURES such failures in a row.
+# SIGTERM or SIGINT drains every worker gracefully.
+#
+# Settings come from the environment (see ServerSettings.from_env):
+#   A2A_WORKERS=4 A2A_STATELESS=1 A2A_BACKLOG=4096 A2A_KEEP_ALIVE=15 python -m my_a2a.multi_a2a.sentiment_agent.main
+#
+# Every worker keeps its own in-memory state: the task store, idempotency
+# results, push notification configs and single-flight calls. The kernel
+# hands each connection to any worker, so a follow-up request about a task
+# (tasks/get, tasks/cancel, resubscribe, the push client's get_task fallback,
+# an idempotent retry) may reach a worker that never saw it. A2A_WORKERS>1 is
+# therefore only honored with A2A_STATELESS=1, which declares that callers
+# only make self-contained blocking message/send requests; otherwise the
+# server runs one worker.
+#
+# Co-located agents can also listen on a Unix domain socket, skipping the TCP
+# loopback stack; clients reach them through unix:// registry entries (see uds.py):
+#   A2A_UDS_DIR=/run/a2a        also serve on /run/a2a/<server name>.sock
+#   A2A_UDS_ONLY=1              ... and not on TCP at all
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import uvicorn
+
+from my_a2a.multi_a2a.common.log import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class ServerSettings:
+    """Socket, worker and HTTP settings for one agent server."""
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 1
+    backlog: int = 2048
+    keep_alive: int = 5             # seconds an idle keep-alive connection stays open
+    graceful_timeout: int = 30      # seconds in-flight requests get to finish on shutdown
+    limit_concurrency: Optional[int] = None  # per worker; excess requests get 503
+    # "auto" picks uvloop and httptools when they are installed
+    loop: str = "auto"
+    http: str = "auto"
+    uds: Optional[str] = None       # Unix domain socket path, served next to TCP
+    tcp: bool = True
+    # Callers need no task state across requests, so several workers are safe
+    stateless: bool = False
+    max_startup_failures: int = 5   # workers dying before ready, in a row, before giving up
+
+    @classmethod
+    def from_env(cls, port: int, host: str = "0.0.0.0", name: Optional[str] = None) -> "ServerSettings":
+        """
+        Args:
+            port: Default TCP port (A2A_PORT overrides it).
+            host: Default bind address (A2A_HOST overrides it).
+            name: Server name, naming its socket in A2A_UDS_DIR.
+        """
+        def env_int(name, default):
+            value = os.getenv(name)
+            return int(value) if value else default
+
+        uds = uds_path(name) if name else None
+        return cls(
+            host=os.getenv("A2A_HOST", host),
+            port=env_int("A2A_PORT", port),
+            workers=env_int("A2A_WORKERS", 1),
+            backlog=env_int("A2A_BACKLOG", cls.backlog),
+            keep_alive=env_int("A2A_KEEP_ALIVE", cls.keep_alive),
+            graceful_timeout=env_int("A2A_GRACEFUL_TIMEOUT", cls.graceful_timeout),
+            limit_concurrency=env_int("A2A_LIMIT_CONCURRENCY", None),
+            loop=os.getenv("A2A_LOOP", cls.loop),
+            http=os.getenv("A2A_HTTP", cls.http),
+            uds=uds,
+            tcp=not (uds and os.getenv("A2A_UDS_ONLY") == "1"),
+            stateless=os.getenv("A2A_STATELESS") == "1",
+            max_startup_failures=env_int("A2A_MAX_STARTUP_FAILURES", cls.max_startup_failures),
+        )
+
+    def describe(self) -> str:
+        listeners = [f"{self.host}:{self.port}"] if self.tcp else []
+        if self.uds:
+            listeners.append(f"unix:{self.uds}")
+        return ", ".join(listeners)
+
+    def uvicorn_config(self, app) -> uvicorn.Config:
+        return uvicorn.Config(
+            app,
+            host=self.host,
+            port=self.port,
+            loop=self.loop,
+            http=self.http,
+            backlog=self.backlog,
+            timeout_keep_alive=self.keep_alive,
+            timeout_graceful_shutdown=self.graceful_timeout,
+            limit_concurrency=self.limit_concurrency,
+        )
+
+
+def uds_path(name: str) -> Optional[str]:
+    """Where the server called `name` listens in A2A_UDS_DIR, if set."""
+    directory = os.getenv("A2A_UDS_DIR")
+    return os.path.join(directory, f"{name}.sock") if directory else None
+
+
+class _WorkerServer(uvicorn.Server):
+    """uvicorn.Server that tells the parent when it is accepting connections."""
+
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets=sockets)
+        if self.started:
+            os.write(self.ready_fd, f"{os.getpid()}\n".encode())
+
+
+def _bind_unix(path: str, backlog: int) -> socket.socket:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # A socket file left by a server that did not shut down cleanly
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _bind(settings: ServerSettings) -> list[socket.socket]:
+    sockets = []
+    if settings.tcp:
+        family = socket.AF_INET6 if ":" in settings.host else socket.AF_INET
+        # IPPROTO_TCP explicitly: asyncio only sets TCP_NODELAY on connections
+        # accepted from such sockets, and without it small responses wait on
+        # delayed ACKs (~40 ms per request)
+        sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((settings.host, settings.port))
+        sock.listen(settings.backlog)
+        sock.set_inheritable(True)
+        sockets.append(sock)
+    if settings.uds:
+        sockets.append(_bind_unix(settings.uds, settings.backlog))
+    return sockets
+
+
+def _close(settings: ServerSettings, sockets: list[socket.socket]) -> None:
+    for sock in sockets:
+        sock.close()
+    if settings.uds and os.path.exists(settings.uds):
+        os.unlink(settings.uds)
+
+
+def _spawn(app, settings: ServerSettings, sockets: list[socket.socket], ready_fd: int) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Worker: drop the parent's signal handlers, uvicorn installs its own
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        _WorkerServer(settings.uvicorn_config(app), ready_fd).run(sockets=sockets)
+    except BaseException:
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def _restart_delay(failures: int) -> float:
+    """Seconds before replacing a worker, after `failures` in a row died before becoming ready."""
+    return min(0.5 * 2 ** (failures - 1), 30.0) if failures else 0.0
+
+
+def _supervise(app, settings: ServerSettings) -> None:
+    sockets = _bind(settings)
+    ready_read, ready_write = os.pipe()
+    os.set_blocking(ready_read, False)
+
+    # Objects created during import are never freed; keep the collector from
+    # touching (and so un-sharing) their pages in the workers
+    gc.collect()
+    gc.freeze()
+
+    workers = {_spawn(app, settings, sockets, ready_write) for _ in range(settings.workers)}
+    logger.info("Started %d workers on %s: %s", len(workers), settings.describe(), sorted(workers))
+
+    stopping = False
+    failed = False
+    # Workers in a row that died before becoming ready
+    startup_failures = 0
+    # When each pending replacement worker is due
+    restarts: list[float] = []
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    ready = set()
+    buffer = b""
+    while (workers or restarts) and not stopping:
+        try:
+            buffer += os.read(ready_read, 4096)
+        except BlockingIOError:
+            pass
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            ready.add(int(line))
+            startup_failures = 0
+            logger.info("Worker %d ready (%d/%d)", int(line), len(ready & workers), settings.workers)
+
+        now = time.monotonic()
+        while restarts and restarts[0] <= now and not stopping:
+            restarts.pop(0)
+            workers.add(_spawn(app, settings, sockets, ready_write))
+
+        pid, status = os.waitpid(-1, os.WNOHANG) if workers else (0, 0)
+        if pid:
+            workers.discard(pid)
+            code = os.waitstatus_to_exitcode(status)
+            if pid in ready:
+                ready.discard(pid)
+                logger.warning("Worker %d exited with status %d, restarting", pid, code)
+                restarts.append(now)
+                continue
+            startup_failures += 1
+            if startup_failures >= settings.max_startup_failures:
+                logger.error("Worker %d exited with status %d before it was ready; "
+                             "%d startup failures in a row, giving up", pid, code, startup_failures)
+                stopping = failed = True
+                break
+            delay = _restart_delay(startup_failures)
+            logger.warning("Worker %d exited with status %d before it was ready, restarting in %.1fs", pid, code, delay)
+            restarts.append(now + delay)
+            restarts.sort()
+        else:
+            time.sleep(0.1)
+
+    # Graceful drain: uvicorn stops accepting and finishes in-flight requests
+    logger.info("Draining %d workers (up to %ds)", len(workers), settings.graceful_timeout)
+    for pid in workers:
+        os.kill(pid, signal.SIGTERM)
+    deadline = time.monotonic() + settings.graceful_timeout + 5
+    while workers and time.monotonic() < deadline:
+        pid, _ = os.waitpid(-1, os.WNOHANG)
+        if pid:
+            workers.discard(pid)
+        else:
+            time.sleep(0.1)
+    for pid in workers:
+        os.kill(pid, signal.SIGKILL)
+    _close(settings, sockets)
+    if failed:
+        sys.exit(1)
+
+
+def serve(app, settings: ServerSettings) -> None:
+    """
+    Runs an ASGI app with the given settings.
+
+    Args:
+        app: The ASGI application, built before any worker is forked.
+        settings: Socket, worker and HTTP settings; several workers need `stateless`.
+    """
+    if settings.workers > 1 and not settings.stateless:
+        logger.warning(
+            "Serving one worker, not %d: task state lives in each worker, so tasks/get, tasks/cancel, "
+            "push notifications and idempotent retries need a single one "
+            "(set A2A_STATELESS=1 if callers only make blocking message/send requests)",
+            settings.workers,
+        )
+        settings.workers = 1
+    if settings.workers <= 1:
+        if not settings.uds:
+            uvicorn.Server(settings.uvicorn_config(app)).run()
+            return
+        sockets = _bind(settings)
+        logger.info("Serving on %s", settings.describe())
+        try:
+            uvicorn.Server(settings.uvicorn_config(app)).run(sockets=sockets)
+        finally:
+            _close(settings, sockets)
+        return
+    if not hasattr(os, "fork"):
+        sys.exit("Multiple workers need os.fork(); run with A2A_WORKERS=1 on this platform")
+    _supervise(app, settings)
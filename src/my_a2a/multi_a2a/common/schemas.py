@@ -0,0 +1,169 @@
+# Typed result schemas shared by the NLP sub-agents and the orchestrating client.
+# Sub-agents validate their output against these models and ship it as a native
+# A2A DataPart, so nothing downstream has to re-parse JSON out of text.
+from typing import Literal, List, Optional, Type
+
+from pydantic import BaseModel, Field
+from a2a.types import DataPart, Message, Part, Task
+
+
+class GreetingResult(BaseModel):
+    """Reply produced by the greeting agent."""
+    greeting: str
+
+
+class SentimentResult(BaseModel):
+    """Overall sentiment label for a piece of text."""
+    sentiment: Literal["POS", "NEG", "NEU"]
+    # Self-reported by the model; low values escalate to a larger model tier
+    confidence: Optional[float] = Field(default=None, ge=0, le=1)
+
+
+class SegmentSentiment(BaseModel):
+    """Sentiment of one chunk of a long document, with its character span."""
+    index: int
+    start: int
+    end: int
+    sentiment: Literal["POS", "NEG", "NEU"]
+
+
+class DocumentSentimentResult(BaseModel):
+    """Overall sentiment of a long document plus its per-segment breakdown."""
+    sentiment: Literal["POS", "NEG", "NEU"]
+    segments: List[SegmentSentiment]
+
+
+class PosTag(BaseModel):
+    """A single word and its part-of-speech tag."""
+    word: str
+    tag: str
+
+
+class PosTagResult(BaseModel):
+    """Part-of-speech tags for every word of the input text, in order."""
+    tags: List[PosTag]
+
+
+class SentimentBatchItem(BaseModel):
+    """One item of a batch sentiment request: its result, or why it failed."""
+    index: int
+    result: Optional[SentimentResult] = None
+    error: Optional[str] = None
+
+
+class SentimentBatchResult(BaseModel):
+    """Results of a batch sentiment request, in request order."""
+    items: List[SentimentBatchItem]
+
+
+class PosTagBatchItem(BaseModel):
+    """One item of a batch POS tagging request: its result, or why it failed."""
+    index: int
+    result: Optional[PosTagResult] = None
+    error: Optional[str] = None
+
+
+class PosTagBatchResult(BaseModel):
+    """Results of a batch POS tagging request, in request order."""
+    items: List[PosTagBatchItem]
+
+
+# Packed prompts: one LLM call answers for several numbered batch items
+
+class IndexedSentiment(SentimentResult):
+    index: int
+
+
+class SentimentPack(BaseModel):
+    items: List[IndexedSentiment]
+
+
+class IndexedPosTags(PosTagResult):
+    index: int
+
+
+class PosTagPack(BaseModel):
+    items: List[IndexedPosTags]
+
+
+class PlanStep(BaseModel):
+    """One delegation in a plan: which agent to call and with what input."""
+    agent: str
+    input: str
+
+
+class Plan(BaseModel):
+    """Ordered list of delegations produced by the planner agent."""
+    steps: List[PlanStep] = Field(default_factory=list)
+
+
+# Registry of every declared schema, keyed by the name carried in DataPart metadata
+RESULT_SCHEMAS: dict[str, Type[BaseModel]] = {
+    schema.__name__: schema
+    for schema in (
+        GreetingResult,
+        SentimentResult,
+        SegmentSentiment,
+        DocumentSentimentResult,
+        PosTagResult,
+        SentimentBatchResult,
+        PosTagBatchResult,
+        Plan,
+    )
+}
+
+
+def to_data_part(result: BaseModel) -> Part:
+    """
+    Wraps a validated result into an A2A DataPart, tagging it with its schema name.
+
+    Args:
+        result: A pydantic model instance from RESULT_SCHEMAS.
+
+    Returns:
+        A Part holding the result as structured data.
+    """
+    return Part(root=DataPart(
+        data=result.model_dump(),
+        metadata={"schema": type(result).__name__},
+    ))
+
+
+def response_parts(response: Task | Message | None) -> List[Part]:
+    """
+    Returns the result parts of a final A2A response.
+
+    Args:
+        response: The final Task (parts come from its artifacts) or direct Message reply.
+
+    Returns:
+        The flat list of result parts, empty if there is no response.
+    """
+    if response is None:
+        return []
+    if isinstance(response, Task):
+        return [part for artifact in (response.artifacts or []) for part in artifact.parts]
+    return response.parts
+
+
+def extract_result(response: Task | Message | None) -> BaseModel | None:
+    """
+    Pulls the typed result out of the final response of an A2A call.
+
+    Looks at the task artifacts (or the parts of a direct Message reply) and
+    validates the first DataPart against the schema named in its metadata.
+
+    Args:
+        response: The final Task or Message received from a sub-agent.
+
+    Returns:
+        The validated pydantic model, or None if the response carries no DataPart.
+    """
+    for part in response_parts(response):
+        if isinstance(part.root, DataPart):
+            schema_name = (part.root.metadata or {}).get("schema")
+            schema = RESULT_SCHEMAS.get(schema_name)
+            if schema is None:
+                raise ValueError(f"Unknown result schema: {schema_name}")
+            return schema.model_validate(part.root.data)
+    return None
@@ -0,0 +1,246 @@
+# Semantic near-duplicate cache for the agents' LLM paths.
+# Inputs that differ only in case, punctuation, emoji or a word or two get the
+# answer already computed for an earlier input, instead of another LLM call.
+# Off by default; per agent, a cached answer is served when the cosine
+# similarity of the two inputs reaches that agent's threshold:
+#
+#   A2A_SEMANTIC_CACHE=1                                   default thresholds (sentiment only)
+#   A2A_SEMANTIC_CACHE='{"sentiment": 0.9, "greeting": 0.85}'  only the agents listed
+#   A2A_SEMANTIC_CACHE_SIZE=10000                          entries per agent (LRU)
+#
+# The greeting agent is not cached by default: greetings often carry a name,
+# and a near-duplicate hit would hand one person's personalized reply to
+# another. Opt in explicitly only where replies are not personalized
+# (python benchmarks/semantic_cache.py reports its false hits per threshold).
+#
+# Inputs are embedded locally, with no model: word, word-bigram and character
+# trigram features hashed into a fixed number of dimensions (the "hashing
+# trick"). Bigrams keep "not good" apart from "good". The vectors live in one
+# NumPy matrix, so a lookup, or a batch of them, is a single matrix product.
+# That scan takes milliseconds on a large cache, so the agents use the *_async
+# methods, which run it in a worker thread instead of on the event loop.
+# `python benchmarks/semantic_cache.py` measures lookup latency at 100k entries
+# and the false-hit rate per threshold. Needs numpy: pip install "adk_a2a_lab[semantic-cache]".
+import asyncio
+import importlib.util
+import json
+import os
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from typing import Any, Optional, Sequence
+
+from my_a2a.multi_a2a.common import metrics
+from my_a2a.multi_a2a.common.log import get_logger
+
+# Similarity at which each agent serves a cached answer. Sentiment flips on a
+# single word, so it needs a close match.
+DEFAULT_THRESHOLDS = {
+    "sentiment": 0.9,
+}
+
+DEFAULT_CAPACITY = 10000
+
+# Every lookup scans the whole matrix: 100 MB at 100k entries of 256 floats.
+# More dimensions cost scan time without improving accuracy on short texts.
+DEFAULT_DIMENSIONS = 256
+
+# Weight of each feature kind in the embedding
+_WORD_WEIGHT = 1.0
+_BIGRAM_WEIGHT = 1.0
+_TRIGRAM_WEIGHT = 0.4
+
+_WORD_PATTERN = re.compile(r"\w+(?:'\w+)?")
+
+logger = get_logger(__name__)
+
+semantic_cache_total = metrics.register(metrics.Counter(
+    "a2a_semantic_cache_total",
+    "Semantic cache lookups, by outcome.",
+    ("agent", "outcome"),
+))
+
+# Agent name -> its cache, for the entries gauge
+_caches: dict[str, "SemanticCache"] = {}
+
+
+def normalize_text(text: str) -> str:
+    """Case-folds and drops punctuation, symbols and emoji."""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("\u2019", "'")
+    return "".join(
+        " " if unicodedata.category(char)[0] in "PSZC" and char != "'" else char
+        for char in text
+    )
+
+
+def features(text: str) -> list[tuple[str, float]]:
+    """The weighted features of a text: its words, word bigrams and character trigrams."""
+    words = _WORD_PATTERN.findall(normalize_text(text))
+    weighted = [(f"w:{word}", _WORD_WEIGHT) for word in words]
+    weighted += [(f"b:{first} {second}", _BIGRAM_WEIGHT) for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = f"<{word}>"
+        weighted += [(f"c:{padded[i:i + 3]}", _TRIGRAM_WEIGHT) for i in range(len(padded) - 2)]
+    return weighted
+
+
+class HashingVectorizer:
+    """
+    Embeds texts as L2-normalized feature-hashing vectors.
+
+    Each feature adds its weight to one of `dimensions` columns, picked by a
+    CRC32 of the feature, with a sign from another bit of it so collisions
+    cancel out on average instead of piling up.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS):
+        self.dimensions = dimensions
+
+    def transform(self, texts: Sequence[str]):
+        import numpy as np
+
+        rows, columns, values = [], [], []
+        for row, text in enumerate(texts):
+            for feature, weight in features(text):
+                digest = zlib.crc32(feature.encode())
+                rows.append(row)
+                columns.append(digest % self.dimensions)
+                values.append(weight if digest & 0x80000000 else -weight)
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        np.add.at(vectors, (rows, columns), values)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        # Texts without features stay all-zero and never match anything
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class SemanticCache:
+    """
+    Results keyed by input text, served for any input similar enough.
+
+    Holds at most `capacity` entries, dropping the least recently used one.
+    Vectors are kept in one matrix, grown as entries arrive. Thread-safe, so
+    the *_async methods can scan it off the event loop.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        capacity: int = DEFAULT_CAPACITY,
+        vectorizer: Optional[HashingVectorizer] = None,
+        agent: Optional[str] = None,
+    ):
+        import numpy as np
+
+        self.threshold = threshold
+        self.capacity = capacity
+        self.vectorizer = vectorizer or HashingVectorizer()
+        self.agent = agent
+        self.vectors = np.zeros((min(capacity, 1024), self.vectorizer.dimensions), dtype=np.float32)
+        self.values: list[Any] = []
+        # Slot -> None, least recently used first
+        self._recency: OrderedDict[int, None] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def lookup(self, text: str) -> Optional[Any]:
+        return self.lookup_many([text])[0]
+
+    def lookup_many(self, texts: Sequence) -> list[Optional[Any]]:
+        """The cached result for each text (None on a miss or a non-string item)."""
+        import numpy as np
+
+        found: list[Optional[Any]] = [None] * len(texts)
+        queries = [index for index, text in enumerate(texts) if isinstance(text, str)]
+        if queries and self.values:
+            vectors = self.vectorizer.transform([texts[index] for index in queries])
+            with self._lock:
+                similarities = vectors @ self.vectors[:len(self.values)].T
+                best = similarities.argmax(axis=1)
+                scores = similarities[np.arange(len(queries)), best]
+                for index, slot, score in zip(queries, best.tolist(), scores.tolist()):
+                    if score >= self.threshold:
+                        found[index] = self.values[slot]
+                        self._recency.move_to_end(slot)
+        if self.agent is not None:
+            hits = sum(value is not None for value in found)
+            semantic_cache_total.inc((self.agent, "hit"), hits)
+            semantic_cache_total.inc((self.agent, "miss"), len(queries) - hits)
+        return found
+
+    async def lookup_async(self, text: str) -> Optional[Any]:
+        return (await self.lookup_many_async([text]))[0]
+
+    async def lookup_many_async(self, texts: Sequence) -> list[Optional[Any]]:
+        """lookup_many(), in a worker thread."""
+        return await asyncio.to_thread(self.lookup_many, texts)
+
+    def put(self, text: str, value: Any) -> None:
+        self.put_many([text], [value])
+
+    def put_many(self, texts: Sequence[str], values: Sequence[Any]) -> None:
+        import numpy as np
+
+        vectors = self.vectorizer.transform(texts)
+        with self._lock:
+            for vector, value in zip(vectors, values):
+                if len(self.values) < self.capacity:
+                    slot = len(self.values)
+                    if slot == len(self.vectors):
+                        grown = np.zeros((min(self.capacity, 2 * slot), self.vectors.shape[1]), dtype=np.float32)
+                        grown[:slot] = self.vectors
+                        self.vectors = grown
+                    self.values.append(value)
+                else:
+                    slot, _ = self._recency.popitem(last=False)
+                    self.values[slot] = value
+                self.vectors[slot] = vector
+                self._recency[slot] = None
+
+    async def put_async(self, text: str, value: Any) -> None:
+        await self.put_many_async([text], [value])
+
+    async def put_many_async(self, texts: Sequence[str], values: Sequence[Any]) -> None:
+        """put_many(), in a worker thread (it waits for any scan in progress)."""
+        await asyncio.to_thread(self.put_many, texts, values)
+
+
+def thresholds() -> dict[str, float]:
+    """Per-agent thresholds from A2A_SEMANTIC_CACHE (empty when the cache is off)."""
+    setting = os.getenv("A2A_SEMANTIC_CACHE")
+    if not setting or setting == "0":
+        return {}
+    return json.loads(setting) if setting.strip().startswith("{") else dict(DEFAULT_THRESHOLDS)
+
+
+def from_env(agent: str) -> Optional[SemanticCache]:
+    """The agent's semantic cache when A2A_SEMANTIC_CACHE enables it, else None."""
+    threshold = thresholds().get(agent)
+    if threshold is None:
+        return None
+    if importlib.util.find_spec("numpy") is None:
+        logger.warning("A2A_SEMANTIC_CACHE is ignored: install numpy (pip install \"adk_a2a_lab[semantic-cache]\")")
+        return None
+    cache = SemanticCache(
+        threshold,
+        capacity=int(os.getenv("A2A_SEMANTIC_CACHE_SIZE", str(DEFAULT_CAPACITY))),
+        agent=agent,
+    )
+    _caches[agent] = cache
+    return cache
+
+
+def _entries_metric():
+    return metrics.gauge_lines(
+        "a2a_semantic_cache_entries",
+        "Entries held by each agent's semantic cache.",
+        ("agent",),
+        {(agent,): len(cache) for agent, cache in _caches.items()},
+    )
+
+
+metrics.add_collector(_entries_metric)
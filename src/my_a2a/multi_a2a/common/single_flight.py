@@ -0,0 +1,103 @@
+# Single-flight request coalescing for the agents' LLM paths.
+# Concurrent requests with the same normalized input attach to one in-flight
+# computation instead of each starting an identical LLM call.
+import asyncio
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_key(*parts: Any) -> tuple:
+    """
+    Builds a coalescing key from request inputs.
+
+    Text is Unicode-normalized (NFC) and whitespace is collapsed, so inputs that
+    differ only in spacing share a key. Case is preserved because some agents
+    (e.g. POS tagging) depend on it.
+
+    Args:
+        parts: The inputs that determine the result (text, agent lists, ...).
+
+    Returns:
+        A hashable key.
+    """
+    def normalize(part):
+        if isinstance(part, str):
+            return _WHITESPACE_PATTERN.sub(" ", unicodedata.normalize("NFC", part)).strip()
+        if isinstance(part, (list, tuple, set, frozenset)):
+            return tuple(sorted(normalize(item) for item in part))
+        return part
+
+    return tuple(normalize(part) for part in parts)
+
+
+@dataclass
+class _Call:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical async computations.
+
+    The first caller for a key starts the computation; later callers with the
+    same key wait on the same task and receive the same result (or exception).
+    Cancellation is reference-counted: a waiter that goes away only detaches,
+    and the shared computation is cancelled once no waiter is left.
+    """
+
+    def __init__(self):
+        self._calls: dict[Hashable, _Call] = {}
+        self.executed = 0   # computations actually started
+        self.coalesced = 0  # requests that attached to an in-flight computation
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a computation for `key` is in flight."""
+        return key in self._calls
+
+    def stats(self) -> dict:
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": self.in_flight}
+
+    def _forget(self, key: Hashable, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `fn` for `key`, or attaches to the run already in flight for it.
+
+        Args:
+            key: Coalescing key, usually from normalize_key().
+            fn: Zero-argument coroutine function producing the result.
+
+        Returns:
+            The result of the (possibly shared) computation.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(task=asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executed += 1
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            # shield() keeps the shared task alive when only this waiter is cancelled
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+                self._forget(key, call)
@@ -0,0 +1,103 @@
+import asyncio
+
+from my_a2a.multi_a2a.common.batch import pack_prompt, run_batch, unpack
+
+
+class Item:
+    def __init__(self, index: int):
+        self.index = index
+
+
+def test_unpack_places_items_and_ignores_bad_indexes():
+    items = [Item(2), Item(0), Item(0), Item(7)]
+    placed = unpack(items, 3)
+    assert placed[0] is items[1]
+    assert placed[1] is None
+    assert placed[2] is items[0]
+
+
+def test_pack_prompt_numbers_texts():
+    assert pack_prompt("Tag these.", ["a  b", "c"]) == "Tag these.\n\n[0] a b\n[1] c"
+
+
+def test_duplicates_are_processed_once_and_results_keep_order():
+    async def main():
+        seen = []
+
+        async def process_one(text):
+            seen.append(text)
+            return text.upper()
+
+        results = await run_batch("test", ["hi", "  hi ", "bye", "", 3], process_one)
+        return seen, results
+
+    seen, results = asyncio.run(main())
+    assert sorted(seen) == ["bye", "hi"]
+    assert [result for result, _ in results[:3]] == ["HI", "HI", "BYE"]
+    assert results[3][0] is None and results[3][1].startswith("ValueError")
+    assert results[4][0] is None and results[4][1].startswith("ValueError")
+
+
+def test_items_a_pack_leaves_out_fall_back_to_one_by_one():
+    async def main():
+        singles = []
+
+        async def process_one(text):
+            singles.append(text)
+            return f"one:{text}"
+
+        async def process_pack(texts):
+            # Garbles the second item and stops before the last
+            return [f"pack:{texts[0]}", None]
+
+        results = await run_batch("test", ["a", "b", "c"], process_one, process_pack, pack_size=3)
+        return singles, results
+
+    singles, results = asyncio.run(main())
+    assert sorted(singles) == ["b", "c"]
+    assert [result for result, _ in results] == ["pack:a", "one:b", "one:c"]
+
+
+def test_failed_pack_retries_every_item_and_reports_item_errors():
+    async def main():
+        async def process_one(text):
+            if text == "bad":
+                raise RuntimeError("no result")
+            return text
+
+        async def process_pack(texts):
+            raise RuntimeError("pack failed")
+
+        return await run_batch("test", ["ok", "bad"], process_one, process_pack)
+
+    results = asyncio.run(main())
+    assert results[0] == ("ok", None)
+    assert results[1] == (None, "RuntimeError: no result")
+
+
+def test_cached_items_are_not_processed():
+    class Cache:
+        def __init__(self):
+            self.stored = {"cached": "from cache"}
+
+        async def lookup_many_async(self, texts):
+            return [self.stored.get(text) if isinstance(text, str) else None for text in texts]
+
+        async def put_many_async(self, texts, results):
+            self.stored.update(zip(texts, results))
+
+    async def main():
+        cache = Cache()
+        processed = []
+
+        async def process_one(text):
+            processed.append(text)
+            return "fresh"
+
+        results = await run_batch("test", ["cached", "new"], process_one, cache=cache)
+        return processed, results, cache.stored
+
+    processed, results, stored = asyncio.run(main())
+    assert processed == ["new"]
+    assert [result for result, _ in results] == ["from cache", "fresh"]
+    assert stored["new"] == "fresh"
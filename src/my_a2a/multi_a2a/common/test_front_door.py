@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+from google.adk.agents import LlmAgent
+
+from my_a2a.multi_a2a.common.front_door import FrontDoor, TurnResult, UserQueueFull
+from my_adk.llm.stub import StubLlm
+
+
+def front_door(**kwargs) -> FrontDoor:
+    agent = LlmAgent(name="echo", model=StubLlm(responder=lambda prompt: f"echo: {prompt}"))
+    return FrontDoor(agent, "test_app", initial_state={"count": 0}, **kwargs)
+
+
+async def turn(door: FrontDoor, user_id: str, session_id: str, log: list, name: str) -> None:
+    async with door.session_turn(user_id, session_id):
+        log.append(("start", name))
+        await asyncio.sleep(0.01)
+        log.append(("end", name))
+
+
+def test_requests_of_one_session_run_in_arrival_order():
+    async def main():
+        door = front_door(session_ttl=0)
+        log = []
+        tasks = []
+        for name in "abc":
+            tasks.append(asyncio.create_task(turn(door, "u1", "s1", log, name)))
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return log, door
+
+    log, door = asyncio.run(main())
+    assert log == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b"), ("start", "c"), ("end", "c")]
+    # Nothing held once the session is idle
+    assert not door._locks and not door.admitted
+
+
+def test_different_sessions_run_concurrently():
+    async def main():
+        door = front_door(session_ttl=0)
+        log = []
+        await asyncio.gather(turn(door, "u1", "s1", log, "a"), turn(door, "u2", "s2", log, "b"))
+        return log
+
+    log = asyncio.run(main())
+    assert log[:2] == [("start", "a"), ("start", "b")]
+
+
+def test_user_queue_is_bounded():
+    async def main():
+        door = front_door(session_ttl=0, max_per_user=2)
+        log = []
+        tasks = [asyncio.create_task(turn(door, "u1", f"s{index}", log, str(index))) for index in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(UserQueueFull):
+            await turn(door, "u1", "s9", log, "rejected")
+        # Other users are not affected
+        await turn(door, "u2", "s1", log, "other")
+        await asyncio.gather(*tasks)
+        return log
+
+    assert ("start", "rejected") not in asyncio.run(main())
+
+
+def test_idle_sessions_expire_and_restart_fresh():
+    async def main():
+        door = front_door(session_ttl=10)
+        await turn(door, "u1", "s1", [], "a")
+        session = await door.session_service.get_session(app_name="test_app", user_id="u1", session_id="s1")
+        session.state["count"] = 5
+        door._known[("u1", "s1")] = time.monotonic() - 60
+        door._next_sweep = 0
+        await door.expire_sessions()
+        expired = await door.session_service.get_session(app_name="test_app", user_id="u1", session_id="s1")
+        await turn(door, "u1", "s1", [], "b")
+        fresh = await door.session_service.get_session(app_name="test_app", user_id="u1", session_id="s1")
+        return expired, fresh
+
+    expired, fresh = asyncio.run(main())
+    assert expired is None
+    assert fresh.state == {"count": 0}
+
+
+def test_busy_sessions_do_not_expire():
+    async def main():
+        door = front_door(session_ttl=10)
+        release = asyncio.Event()
+
+        async def hold():
+            async with door.session_turn("u1", "s1"):
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        door._known[("u1", "s1")] = time.monotonic() - 60
+        door._next_sweep = 0
+        await door.expire_sessions()
+        release.set()
+        await holder
+        return await door.session_service.get_session(app_name="test_app", user_id="u1", session_id="s1")
+
+    assert asyncio.run(main()) is not None
+
+
+def test_run_ends_with_turn_result():
+    async def main():
+        door = front_door(session_ttl=0)
+        return [event async for event in door.run("u1", "s1", "hello")][-1]
+
+    result = asyncio.run(main())
+    assert isinstance(result, TurnResult)
+    assert result.response == "echo: hello"
+    assert result.state == {"count": 0}
@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+
+from a2a.server.tasks import InMemoryTaskStore, TaskUpdater
+from a2a.types import Message, MessageSendParams, Part, Role, TaskState, TextPart
+
+from my_a2a.multi_a2a.common import idempotency
+from my_a2a.multi_a2a.common.fake_peer import FakePeerExecutor
+from my_a2a.multi_a2a.common.idempotency import IdempotentRequestHandler, TTLStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ttl_store_expires_entries(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(idempotency.time, "monotonic", clock)
+    store = TTLStore(ttl=10, max_entries=100)
+    store.put("a", 1)
+    clock.now += 5
+    store.put("b", 2)
+    clock.now += 6
+    assert store.get("a") is None
+    assert store.get("b") == 2
+
+
+def test_ttl_store_drops_oldest_past_max_entries():
+    store = TTLStore(ttl=60, max_entries=2)
+    for key in "abc":
+        store.put(key, key)
+    assert len(store) == 2
+    assert store.get("a") is None
+    assert store.get("c") == "c"
+
+
+def test_ttl_store_put_refreshes_entry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(idempotency.time, "monotonic", clock)
+    store = TTLStore(ttl=10, max_entries=100)
+    store.put("a", 1)
+    clock.now += 8
+    store.put("a", 2)
+    clock.now += 8
+    assert store.get("a") == 2
+
+
+class FailingExecutor(FakePeerExecutor):
+    async def execute(self, context, event_queue):
+        self.calls += 1
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.failed, final=True)
+
+
+def handler(executor=None) -> IdempotentRequestHandler:
+    return IdempotentRequestHandler(
+        "sentiment",
+        agent_executor=executor or FakePeerExecutor("sentiment", latency=0.05),
+        task_store=InMemoryTaskStore(),
+    )
+
+
+def send_params(message_id: str | None = None, key: str | None = None) -> MessageSendParams:
+    return MessageSendParams(message=Message(
+        role=Role.user,
+        message_id=message_id or str(uuid.uuid4()),
+        parts=[Part(root=TextPart(text="I love it"))],
+        metadata={idempotency.IDEMPOTENCY_METADATA_KEY: key} if key else None,
+    ))
+
+
+def test_retry_after_completion_gets_stored_result():
+    async def main():
+        request_handler = handler()
+        first = await request_handler.on_message_send(send_params("m1"))
+        retry = await request_handler.on_message_send(send_params("m1"))
+        return request_handler.agent_executor.calls, first, retry
+
+    calls, first, retry = asyncio.run(main())
+    assert calls == 1
+    assert retry.id == first.id
+    assert retry.status.state == TaskState.completed
+
+
+def test_concurrent_retries_attach_to_running_call():
+    async def main():
+        request_handler = handler()
+        results = await asyncio.gather(*(request_handler.on_message_send(send_params("m1")) for _ in range(3)))
+        return request_handler.agent_executor.calls, {result.id for result in results}
+
+    calls, task_ids = asyncio.run(main())
+    assert calls == 1
+    assert len(task_ids) == 1
+
+
+def test_metadata_key_overrides_message_id():
+    async def main():
+        request_handler = handler()
+        await request_handler.on_message_send(send_params(key="order-1"))
+        await request_handler.on_message_send(send_params(key="order-1"))
+        await request_handler.on_message_send(send_params(key="order-2"))
+        return request_handler.agent_executor.calls
+
+    assert asyncio.run(main()) == 2
+
+
+def test_failed_runs_are_not_reused():
+    async def main():
+        request_handler = handler(FailingExecutor("sentiment"))
+        await request_handler.on_message_send(send_params("m1"))
+        await request_handler.on_message_send(send_params("m1"))
+        return request_handler.agent_executor.calls
+
+    assert asyncio.run(main()) == 2
+
+
+def test_disabled_runs_every_message(monkeypatch):
+    monkeypatch.setenv("A2A_IDEMPOTENCY", "0")
+
+    async def main():
+        request_handler = handler()
+        await request_handler.on_message_send(send_params("m1"))
+        await request_handler.on_message_send(send_params("m1"))
+        return request_handler.agent_executor.calls
+
+    assert asyncio.run(main()) == 2
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from a2a.types import PushNotificationConfig, Task, TaskState, TaskStatus
+from a2a.utils.errors import ServerError
+
+from my_a2a.multi_a2a.common import push
+from my_a2a.multi_a2a.common.push import WebhookDispatcher
+
+WEBHOOK_URL = "http://hooks.test/a2a/push"
+
+
+@pytest.fixture(autouse=True)
+def allow_test_host(monkeypatch):
+    monkeypatch.setenv("A2A_PUSH_ALLOWED_HOSTS", "hooks.test")
+
+
+class Webhook:
+    """Records delivered task states; deliveries block while `gate` is clear."""
+
+    def __init__(self):
+        self.received: list[tuple[str, str]] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await self.gate.wait()
+        task = json.loads(request.content)
+        self.received.append((task["id"], task["status"]["state"]))
+        return httpx.Response(204)
+
+
+def task(task_id: str, state: TaskState) -> Task:
+    return Task(id=task_id, context_id="context", status=TaskStatus(state=state))
+
+
+async def dispatcher(webhook: Webhook, task_ids, **kwargs) -> WebhookDispatcher:
+    sender = WebhookDispatcher(
+        "test",
+        httpx_client=httpx.AsyncClient(transport=httpx.MockTransport(webhook)),
+        workers=1,
+        retries=0,
+        **kwargs,
+    )
+    for task_id in task_ids:
+        await sender.config_store.set_info(task_id, PushNotificationConfig(url=WEBHOOK_URL))
+    return sender
+
+
+async def settle(sender: WebhookDispatcher) -> None:
+    while sender.pending or sender.delivering:
+        await asyncio.sleep(0.01)
+
+
+def test_pending_states_are_coalesced_per_task():
+    async def main():
+        webhook = Webhook()
+        sender = await dispatcher(webhook, ["t1"])
+        webhook.gate.clear()
+        await sender.send_notification(task("t1", TaskState.submitted))
+        await asyncio.sleep(0.01)
+        # Queued behind the delivery in progress; only the latest is sent
+        await sender.send_notification(task("t1", TaskState.working))
+        await sender.send_notification(task("t1", TaskState.completed))
+        webhook.gate.set()
+        await settle(sender)
+        await sender.close()
+        return webhook.received
+
+    assert asyncio.run(main()) == [("t1", "submitted"), ("t1", "completed")]
+
+
+def test_full_queue_drops_progress_but_waits_for_final_states():
+    async def main():
+        webhook = Webhook()
+        sender = await dispatcher(webhook, ["t1", "t2", "t3"], max_pending=1)
+        webhook.gate.clear()
+        await sender.send_notification(task("t1", TaskState.working))
+        await asyncio.sleep(0.01)
+        await sender.send_notification(task("t2", TaskState.working))
+        # The queue is full: progress is dropped, a final state waits for room
+        await sender.send_notification(task("t3", TaskState.working))
+        final = asyncio.create_task(sender.send_notification(task("t3", TaskState.completed)))
+        await asyncio.sleep(0.01)
+        assert not final.done()
+        webhook.gate.set()
+        await final
+        await settle(sender)
+        await sender.close()
+        return webhook.received
+
+    assert asyncio.run(main()) == [("t1", "working"), ("t2", "working"), ("t3", "completed")]
+
+
+def test_final_delivery_forgets_the_webhook():
+    async def main():
+        webhook = Webhook()
+        sender = await dispatcher(webhook, ["t1"])
+        await sender.send_notification(task("t1", TaskState.completed))
+        await settle(sender)
+        configs = await sender.config_store.get_info("t1")
+        await sender.close()
+        return configs
+
+    assert asyncio.run(main()) == []
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["http://127.0.0.1:9100/a2a/push", "http://169.254.169.254/latest/meta-data", "ftp://hooks.test/"],
+)
+def test_unsafe_webhooks_are_rejected(monkeypatch, url):
+    monkeypatch.delenv("A2A_PUSH_ALLOWED_HOSTS")
+
+    async def main():
+        sender = WebhookDispatcher("test", workers=1)
+        try:
+            await sender.config_store.set_info("t1", PushNotificationConfig(url=url))
+        finally:
+            await sender.close()
+
+    with pytest.raises(ServerError):
+        asyncio.run(main())
+
+
+def test_allowed_hosts_limit_webhooks():
+    with pytest.raises(ValueError, match="A2A_PUSH_ALLOWED_HOSTS"):
+        asyncio.run(push.check_webhook_url("http://elsewhere.test/a2a/push"))
+    asyncio.run(push.check_webhook_url(WEBHOOK_URL))
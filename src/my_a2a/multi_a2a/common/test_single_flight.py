@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from my_a2a.multi_a2a.common.single_flight import SingleFlight, normalize_key
+
+
+def test_normalize_key_collapses_whitespace_and_keeps_case():
+    assert normalize_key("  I  love\tit ", ["pos", "sentiment"]) == normalize_key("I love it", ["sentiment", "pos"])
+    assert normalize_key("Paris") != normalize_key("paris")
+
+
+def test_concurrent_calls_share_one_computation():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def compute():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flight.do("key", compute) for _ in range(5)))
+        return results, calls, flight.stats()
+
+    results, calls, stats = asyncio.run(main())
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert stats == {"executed": 1, "coalesced": 4, "in_flight": 0}
+
+
+def test_exception_reaches_every_waiter():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        return await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+def test_cancelled_waiter_detaches_from_shared_call():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(flight.do("key", compute))
+        second = asyncio.create_task(flight.do("key", compute))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        # The other waiter keeps the computation alive
+        assert flight.in_flight == 1
+        release.set()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "result"
+
+
+def test_shared_call_is_cancelled_with_its_last_waiter():
+    async def main():
+        flight = SingleFlight()
+        cancelled = asyncio.Event()
+
+        async def compute():
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+
+        waiters = [asyncio.create_task(flight.do("key", compute)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.wait_for(cancelled.wait(), 1)
+        return flight.in_flight
+
+    assert asyncio.run(main()) == 0
@@ -0,0 +1,132 @@
+# Cross-hop tracing for the agents: W3C trace context carried in A2A messages.
+# Client.dispatch injects a `traceparent` into every outgoing message's
+# metadata and each executor continues that trace, so one user query becomes
+# a single trace across the root agent, the planner and the sub-agents, with
+# child spans around the ADK runner / LangGraph runs and every model call.
+#
+#   A2A_TRACE=stdout               finished spans go to stdout, one JSON object per line
+#   A2A_TRACE=traces/spans.jsonl   ... or are appended to a file (shareable between processes)
+# Without A2A_TRACE no tracer provider is installed and every span is a no-op.
+# The a2a SDK's own per-function spans are not recorded: they would multiply
+# the span count and hide the server behind the client's transport spans.
+# `python benchmarks/critical_path.py traces/spans.jsonl` reconstructs the
+# critical path of each request and shows which hop dominates the tail.
+import json
+import os
+import sys
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from a2a.types import Message
+from opentelemetry import propagate, trace
+from opentelemetry.trace import Span, SpanKind
+
+TRACE_ENV = "A2A_TRACE"
+
+# Span attribute naming the agent a span belongs to (its "hop")
+AGENT_ATTRIBUTE = "a2a.agent"
+
+# Span name prefix of the a2a SDK's internal spans
+_SDK_SPAN_PREFIX = "a2a."
+
+# Attributes longer than this are left out of exported spans (ADK attaches
+# whole LLM requests to its own spans)
+_MAX_ATTRIBUTE_CHARS = 256
+
+tracer = trace.get_tracer("my_a2a")
+
+_configured = False
+
+
+def _span_record(span) -> dict:
+    return {
+        "trace_id": format(span.context.trace_id, "032x"),
+        "span_id": format(span.context.span_id, "016x"),
+        "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+        "name": span.name,
+        "service": span.resource.attributes.get("service.name"),
+        "start_ns": span.start_time,
+        "end_ns": span.end_time,
+        "status": span.status.status_code.name,
+        "attributes": {
+            key: value
+            for key, value in (span.attributes or {}).items()
+            if not (isinstance(value, str) and len(value) > _MAX_ATTRIBUTE_CHARS)
+        },
+    }
+
+
+def setup_tracing(service_name: str) -> bool:
+    """
+    Installs a tracer provider exporting spans as JSON lines, if A2A_TRACE is set.
+
+    Spans are exported in batches from a background thread. Call once per
+    process, before serving; later calls are no-ops.
+
+    Returns:
+        Whether spans are being recorded.
+    """
+    global _configured
+    target = os.getenv(TRACE_ENV)
+    if _configured or not target:
+        return _configured
+
+    # The SDK is only needed when tracing is on
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult
+
+    class SkipSdkSpans(Sampler):
+        def should_sample(self, parent_context, trace_id, name, kind=None, attributes=None, links=None, trace_state=None):
+            if name.startswith(_SDK_SPAN_PREFIX):
+                return SamplingResult(Decision.DROP)
+            return SamplingResult(Decision.RECORD_AND_SAMPLE, attributes)
+
+        def get_description(self) -> str:
+            return "SkipSdkSpans"
+
+    class JsonLinesSpanExporter(SpanExporter):
+        def __init__(self, target: str):
+            if target == "stdout":
+                self.fd = sys.stdout.fileno()
+            else:
+                directory = os.path.dirname(target)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                # O_APPEND: workers and agent processes can share one file
+                self.fd = os.open(target, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+
+        def export(self, spans) -> SpanExportResult:
+            data = "".join(
+                json.dumps(_span_record(span), separators=(",", ":"), default=str) + "\n" for span in spans
+            )
+            os.write(self.fd, data.encode())
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self) -> None:
+            if self.fd != sys.stdout.fileno():
+                os.close(self.fd)
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}), sampler=SkipSdkSpans())
+    provider.add_span_processor(BatchSpanProcessor(JsonLinesSpanExporter(target)))
+    trace.set_tracer_provider(provider)
+    _configured = True
+    return True
+
+
+def inject_trace_context(metadata: Optional[dict] = None) -> Optional[dict]:
+    """Returns message metadata carrying the current trace context (`traceparent`)."""
+    metadata = dict(metadata or {})
+    propagate.inject(metadata)
+    return metadata or None
+
+
+@contextmanager
+def server_span(agent: str, message: Optional[Message]) -> Iterator[Span]:
+    """Runs an executor's request in a span continuing the caller's trace, if any."""
+    parent = propagate.extract((message.metadata or {}) if message else {})
+    with tracer.start_as_current_span(
+        f"{agent}.execute", context=parent, kind=SpanKind.SERVER, attributes={AGENT_ATTRIBUTE: agent}
+    ) as span:
+        yield span
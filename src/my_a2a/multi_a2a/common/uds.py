@@ -0,0 +1,73 @@
+# Unix domain socket transport for co-located agents.
+# Agents started with A2A_UDS_DIR also listen on <dir>/<server name>.sock (see
+# runtime.py). The Client reaches them through unix:// registry entries:
+#
+#   unix:///run/a2a/sentiment.sock                  a standalone agent
+#   unix:///run/a2a/host.sock?path=/sentiment/      an agent mounted in the combined host
+#
+# The card is fetched over the socket, and every later call to that agent
+# goes through one persistent httpx client bound to it. The agent's card URL
+# is kept as is: only its path is used on the socket.
+import asyncio
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import httpx
+from a2a.types import AgentCard
+
+UNIX_SCHEME = "unix"
+
+# Card URL (without trailing slash) -> socket of agents resolved through a unix:// entry
+_sockets: dict[str, str] = {}
+
+# Socket -> (event loop, client); httpx clients are bound to the loop they were used on
+_clients: dict[str, tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+
+def is_unix(url: str) -> bool:
+    return url.startswith(f"{UNIX_SCHEME}://")
+
+
+def unix_url(socket_path: str, path: str = "/") -> str:
+    """The registry entry for an agent served at `path` on a socket."""
+    return f"{UNIX_SCHEME}://{socket_path}" + (f"?path={path}" if path != "/" else "")
+
+
+def parse_unix_url(url: str) -> tuple[str, str]:
+    """unix:///run/a2a/host.sock?path=/pos/ -> ("/run/a2a/host.sock", "/pos/")"""
+    parts = urlsplit(url)
+    if parts.scheme != UNIX_SCHEME or not parts.path:
+        raise ValueError(f"Not a unix:// agent address: {url}")
+    return parts.path, parse_qs(parts.query).get("path", ["/"])[0]
+
+
+def http_client(socket_path: str, **kwargs) -> httpx.AsyncClient:
+    """An httpx client sending every request over the socket, whatever its URL's host."""
+    return httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(uds=socket_path), **kwargs)
+
+
+def shared_client(socket_path: str) -> httpx.AsyncClient:
+    """A persistent client for the socket, shared by every call from this event loop."""
+    loop = asyncio.get_running_loop()
+    cached = _clients.get(socket_path)
+    if cached is not None and cached[0] is loop:
+        return cached[1]
+    client = http_client(socket_path)
+    _clients[socket_path] = (loop, client)
+    return client
+
+
+def card_base_url(url: str) -> str:
+    """Base URL for resolving an agent card over the socket of a unix:// entry."""
+    # The host is not used on a socket, but httpx needs one
+    return f"http://localhost{parse_unix_url(url)[1]}"
+
+
+def register_unix_agent(agent_card: AgentCard, url: str) -> None:
+    """Routes later calls to the agent with this card over the socket of `url`."""
+    _sockets[agent_card.url.rstrip("/")] = parse_unix_url(url)[0]
+
+
+def unix_socket(agent_card: AgentCard) -> Optional[str]:
+    """The socket to reach this agent through, if it was resolved through a unix:// entry."""
+    return _sockets.get(agent_card.url.rstrip("/"))
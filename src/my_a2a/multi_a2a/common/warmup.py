@@ -0,0 +1,177 @@
+# Startup warm-up and readiness for the agent servers.
+# The first request to a cold server pays for lazy SDK imports, the first TLS
+# handshake with the model endpoint, ADK runner setup and LangGraph's first
+# run. At startup each server now runs one synthetic request through its own
+# request handler and opens its model connections. /ready answers 503 until
+# that is done, so load balancers only route real traffic to warm workers.
+# The synthetic request is tagged (metadata {"warm_up": true}): the idempotency
+# store, the semantic caches and the request metrics leave it out.
+#
+# Afterwards, one keeper per process refreshes the connection of each model
+# client in use (whichever agents and tiers share it). Each refresh is a model
+# metadata lookup: it costs no tokens, but is a control-plane call counted
+# against the API quota, so it runs rarely; busy servers keep their
+# connections open with real traffic anyway.
+#
+#   A2A_WARMUP=0                 skip warm-up, report ready at once
+#   A2A_KEEP_WARM_INTERVAL=60    seconds between model connection refreshes (0 = off)
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional
+
+from a2a.server.apps import A2AStarletteApplication
+from a2a.types import Message, MessageSendParams, Part, Role, TextPart
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from my_a2a.multi_a2a.common import diagnostics, grpc_binding, metrics, profiler, push
+from my_a2a.multi_a2a.common.log import get_logger
+
+logger = get_logger(__name__)
+
+READY_PATH = "/ready"
+
+WARM_UP_METADATA_KEY = "warm_up"
+
+# The process-wide connection keeper, started by the first warm-up lifespan
+_keeper: Optional[asyncio.Task] = None
+
+
+def is_warm_up(message: Optional[Message]) -> bool:
+    """Whether a message is a synthetic warm-up request."""
+    return message is not None and bool((message.metadata or {}).get(WARM_UP_METADATA_KEY))
+
+
+async def synthetic_request(server: A2AStarletteApplication, text: str) -> None:
+    """Sends one tagged warm-up message through the server's request handler, in-process."""
+    message = Message(
+        role=Role.user,
+        message_id=f"warmup-{uuid.uuid4()}",
+        parts=[Part(root=TextPart(text=text))],
+        metadata={WARM_UP_METADATA_KEY: True},
+    )
+    await server.handler.request_handler.on_message_send(MessageSendParams(message=message))
+
+
+class WarmUp:
+    """
+    Runs a server's warm-up steps in the background at startup and reports
+    readiness once they have all finished.
+
+    A failing step is recorded and logged but does not keep the server out of
+    rotation: a broken model endpoint is better surfaced by real requests than
+    by a worker that never becomes ready.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, keep_warm_interval: Optional[float] = None):
+        self.enabled = os.getenv("A2A_WARMUP", "1") != "0" if enabled is None else enabled
+        if keep_warm_interval is None:
+            keep_warm_interval = float(os.getenv("A2A_KEEP_WARM_INTERVAL", "60"))
+        self.keep_warm_interval = keep_warm_interval
+        self.steps: list[tuple[str, Callable[[], Awaitable[None]]]] = []
+        # Whether an agent's model connections are kept warm
+        self.keep_warm = False
+        # Extra listeners (the gRPC bindings) started and stopped with the app
+        self.bindings: list[grpc_binding.GrpcBinding] = []
+        self.results: dict[str, str] = {}
+        self.ready = False
+        self.duration: Optional[float] = None
+
+    def add(self, name: str, step: Callable[[], Awaitable[None]]) -> None:
+        self.steps.append((name, step))
+
+    def add_agent(self, agent_name: str, server: A2AStarletteApplication, text: str) -> None:
+        """
+        Registers the standard warm-up for an agent: open its model connections
+        (kept warm afterwards, by the process-wide keeper) and run one synthetic
+        request through its handler.
+        """
+        async def connections():
+            # Imported here: routing pulls in ADK, which some servers load lazily
+            from my_a2a.llm.routing import warm_up_connections
+
+            await warm_up_connections(agent_name)
+
+        # Its sessions, tasks and caches show up in /admin/memory (when enabled)
+        diagnostics.watch_agent(agent_name, server)
+        binding = grpc_binding.from_env(agent_name, server)
+        if binding is not None:
+            self.bindings.append(binding)
+        self.add(f"{agent_name}:connections", connections)
+        self.add(f"{agent_name}:request", lambda: synthetic_request(server, text))
+        self.keep_warm = True
+
+    async def run(self) -> None:
+        started = time.perf_counter()
+        for name, step in self.steps:
+            try:
+                await step()
+                self.results[name] = "ok"
+            except Exception as e:
+                self.results[name] = f"failed: {e}"
+                logger.warning("Warm-up step %s failed: %s", name, e)
+        self.duration = time.perf_counter() - started
+        self.ready = True
+        logger.info("Worker %d warmed up in %.2fs", os.getpid(), self.duration)
+
+    async def refresh(self) -> None:
+        """Periodically re-touches every model client's connection in this process."""
+        from my_a2a.llm.routing import refresh_connections
+
+        while True:
+            await asyncio.sleep(self.keep_warm_interval)
+            try:
+                await refresh_connections()
+            except Exception:
+                # Real requests will surface a broken endpoint
+                pass
+
+    @asynccontextmanager
+    async def lifespan(self, app):
+        for binding in self.bindings:
+            await binding.start()
+        global _keeper
+        tasks = []
+        if self.enabled:
+            tasks.append(asyncio.create_task(self.run()))
+            if self.keep_warm and self.keep_warm_interval > 0 and (_keeper is None or _keeper.done()):
+                _keeper = asyncio.create_task(self.refresh())
+                tasks.append(_keeper)
+        else:
+            self.ready = True
+        try:
+            yield
+        finally:
+            for task in tasks:
+                task.cancel()
+            for binding in self.bindings:
+                await binding.stop()
+            # The agents' push workers and their HTTP clients
+            await push.close_dispatchers()
+
+    async def ready_endpoint(self, request: Request) -> JSONResponse:
+        return JSONResponse(
+            {
+                "ready": self.ready,
+                "pid": os.getpid(),
+                "steps": self.results,
+                "warmup_s": round(self.duration, 3) if self.duration is not None else None,
+            },
+            status_code=200 if self.ready else 503,
+        )
+
+    def route(self) -> Route:
+        return Route(READY_PATH, self.ready_endpoint, methods=["GET"])
+
+    def build(self, server: A2AStarletteApplication) -> Starlette:
+        """
+        Builds the server's Starlette app with the warm-up lifespan, the /ready
+        and /metrics routes and, if enabled, the profiler and memory diagnostics.
+        """
+        app = server.build(routes=[self.route(), metrics.route()], lifespan=self.lifespan)
+        return diagnostics.install(profiler.install(app))
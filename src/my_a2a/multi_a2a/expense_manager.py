@@ -0,0 +1,31 @@
+# HTTP front door for the expense manager: many users and sessions served
+# concurrently by one shared Runner, instead of session.py's one-user input()
+# loop. Each session's requests run in order, so expenses are never lost to
+# two concurrent updates of the same state (see common/front_door.py).
+#
+#   python -m my_a2a.multi_a2a.expense_manager
+#   curl -s localhost:8020/run -d '{"user_id": "u1", "session_id": "s1", "message": "Spent 12 on lunch"}'
+#   curl -N localhost:8020/run -d '{"user_id": "u1", "session_id": "s1", "message": "Total?", "stream": true}'
+#
+# A2A_PORT and A2A_HOST apply as for the agent servers; sessions live in this
+# process, so A2A_WORKERS is ignored.
+from my_a2a.multi_a2a.common.front_door import FrontDoor, FrontDoorApp
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+from my_adk.stateful_agent.expense_manager_agent import agent, initial_state
+
+APP_NAME = "expense_manager_app"
+
+
+def build_app():
+    front_door = FrontDoor(agent, APP_NAME, initial_state=initial_state())
+    return FrontDoorApp(front_door).build()
+
+
+def main():
+    settings = ServerSettings.from_env(port=8020, name="expense_manager")
+    settings.workers = 1
+    serve(build_app(), settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 from google.adk import Agent
 
-from my_a2a.llm.model import model
+from my_a2a.llm.routing import model_for
 
 # Define the Greeting Agent
 greeting_agent = Agent(
     name="Greeting_Agent",
-    model=model,
+    model=model_for("greeting"),
     description="An agent that responds politely to greetings.",
     instruction="""
 You are a friendly greeting bot. 
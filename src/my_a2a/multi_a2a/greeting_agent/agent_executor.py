@@ -1,8 +1,9 @@
 # A2A components for agent execution
+import uuid
+from contextlib import aclosing
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
-from a2a.utils import new_agent_text_message
 from a2a.server.tasks import TaskUpdater
 from a2a.types import TaskState
 
@@ -13,6 +14,11 @@ from google.genai import types
 
 # Import our pre-configured greeting agent
 from my_a2a.multi_a2a.greeting_agent import greeting_agent  
+from my_a2a.multi_a2a.common import semantic_cache
+from my_a2a.multi_a2a.common.metrics import AgentMetrics
+from my_a2a.multi_a2a.common.schemas import GreetingResult, to_data_part
+from my_a2a.multi_a2a.common.tracing import server_span, tracer
+from my_a2a.multi_a2a.common.warmup import is_warm_up
 
 class GreetingAgentExecutor(AgentExecutor):
     """
@@ -28,56 +34,102 @@ class GreetingAgentExecutor(AgentExecutor):
         self.session_service = InMemorySessionService()
         self.app_name = "greeting_app"
         self.user_id = "default_user"
-        self.session_id = "default_session"
 
-    async def execute(self, context: RequestContext, event_queue: EventQueue):
-        # Create a session (stateless, so same IDs)
-        current_session = await self.session_service.create_session(
-            app_name=self.app_name,
-            user_id=self.user_id,
-            session_id=self.session_id
-        )
-        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
-        if not context.current_task:
-            await updater.update_status(TaskState.submitted)
-        await updater.update_status(TaskState.working)
-        # Extract user input from the incoming request
-        user_input_text = context.get_user_input()
+        # Per-stage timers, in-flight and error counts, served on /metrics
+        self.metrics = AgentMetrics("greeting")
+
+        # The runner is stateless across sessions: build it once, not per request
+        with self.metrics.stage("runner_setup"):
+            self.runner = Runner(
+                agent=self.agent,
+                app_name=self.app_name,
+                session_service=self.session_service,
+            )
+
+        # Near-duplicates of earlier greetings get the same reply (A2A_SEMANTIC_CACHE)
+        self.semantic_cache = semantic_cache.from_env("greeting")
+
+    async def greet(self, text: str) -> str | None:
+        """
+        Runs the ADK greeting agent on a message and returns its final response text.
+
+        Each call gets its own throwaway session, so concurrent greetings never
+        see each other's history in the model context.
+        """
+        with self.metrics.stage("session"):
+            session = await self.session_service.create_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=str(uuid.uuid4()),
+            )
 
         # Wrap into ADK content structure
         content = types.Content(
             role="user",
-            parts=[types.Part(text=user_input_text)]
-        )
-
-        # Create runner
-        runner = Runner(
-            agent=self.agent,
-            app_name=self.app_name,
-            session_service=self.session_service,
+            parts=[types.Part(text=text)]
         )
 
         final_response_text = None
+        try:
+            with self.metrics.stage("run"), tracer.start_as_current_span("adk.run"):
+                # The run is read to its end (the final response is its last event)
+                # and closed here even on cancellation: a generator left to the
+                # garbage collector ends its spans in the wrong context
+                async with aclosing(self.runner.run_async(
+                    user_id=self.user_id,
+                    session_id=session.id,
+                    new_message=content,
+                )) as events:
+                    async for event in events:
+                        if event.is_final_response():
+                            if event.content and event.content.parts:
+                                final_response_text = event.content.parts[0].text
+        finally:
+            await self.session_service.delete_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=session.id,
+            )
+        return final_response_text
 
-        async for event in runner.run_async(
-            user_id=self.user_id,
-            session_id=self.session_id,
-            new_message=content,
-        ):
-            if event.is_final_response():
-                if event.content and event.content.parts:
-                    final_response_text = event.content.parts[0].text
-                break
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        # The startup warm-up request is left out of the metrics (and caches)
+        warm_up = is_warm_up(context.message)
+        with self.metrics.request(record=not warm_up) as request, server_span("greeting", context.message):
+            updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+            if not context.current_task:
+                await updater.update_status(TaskState.submitted)
+            await updater.update_status(TaskState.working)
+            # Extract user input from the incoming request
+            user_input_text = context.get_user_input()
 
-        if final_response_text:
-            await event_queue.enqueue_event(
-                new_agent_text_message(final_response_text)
-            )
-            await updater.update_status(
-                TaskState.completed, final=True
-            )
-        else:
-            raise RuntimeError("No final response from Greeting Agent.")
+            # A near-duplicate of an earlier greeting gets its reply
+            if self.semantic_cache is not None and not warm_up:
+                with self.metrics.stage("cache"):
+                    cached = await self.semantic_cache.lookup_async(user_input_text)
+                if cached is not None:
+                    with self.metrics.stage("enqueue"):
+                        await updater.add_artifact([to_data_part(cached)], name="greeting")
+                        await updater.update_status(TaskState.completed, final=True)
+                    return
+
+            final_response_text = await self.greet(user_input_text)
+
+            if final_response_text:
+                with self.metrics.stage("parse"):
+                    result = GreetingResult(greeting=final_response_text.strip())
+                if self.semantic_cache is not None and not warm_up:
+                    await self.semantic_cache.put_async(user_input_text, result)
+                with self.metrics.stage("enqueue"):
+                    await updater.add_artifact([to_data_part(result)], name="greeting")
+                    await updater.update_status(
+                        TaskState.completed, final=True
+                    )
+            else:
+                request.fail("no_response")
+                raise RuntimeError("No final response from Greeting Agent.")
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise NotImplementedError("Cancellation not supported for Greeting Agent.")
+        # The request handler then cancels this task's execute()
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
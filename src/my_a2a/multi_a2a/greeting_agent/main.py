@@ -1,11 +1,18 @@
-import uvicorn
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+from my_a2a.multi_a2a.common.idempotency import IdempotentRequestHandler
+from my_a2a.multi_a2a.common.push import WebhookDispatcher
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+from my_a2a.multi_a2a.common.tracing import setup_tracing
+from my_a2a.multi_a2a.common.warmup import WarmUp
 from my_a2a.multi_a2a.greeting_agent.agent_executor import GreetingAgentExecutor
 
-def main():
+# Input of the synthetic request run through the agent at startup
+WARM_UP_TEXT = "Hello!"
+
+
+def build_server(url: str = "http://localhost:8002/") -> A2AStarletteApplication:
     skill = AgentSkill(
         id="greeting",
         name="Greetings",
@@ -17,17 +24,24 @@ def main():
     agent_card = AgentCard(
         name="Greetings Agent",
         description="An agent that returns a friendly greeting.",
-        url="http://localhost:8002/",
+        url=url,
         defaultInputModes=["text"],
-        defaultOutputModes=["text"],
+        defaultOutputModes=["application/json"],
         skills=[skill],
         version="1.0.0",
-        capabilities=AgentCapabilities(),
+        capabilities=AgentCapabilities(push_notifications=True),
     )
 
-    request_handler = DefaultRequestHandler(
+    # Posts task updates to the webhooks of non-blocking callers (see common/push.py)
+    push_sender = WebhookDispatcher("greeting")
+
+    # Retried messages get the original run's result (see common/idempotency.py)
+    request_handler = IdempotentRequestHandler(
+        "greeting",
         agent_executor=GreetingAgentExecutor(),
         task_store=InMemoryTaskStore(),
+        push_config_store=push_sender.config_store,
+        push_sender=push_sender,
     )
 
     server = A2AStarletteApplication(
@@ -35,7 +49,19 @@ def main():
         agent_card=agent_card,
     )
 
-    uvicorn.run(server.build(), host="0.0.0.0", port=8002)
+    return server
+
+
+def main():
+    # A2A_TRACE exports this agent's spans
+    setup_tracing("greeting")
+    server = build_server()
+
+    # Serve /ready only after a synthetic request has gone through the agent
+    warm_up = WarmUp()
+    warm_up.add_agent("greeting", server, WARM_UP_TEXT)
+
+    serve(warm_up.build(server), ServerSettings.from_env(port=8002, name="greeting"))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,156 @@
+# Combined launcher: serves several A2A agents from one process.
+# Each agent's A2AStarletteApplication is mounted under its own path
+# (http://host:8000/planner/, /greeting/, /sentiment/, /pos/), so the ADK,
+# LangChain and LangGraph stacks are imported and held in memory once.
+# Agents hosted here are also registered for in-process dispatch: a Client
+# running in this process calls their request handlers directly. The NLP
+# client's front door mounts agents the same way (A2A_FRONT_DOOR_AGENTS, see
+# client/nlp_client_agent/server.py), so the orchestrator skips the HTTP hop.
+#
+# Which agents run here is configurable, so any of them can be split back out
+# to its own process (its main.py) without code changes:
+#   A2A_HOSTED_AGENTS=planner,greeting,pos python -m my_a2a.multi_a2a.host
+#   python -m my_a2a.multi_a2a.sentiment_agent.main
+# Point the client at the resulting layout with A2A_AGENT_REGISTRY (see
+# `python -m my_a2a.multi_a2a.host --print-registry`). With A2A_UDS_DIR set,
+# every server also listens on a Unix domain socket there, and the printed
+# registry uses the unix:// addresses.
+import argparse
+import importlib
+import json
+import os
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+
+from my_a2a.multi_a2a.common import diagnostics, metrics, profiler
+from my_a2a.multi_a2a.common.in_process import register_local_agent
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve, uds_path
+from my_a2a.multi_a2a.common.tracing import setup_tracing
+from my_a2a.multi_a2a.common.uds import unix_url
+from my_a2a.multi_a2a.common.warmup import WarmUp
+
+# Agent name -> module exposing build_server(url)
+AGENT_MODULES = {
+    "planner": "my_a2a.multi_a2a.planner_agent.main",
+    "greeting": "my_a2a.multi_a2a.greeting_agent.main",
+    "sentiment": "my_a2a.multi_a2a.sentiment_agent.main",
+    "pos": "my_a2a.multi_a2a.pos_tag_agent.main",
+}
+
+# Where each agent lives when it runs as its own process
+STANDALONE_URLS = {
+    "planner": "http://localhost:8001/",
+    "greeting": "http://localhost:8002/",
+    "sentiment": "http://localhost:8003/",
+    "pos": "http://localhost:8004/",
+}
+
+
+def agents_from_env(variable: str, default: list[str]) -> list[str]:
+    """
+    Agent names from a comma-separated environment variable ("all": every agent).
+
+    Raises:
+        ValueError: If it names an unknown agent.
+    """
+    configured = os.getenv(variable)
+    if not configured:
+        return default
+    if configured.strip() == "all":
+        return list(AGENT_MODULES)
+    names = [name.strip() for name in configured.split(",") if name.strip()]
+    unknown = set(names) - set(AGENT_MODULES)
+    if unknown:
+        raise ValueError(f"Unknown agents in {variable}: {sorted(unknown)}")
+    return names
+
+
+def hosted_agents() -> list[str]:
+    """Agents served by the combined host, from A2A_HOSTED_AGENTS (default: all)."""
+    return agents_from_env("A2A_HOSTED_AGENTS", list(AGENT_MODULES))
+
+
+def agent_registry(base_url: str, agents: list[str]) -> dict[str, str]:
+    """Card URLs for every agent: mounted ones under base_url, the rest standalone."""
+    base_url = base_url.rstrip("/")
+    return {
+        name: f"{base_url}/{name}/" if name in agents else url
+        for name, url in STANDALONE_URLS.items()
+    }
+
+
+def socket_registry(agents: list[str]) -> dict[str, str]:
+    """unix:// addresses for every agent, for servers started with A2A_UDS_DIR."""
+    return {
+        name: unix_url(uds_path("host"), f"/{name}/") if name in agents else unix_url(uds_path(name))
+        for name in STANDALONE_URLS
+    }
+
+
+def build_app(base_url: str = "http://localhost:8000", agents: list[str] | None = None) -> Starlette:
+    """
+    Builds one ASGI app with each hosted agent mounted at /<agent name>/.
+
+    Every mounted agent is warmed up at startup; /ready reports ready once all
+    of them are. /metrics covers every mounted agent.
+
+    Args:
+        base_url: Public URL of the host, used for the agent cards.
+        agents: Agents to mount; defaults to hosted_agents().
+
+    Returns:
+        The combined Starlette application.
+    """
+    agents = hosted_agents() if agents is None else agents
+    registry = agent_registry(base_url, agents)
+
+    warm_up = WarmUp()
+    routes = [warm_up.route(), metrics.route(), *mount_agents(agents, registry, warm_up)]
+    # Mounted apps get no lifespan events, so the host runs every agent's warm-up
+    return diagnostics.install(profiler.install(Starlette(routes=routes, lifespan=warm_up.lifespan)))
+
+
+def mount_agents(agents: list[str], registry: dict[str, str], warm_up: WarmUp) -> list[Mount]:
+    """
+    Builds each agent's server with its card URL from `registry`, registers it
+    for in-process dispatch and adds its warm-up steps.
+
+    Returns:
+        A Mount at /<agent name> for each agent.
+    """
+    mounts = []
+    for name in agents:
+        module = importlib.import_module(AGENT_MODULES[name])
+        server = module.build_server(url=registry[name])
+        register_local_agent(server.agent_card, server.handler.request_handler)
+        warm_up.add_agent(name, server, module.WARM_UP_TEXT)
+        mounts.append(Mount(f"/{name}", app=server.build()))
+    return mounts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve several A2A agents from one process.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, help="Pre-forked workers (default: A2A_WORKERS or 1; more than one needs A2A_STATELESS=1)")
+    parser.add_argument("--public-url", help="URL advertised in the agent cards (default: http://localhost:PORT)")
+    parser.add_argument("--print-registry", action="store_true", help="Print the A2A_AGENT_REGISTRY for this layout and exit")
+    args = parser.parse_args()
+
+    base_url = args.public_url or f"http://localhost:{args.port}"
+    if args.print_registry:
+        agents = hosted_agents()
+        registry = socket_registry(agents) if uds_path("host") else agent_registry(base_url, agents)
+        print(json.dumps(registry))
+        return
+    settings = ServerSettings.from_env(port=args.port, host=args.host, name="host")
+    if args.workers:
+        settings.workers = args.workers
+    # A2A_TRACE exports the spans of every hosted agent (told apart by their a2a.agent attribute)
+    setup_tracing("host")
+    serve(build_app(base_url), settings)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
-import json
-import re
+from functools import cache
 from typing import List
 
-from my_a2a.llm.model import llm_complete
-from langchain.prompts import ChatPromptTemplate
+from my_a2a.llm.model import llm_complete_json
+from my_a2a.llm.json_repair import JSONRepairError
+from my_a2a.multi_a2a.common.schemas import Plan
 
-planner_prompt = ChatPromptTemplate.from_template("""
+PLANNER_TEMPLATE = """
 You are an NLP Planner Agent.
 You do NOT execute any tasks yourself.
 You only create a plan for other agents to execute.
@@ -13,24 +13,32 @@ You only create a plan for other agents to execute.
 Available agents:
 {available_agents}
                                                   
-Output the plan in strict JSON format:
-[
+Output the plan as a JSON object whose "steps" list holds one entry per delegation:
+{{ "steps": [
   {{ "agent": "<agent_name>", "input": "<input_text>" }},
   ...
-]
+] }}
 
 Example:
 User: "Check the sentiment and POS tags for 'I love Groq models!'"
 Plan:
-[
+{{ "steps": [
   {{ "agent": "<agent1>", "input": "I love Groq models!" }},
   {{ "agent": "<agent2>", "input": "I love Groq models!" }}
-]
+] }}
 
 Now, given the user request:
 "{user_input}"
 Produce the JSON plan only.
-""")
+"""
+
+
+@cache
+def get_planner_prompt():
+    """Builds the planner prompt on first use; LangChain is only imported then."""
+    from langchain.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_template(PLANNER_TEMPLATE)
 
 
 async def generate_plan(user_input: str, available_agents: List[str]) -> List[dict]:
@@ -48,29 +56,22 @@ async def generate_plan(user_input: str, available_agents: List[str]) -> List[di
     agents_list = "\n".join([f"- {agent}" for agent in available_agents])
     
     # Generate the plan
-    prompt = planner_prompt.format(
+    prompt = get_planner_prompt().format(
         user_input=user_input,
         available_agents=agents_list
     )
-    response = await llm_complete(prompt)
-    pattern = r"^```json\n|```$"
+    # Routing pulls in ADK, so it is imported on the first plan rather than at startup
+    from my_a2a.llm.routing import model_for
 
-    response = re.sub(pattern, "", response, flags=re.MULTILINE).strip()    
-    # Parse and validate the JSON response
+    # Native structured output; malformed JSON is repaired before giving up
     try:
-        plan = json.loads(response.strip())
-        if not isinstance(plan, list):
-            raise ValueError("Plan must be a list of tasks")
-        
-        # Validate each task in the plan
-        for task in plan:
-            if not isinstance(task, dict):
-                raise ValueError("Each task must be a dictionary")
-            if "agent" not in task or "input" not in task:
-                raise ValueError("Each task must have 'agent' and 'input' fields")
-            if task["agent"] not in available_agents:
-                raise ValueError(f"Unknown agent: {task['agent']}")
-        
-        return plan
-    except json.JSONDecodeError:
-        raise ValueError("Invalid JSON in plan response")
+        plan = await llm_complete_json(prompt, Plan, llm=model_for("planner"))
+    except JSONRepairError as e:
+        raise ValueError(f"Invalid JSON in plan response: {e}")
+
+    # The schema guarantees shape; only agent names need checking here
+    for step in plan.steps:
+        if step.agent not in available_agents:
+            raise ValueError(f"Unknown agent: {step.agent}")
+
+    return [step.model_dump() for step in plan.steps]
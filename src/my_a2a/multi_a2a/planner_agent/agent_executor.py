@@ -3,72 +3,81 @@ import json
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
-from a2a.utils import new_agent_parts_message
 from a2a.server.tasks import TaskUpdater
-from a2a.types import TaskState, Part, TextPart
-
-# ADK components for running the sentiment agent
-from google.adk.sessions import InMemorySessionService
+from a2a.types import TaskState
 
 from my_a2a.multi_a2a.planner_agent.agent import generate_plan
+from my_a2a.multi_a2a.common.log import get_logger
+from my_a2a.multi_a2a.common.metrics import AgentMetrics
+from my_a2a.multi_a2a.common.schemas import Plan, to_data_part
+from my_a2a.multi_a2a.common.single_flight import SingleFlight, normalize_key
+from my_a2a.multi_a2a.common.tracing import server_span, tracer
+from my_a2a.multi_a2a.common.warmup import is_warm_up
+
+logger = get_logger(__name__)
 
 class PlannerAgentExecutor(AgentExecutor):
-    def __init__(self):        
-        self.session_service = InMemorySessionService()
-        self.app_name = "planner_app"
-        self.user_id = "default_user"
-        self.session_id = "default_session"
+    def __init__(self):
+        # The planner calls the model directly (no ADK Runner), so it needs no
+        # session service; that keeps ADK out of the server's startup path.
+        # Identical concurrent planning requests share one LLM call
+        self.single_flight = SingleFlight()
+        # Per-stage timers, in-flight and error counts, served on /metrics
+        self.metrics = AgentMetrics("planner")
+        self.metrics.track_single_flight(self.single_flight)
 
     async def execute(self, context: RequestContext, event_queue: EventQueue):
-        current_session = await self.session_service.create_session(
-            app_name=self.app_name,
-            user_id=self.user_id,
-            session_id=self.session_id
-        )
-        print(f"\n Session {current_session.id} created successfully.")
-        
-        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
-        if not context.current_task:
-            await updater.update_status(TaskState.submitted)
-        await updater.update_status(TaskState.working)
+        # The startup warm-up request is left out of the metrics (and caches)
+        warm_up = is_warm_up(context.message)
+        with self.metrics.request(record=not warm_up) as request, server_span("planner", context.message):
+            updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+            if not context.current_task:
+                await updater.update_status(TaskState.submitted)
+            await updater.update_status(TaskState.working)
 
-        # Safely extract structured input from the A2A request
-        user_input_string = context.get_user_input()
-        print(f"Received user input: {user_input_string}")
-        try:
-            input_data = json.loads(user_input_string)
-            user_input = input_data.get("user_input")
-            available_agents = input_data.get("available_agents", [])
-        except json.JSONDecodeError:
-            # Handle malformed input gracefully
-            await updater.update_status(TaskState.failed, final=True)
-            raise ValueError("Input is not a valid JSON string.")
+            # Safely extract structured input from the A2A request
+            user_input_string = context.get_user_input()
+            logger.info("Received user input: %s", user_input_string)
+            try:
+                input_data = json.loads(user_input_string)
+                user_input = input_data.get("user_input")
+                available_agents = input_data.get("available_agents", [])
+            except json.JSONDecodeError:
+                # Handle malformed input gracefully
+                request.fail("bad_input")
+                await updater.update_status(TaskState.failed, final=True)
+                raise ValueError("Input is not a valid JSON string.")
 
-        # Process the input through our planner agent
-        plan = await generate_plan(
-            user_input=user_input,
-            available_agents=available_agents
-        )
-        print(f"Generated plan: {plan}")
-        
-        if plan is not None:
-            # Convert the Python dictionary into a JSON string
-            json_plan_string = json.dumps(plan)
-            
-            # Wrap the JSON string into a TextPart and then into a Part object
-            text_part = TextPart(text=json_plan_string)
-            message_parts = [Part(root=text_part)]
+            # Process the input through our planner agent, attaching to an
+            # identical in-flight plan if there is one
+            with self.metrics.stage("run"), tracer.start_as_current_span("plan"):
+                plan = await self.single_flight.do(
+                    normalize_key(user_input, available_agents),
+                    lambda: generate_plan(
+                        user_input=user_input,
+                        available_agents=available_agents
+                    ),
+                )
+            logger.info("Generated plan: %s", plan)
 
-            # Create and send an A2A-compatible message with the result
-            await event_queue.enqueue_event(
-                new_agent_parts_message(message_parts)
-            )
-            
-            # Mark the task as completed
-            await updater.update_status(TaskState.completed, final=True)
-        else:
-            await updater.update_status(TaskState.failed, final=True)
-            raise RuntimeError("No final response received from the agent.")
+            if plan is not None:
+                # Validate the plan against the declared schema and send it
+                # back as a task artifact holding a DataPart
+                with self.metrics.stage("parse"):
+                    result = Plan(steps=plan)
+                with self.metrics.stage("enqueue"):
+                    await updater.add_artifact([to_data_part(result)], name="plan")
+
+                    # Mark the task as completed
+                    await updater.update_status(TaskState.completed, final=True)
+            else:
+                request.fail("no_response")
+                await updater.update_status(TaskState.failed, final=True)
+                raise RuntimeError("No final response received from the agent.")
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise NotImplementedError("Cancellation is not supported for planner agent.")
\ No newline at end of file
+        # The request handler then cancels this task's execute(): a request
+        # attached to a shared single-flight call only detaches from it, and the
+        # call stops with its last waiter
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
\ No newline at end of file
@@ -1,9 +1,14 @@
-# Standard FastAPI-based server for A2A
-import uvicorn
+import json
+
+# Server runtime: tuned uvicorn, optionally pre-forked into several workers
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+from my_a2a.multi_a2a.common.tracing import setup_tracing
+from my_a2a.multi_a2a.common.warmup import WarmUp
 
 # Core A2A components for building agent servers
 from a2a.server.apps import A2AStarletteApplication  # Base server application
-from a2a.server.request_handlers import DefaultRequestHandler  # Handles incoming requests
+from my_a2a.multi_a2a.common.idempotency import IdempotentRequestHandler  # Handles incoming requests, once per message
+from my_a2a.multi_a2a.common.push import WebhookDispatcher  # Delivers push notifications to webhooks
 from a2a.server.tasks import InMemoryTaskStore  # Stores task states temporarily
 
 # A2A type definitions for agent capabilities and metadata
@@ -13,9 +18,16 @@ from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 from my_a2a.multi_a2a.planner_agent.agent_executor import PlannerAgentExecutor
 
 
-def main():
+# Input of the synthetic request run through the agent at startup
+WARM_UP_TEXT = json.dumps({
+    "user_input": "Give me complete NLP analysis for 'I love programming!'",
+    "available_agents": ["sentiment", "pos"],
+})
+
+
+def build_server(url: str = "http://localhost:8001/") -> A2AStarletteApplication:
     """
-    Sets up and runs an A2A-compliant sentiment analysis server.
+    Builds an A2A-compliant sentiment analysis server.
     This server can:
     1. Accept text input from other agents
     2. Return sentiment analysis results
@@ -39,19 +51,26 @@ def main():
     agent_card = AgentCard(
         name="Planner Agent Executor Agent",  # Agent's name
         description="A plannner agent that returns a plan given a user query.",
-        url="http://localhost:8001/",     # Where to find this agent
+        url=url,                          # Where to find this agent
         defaultInputModes=["text"],       # What input we accept
-        defaultOutputModes=["list"],      # What output we provide
+        defaultOutputModes=["application/json"],  # Structured Plan
         skills=[skill],                   # What we can do
         version="1.0.0",                  # For compatibility checking
-        capabilities=AgentCapabilities(), # Additional features (none needed here)
+        capabilities=AgentCapabilities(push_notifications=True),  # Results can be pushed to a webhook
     )
 
+    # Posts task updates to the webhooks of non-blocking callers (see common/push.py)
+    push_sender = WebhookDispatcher("planner")
+
     # Set up request handling
     # This connects incoming requests to our agent's logic
-    request_handler = DefaultRequestHandler(
+    # Retried messages get the original run's result (see common/idempotency.py)
+    request_handler = IdempotentRequestHandler(
+        "planner",
         agent_executor=PlannerAgentExecutor(),  # Our custom agent logic
         task_store=InMemoryTaskStore(),          # Temporary task storage
+        push_config_store=push_sender.config_store,
+        push_sender=push_sender,
     )
 
     # Initialize the A2A server
@@ -61,7 +80,19 @@ def main():
         agent_card=agent_card,        # Exposes our capabilities
     )
 
-    uvicorn.run(server.build(), host="0.0.0.0", port=8001)
+    return server
+
+
+def main():
+    # A2A_TRACE exports this agent's spans
+    setup_tracing("planner")
+    server = build_server()
+
+    # Serve /ready only after a synthetic request has gone through the agent
+    warm_up = WarmUp()
+    warm_up.add_agent("planner", server, WARM_UP_TEXT)
+
+    serve(warm_up.build(server), ServerSettings.from_env(port=8001, name="planner"))
 
 
 if __name__ == "__main__":
@@ -1,64 +1,84 @@
-# A2A components for agent execution
-import json
-from typing import List
+from functools import cache
+from typing import List, Optional
 
 # Import the LLM completion model
-from my_a2a.llm.model import llm_complete
+from my_a2a.llm.model import llm_complete_json
+from my_a2a.llm.json_repair import JSONRepairError
+from my_a2a.multi_a2a.common.log import get_logger
+from my_a2a.multi_a2a.common.batch import pack_prompt, unpack
+from my_a2a.multi_a2a.common.schemas import PosTagPack, PosTagResult
 
-# The LangGraph library is used to define the agent's logic as a stateful graph.
-from langgraph.graph import StateGraph, START, END
 from typing import TypedDict
-import re
+
+logger = get_logger(__name__)
 
 # 1. Define an asynchronous function for the core logic using an LLM
-async def pos_tag_query(text: str) -> List[List[str]]:
+async def pos_tag_query(text: str) -> List[dict]:
     """
     Performs Part-of-Speech tagging on a given text string using an LLM.
 
-    The function prompts the LLM to return a JSON array of arrays, 
-    where each inner array contains a word and its POS tag.
+    The function asks the LLM for native structured output matching
+    PosTagResult: a list of objects, each holding a word and its POS tag.
 
     Args:
         text: The input string to be tagged.
 
     Returns:
-        A list of lists, where each inner list contains a word and its POS tag.
+        A list of dicts, each with a "word" and a "tag" key.
     """
     # The prompt for the LLM
     prompt = (
         "Perform Part-of-Speech tagging on the following sentence. "
-        "Return the result as a list of dicts, where each inner "
-        "dict contains the word and its corresponding POS tag. "
-        "Do not include any extra text or formatting outside the JSON."
+        "Return a JSON object whose \"tags\" list holds one object per word, "
+        "each with a \"word\" key and a \"tag\" key holding its POS tag."
         f"\n\nText: \"{text}\""
     )
 
-    # Call the LLM completion model
-    response = await llm_complete(prompt)
-    print(f"LLM response for POS tagging: {response}")
-    pattern = r"^```json\n|```$"
-    response = re.sub(pattern, "", response, flags=re.MULTILINE).strip()    
+    # Routing pulls in ADK, so it is imported on the first request rather than at startup
+    from my_a2a.llm.routing import model_for
+
+    # Call the LLM completion model with the response schema
+    try:
+        result = await llm_complete_json(prompt, PosTagResult, llm=model_for("pos"))
+    except JSONRepairError as e:
+        raise RuntimeError(f"Failed to parse LLM response as JSON: {e}")
+    return [tag.model_dump() for tag in result.tags]
+
+async def pos_tag_pack(texts: List[str]) -> List[Optional[PosTagResult]]:
+    """
+    Tags several sentences with one LLM call (batch requests).
+
+    Returns:
+        One PosTagResult per sentence, in order; None where the model left a
+        sentence out.
+    """
+    prompt = pack_prompt(
+        "Perform Part-of-Speech tagging on each numbered sentence below. "
+        "Return a JSON object whose \"items\" list holds one object per sentence, "
+        "with its \"index\" and a \"tags\" list holding one object per word, "
+        "each with a \"word\" key and a \"tag\" key holding its POS tag.",
+        texts,
+    )
+
+    from my_a2a.llm.routing import model_for
 
     try:
-        parsed_response = json.loads(response)
-        if isinstance(parsed_response, list):
-            return parsed_response
-        else:
-            raise ValueError("LLM response is not a list.")
-    except (json.JSONDecodeError, ValueError) as e:
+        packed = await llm_complete_json(prompt, PosTagPack, llm=model_for("pos"))
+    except JSONRepairError as e:
         raise RuntimeError(f"Failed to parse LLM response as JSON: {e}")
+    return [PosTagResult(tags=item.tags) if item else None for item in unpack(packed.items, len(texts))]
 
 # 2. Define the Graph State
 class AgentState(TypedDict):
     """Represents the state of our graph."""
     text_input: str
-    pos_tags: List[List[str]]
+    pos_tags: List[dict]
 
 # 3. Define the Nodes (the logic of the agent)
 # The node must be an async function to await the LLM call.
 async def pos_tag_node(state: AgentState) -> AgentState:
     """A node that calls the POS tagging function on the input text."""
-    print("Executing POS tagging node...")
+    logger.debug("Executing POS tagging node...")
     
     # Get the text from the current state
     text = state['text_input']
@@ -69,13 +89,27 @@ async def pos_tag_node(state: AgentState) -> AgentState:
     # Store the result in the state
     state['pos_tags'] = tags
     
-    print(f"POS tags generated: {tags}")
+    logger.info("POS tags generated: %s", tags)
     
     return state
 
 # 4. Build the LangGraph
-workflow = StateGraph(AgentState)
-workflow.add_node("tagger", pos_tag_node)
-workflow.add_edge(START, "tagger")
-workflow.add_edge("tagger", END)
-app = workflow.compile()
\ No newline at end of file
+# The graph is compiled on first use, so importing this module does not load LangGraph.
+@cache
+def get_app():
+    """Returns the compiled POS tagging graph."""
+    # The LangGraph library is used to define the agent's logic as a stateful graph.
+    from langgraph.graph import StateGraph, START, END
+
+    workflow = StateGraph(AgentState)
+    workflow.add_node("tagger", pos_tag_node)
+    workflow.add_edge(START, "tagger")
+    workflow.add_edge("tagger", END)
+    return workflow.compile()
+
+
+def __getattr__(name: str):
+    # `from my_a2a.multi_a2a.pos_tag_agent.agent import app` keeps working, lazily
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,64 +1,135 @@
-import json
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
 from a2a.server.tasks import TaskUpdater
-from a2a.utils import new_agent_parts_message
-from a2a.types import TaskState, Part, TextPart
+from a2a.types import Part, TaskState, TextPart
 from typing import TypedDict, List
-from my_a2a.multi_a2a.pos_tag_agent.agent import app
+from my_a2a.multi_a2a.pos_tag_agent.agent import get_app, pos_tag_pack
+from my_a2a.multi_a2a.common.batch import batch_texts, run_batch
+from my_a2a.multi_a2a.common.metrics import AgentMetrics
+from my_a2a.multi_a2a.common.schemas import PosTagBatchItem, PosTagBatchResult, PosTagResult, to_data_part
+from my_a2a.multi_a2a.common.single_flight import SingleFlight, normalize_key
+from my_a2a.multi_a2a.common.tracing import server_span, tracer
+from my_a2a.multi_a2a.common.warmup import is_warm_up
 
 class AgentState(TypedDict):
     """Represents the state of our graph."""
     text_input: str
-    pos_tags: List[List[str]]
+    pos_tags: List[dict]
 
 class PosTagAgentExecutor(AgentExecutor):
-    def __init__(self):
-        # We don't need a session service for this stateless agent
-        pass
+    def __init__(self, pack_size: int = 16, max_concurrency: int = 8):
+        # We don't need a session service for this stateless agent.
+        # Identical concurrent requests share one graph run (and LLM call).
+        self.single_flight = SingleFlight()
+        # Per-stage timers, in-flight and error counts, served on /metrics
+        self.metrics = AgentMetrics("pos")
+        self.metrics.track_single_flight(self.single_flight)
+        # Batch requests: sentences are tagged pack_size at a time in one LLM
+        # prompt (pack_size=1: one graph run each), max_concurrency at once
+        self.pack_size = pack_size
+        self.max_concurrency = max_concurrency
+
+    async def tag(self, text: str) -> PosTagResult:
+        """Tags one sentence with the graph, sharing identical in-flight runs."""
+        initial_state: AgentState = {"text_input": text, "pos_tags": []}
+        app = get_app()
+        final_state = await self.single_flight.do(
+            normalize_key(text),
+            lambda: app.ainvoke(initial_state),
+        )
+        return PosTagResult(tags=final_state['pos_tags'])
+
+    async def execute_batch(self, texts: list, updater: TaskUpdater):
+        """
+        Batch path: tags every sentence of the request and ships them as one
+        ordered PosTagBatchResult, with per-item errors.
+        """
+        outcomes = await run_batch(
+            "pos",
+            texts,
+            self.tag,
+            process_pack=pos_tag_pack,
+            pack_size=self.pack_size,
+            max_concurrency=self.max_concurrency,
+        )
+        result = PosTagBatchResult(items=[
+            PosTagBatchItem(index=index, result=item, error=error)
+            for index, (item, error) in enumerate(outcomes)
+        ])
+        with self.metrics.stage("enqueue"):
+            await updater.add_artifact([to_data_part(result)], name="pos_tags")
+            await updater.update_status(TaskState.completed, final=True)
 
     async def execute(self, context: RequestContext, event_queue: EventQueue):
-        # Create a task updater to manage the task's state
-        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
-        if not context.current_task:
-            await updater.update_status(TaskState.submitted)
-        await updater.update_status(TaskState.working)
+        # The startup warm-up request is left out of the metrics (and caches)
+        warm_up = is_warm_up(context.message)
+        with self.metrics.request(record=not warm_up) as request, server_span("pos", context.message):
+            # Create a task updater to manage the task's state
+            updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+            if not context.current_task:
+                await updater.update_status(TaskState.submitted)
+            await updater.update_status(TaskState.working)
 
-        try:
-            # Safely get the input text from the A2A request
-            user_input_text = context.get_user_input()
-            if not user_input_text:
-                raise ValueError("No text input provided for tagging.")
-            
-            # Create the initial state for the LangGraph
-            initial_state: AgentState = {"text_input": user_input_text, "pos_tags": []}
+            # A DataPart {"texts": [...]} asks for a batch
+            try:
+                texts = batch_texts(context.message)
+            except ValueError as e:
+                request.fail("bad_batch")
+                await updater.update_status(
+                    TaskState.failed,
+                    message=updater.new_agent_message([Part(root=TextPart(text=str(e)))]),
+                    final=True,
+                )
+                raise RuntimeError(f"Invalid batch request: {e}")
+            if texts is not None:
+                with self.metrics.stage("batch"):
+                    await self.execute_batch(texts, updater)
+                return
 
-            # Run the compiled LangGraph app to get the final state
-            # The app itself is now an async runnable because it contains async nodes
-            final_state = await app.ainvoke(initial_state)
+            try:
+                # Safely get the input text from the A2A request
+                user_input_text = context.get_user_input()
+                if not user_input_text:
+                    request.fail("bad_input")
+                    raise ValueError("No text input provided for tagging.")
 
-            # Extract the result from the final state
-            pos_tags = final_state['pos_tags']
-            
-            # Serialize the list of lists to a JSON string
-            json_response = json.dumps(pos_tags)
-            
-            # Wrap the JSON string into a TextPart and then into a Part object
-            text_part = TextPart(text=json_response)
-            parts = [Part(root=text_part)]
+                # Create the initial state for the LangGraph
+                initial_state: AgentState = {"text_input": user_input_text, "pos_tags": []}
 
-            # Send the structured result back via A2A
-            await event_queue.enqueue_event(
-                new_agent_parts_message(parts)
-            )
-            
-            # Mark the task as completed
-            await updater.update_status(TaskState.completed, final=True)
-            
-        except Exception as e:
-            await updater.update_status(TaskState.failed, final=True)
-            raise RuntimeError(f"An error occurred during POS tagging: {e}")
+                # The graph is compiled on the first request
+                with self.metrics.stage("runner_setup"):
+                    app = get_app()
+
+                # Run the compiled LangGraph app to get the final state, attaching
+                # to an identical in-flight run if there is one.
+                # The app itself is now an async runnable because it contains async nodes
+                with self.metrics.stage("run"), tracer.start_as_current_span("langgraph.run"):
+                    final_state = await self.single_flight.do(
+                        normalize_key(user_input_text),
+                        lambda: app.ainvoke(initial_state),
+                    )
+
+                # Validate the result from the final state against the declared schema
+                with self.metrics.stage("parse"):
+                    result = PosTagResult(tags=final_state['pos_tags'])
+
+                with self.metrics.stage("enqueue"):
+                    # Send the structured result back as a task artifact holding a DataPart
+                    await updater.add_artifact([to_data_part(result)], name="pos_tags")
+
+                    # Mark the task as completed
+                    await updater.update_status(TaskState.completed, final=True)
+
+            except Exception as e:
+                if request.cause is None:
+                    request.fail(type(e).__name__)
+                await updater.update_status(TaskState.failed, final=True)
+                raise RuntimeError(f"An error occurred during POS tagging: {e}")
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise NotImplementedError("Cancellation is not supported for this agent.")
+        # The request handler then cancels this task's execute(): a request
+        # attached to a shared single-flight call only detaches from it, and the
+        # call stops with its last waiter
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
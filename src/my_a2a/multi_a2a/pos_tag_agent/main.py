@@ -1,9 +1,12 @@
-# Standard FastAPI-based server for A2A
-import uvicorn
+# Server runtime: tuned uvicorn, optionally pre-forked into several workers
+from my_a2a.multi_a2a.common.idempotency import IdempotentRequestHandler
+from my_a2a.multi_a2a.common.push import WebhookDispatcher
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+from my_a2a.multi_a2a.common.tracing import setup_tracing
+from my_a2a.multi_a2a.common.warmup import WarmUp
 
 # Core A2A components for building agent servers
 from a2a.server.apps import A2AStarletteApplication
-from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 
 # A2A type definitions for agent capabilities and metadata
@@ -13,9 +16,13 @@ from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 from my_a2a.multi_a2a.pos_tag_agent.agent_executor import PosTagAgentExecutor
 
 
-def main():
+# Input of the synthetic request run through the agent at startup
+WARM_UP_TEXT = "The cat sat on the mat"
+
+
+def build_server(url: str = "http://localhost:8004/") -> A2AStarletteApplication:
     """
-    Sets up and runs an A2A-compliant POS tagging server.
+    Builds an A2A-compliant POS tagging server.
     This server can:
     1. Accept text input from other agents
     2. Return a list of part-of-speech tags
@@ -33,22 +40,41 @@ def main():
         ],
     )
 
+    # Many sentences in one task: a DataPart {"texts": [...]}, answered with a
+    # PosTagBatchResult holding one result or error per sentence, in order
+    batch_skill = AgentSkill(
+        id="pos_tagger_batch",
+        name="Batch POS Tagger",
+        description="Returns the part-of-speech tags for every text in a list, in order, with per-item errors.",
+        tags=["pos", "nlp", "tagging", "text", "batch"],
+        examples=['{"texts": ["The cat sat on the mat", "I am running"]}'],
+        input_modes=["application/json"],
+        output_modes=["application/json"],
+    )
+
     # Create the agent's "business card"
     agent_card = AgentCard(
         name="POS Tagger Agent",
         description="An agent that performs part-of-speech tagging on text.",
-        url="http://localhost:8004/",
+        url=url,
         defaultInputModes=["text"],
-        defaultOutputModes=["json"],
-        skills=[skill],
+        defaultOutputModes=["application/json"],
+        skills=[skill, batch_skill],
         version="1.0.0",
-        capabilities=AgentCapabilities(),
+        capabilities=AgentCapabilities(push_notifications=True),
     )
 
+    # Posts task updates to the webhooks of non-blocking callers (see common/push.py)
+    push_sender = WebhookDispatcher("pos")
+
     # Set up request handling
-    request_handler = DefaultRequestHandler(
+    # Retried messages get the original run's result (see common/idempotency.py)
+    request_handler = IdempotentRequestHandler(
+        "pos",
         agent_executor=PosTagAgentExecutor(),
         task_store=InMemoryTaskStore(),
+        push_config_store=push_sender.config_store,
+        push_sender=push_sender,
     )
 
     # Initialize the A2A server
@@ -57,7 +83,19 @@ def main():
         agent_card=agent_card,
     )
 
-    uvicorn.run(server.build(), host="0.0.0.0", port=8004)
+    return server
+
+
+def main():
+    # A2A_TRACE exports this agent's spans
+    setup_tracing("pos")
+    server = build_server()
+
+    # Serve /ready only after a synthetic request has gone through the agent
+    warm_up = WarmUp()
+    warm_up.add_agent("pos", server, WARM_UP_TEXT)
+
+    serve(warm_up.build(server), ServerSettings.from_env(port=8004, name="pos"))
 
 
 if __name__ == "__main__":
@@ -1,19 +1,49 @@
 # Below is the code from the file src/my_adk/simple_agent/sentiment_agent/agent.py
 
+from typing import List, Optional
+
 from google.adk.agents import Agent
-from my_adk.llm import model
+from my_a2a.llm.model import llm_complete_json
+from my_a2a.llm.routing import model_for
+from my_a2a.multi_a2a.common.batch import pack_prompt, unpack
+from my_a2a.multi_a2a.common.schemas import SentimentPack, SentimentResult
 
 # Initialize a simple sentiment analysis agent
 # Unlike stateful agents, this one processes each input independently
 # without maintaining conversation history or state
 agent = Agent(
     name="sentiment_agent",
-    model=model,
+    model=model_for("sentiment"),
     description="Sentiment Agent",
-    instruction="Analyze the sentiment of text inputs and return a JSON object with fields: 'sentiment' (one of 'POS', 'NEG', 'NEU'). For example: {'sentiment': 'POS'}. Do not return any other text or explanation, just the JSON object.",
+    # Native structured output: ADK passes the schema and JSON MIME type to the model
+    output_schema=SentimentResult,
+    # An agent with an output schema cannot transfer control to other agents
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    instruction="Analyze the sentiment of text inputs and return a JSON object with fields: 'sentiment' (one of 'POS', 'NEG', 'NEU') and 'confidence' (0 to 1). For example: {\"sentiment\": \"POS\", \"confidence\": 0.9}. Do not return any other text or explanation, just the JSON object.",
 )
 
 # ADK requires a root_agent to be defined
 # This is the entry point for message processing
 # When ADK receives a message, it starts with the root_agent
-root_agent = agent
\ No newline at end of file
+root_agent = agent
+
+
+async def sentiment_pack(texts: List[str]) -> List[Optional[SentimentResult]]:
+    """
+    Labels several texts with one LLM call (batch requests).
+
+    Returns:
+        One SentimentResult per text, in order; None where the model left a text out.
+    """
+    prompt = pack_prompt(
+        "Analyze the sentiment of each numbered text below. Return a JSON object whose "
+        "\"items\" list holds one object per text, with its \"index\", its \"sentiment\" "
+        "(one of 'POS', 'NEG', 'NEU') and a \"confidence\" (0 to 1).",
+        texts,
+    )
+    packed = await llm_complete_json(prompt, SentimentPack, llm=model_for("sentiment"))
+    return [
+        SentimentResult(sentiment=item.sentiment, confidence=item.confidence) if item else None
+        for item in unpack(packed.items, len(texts))
+    ]
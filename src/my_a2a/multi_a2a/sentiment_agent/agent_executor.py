@@ -1,11 +1,12 @@
 # A2A components for agent execution
-import re
+import uuid
+from contextlib import aclosing
+from typing import Optional
 from a2a.server.agent_execution import AgentExecutor
 from a2a.server.agent_execution.context import RequestContext
 from a2a.server.events.event_queue import EventQueue
-from a2a.utils import new_agent_parts_message
 from a2a.server.tasks import TaskUpdater
-from a2a.types import TaskState, Part, TextPart # Import new types
+from a2a.types import Part, TaskState, TextPart
 
 # ADK components for running the sentiment agent
 from google.adk.runners import Runner
@@ -13,7 +14,21 @@ from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
 # Import our pre-configured sentiment analysis agent
-from my_adk.simple_agent.sentiment_agent.agent import agent as sentiment_agent
+from my_a2a.multi_a2a.sentiment_agent.agent import agent as sentiment_agent, sentiment_pack
+from my_a2a.llm.json_repair import JSONRepairError, parse_model
+from my_a2a.multi_a2a.common.batch import batch_texts, run_batch
+from my_a2a.multi_a2a.common import semantic_cache
+from my_a2a.multi_a2a.common.metrics import AgentMetrics
+from my_a2a.multi_a2a.common.schemas import (
+    SentimentBatchItem,
+    SentimentBatchResult,
+    SentimentResult,
+    to_data_part,
+)
+from my_a2a.multi_a2a.common.single_flight import SingleFlight, normalize_key
+from my_a2a.multi_a2a.common.tracing import server_span, tracer
+from my_a2a.multi_a2a.common.warmup import is_warm_up
+from my_a2a.multi_a2a.sentiment_agent.document import Scorer, score_document
 
 
 class SentimentAgentExecutor(AgentExecutor):
@@ -26,7 +41,14 @@ class SentimentAgentExecutor(AgentExecutor):
     3. Returns results in A2A-compatible format
     """
     
-    def __init__(self):
+    def __init__(
+        self,
+        scorer: Optional[Scorer] = None,
+        document_threshold: int = 4000,
+        max_chunk_chars: int = 2000,
+        max_concurrency: int = 8,
+        pack_size: int = 16,
+    ):
         # Use our pre-configured sentiment analysis agent
         self.agent = sentiment_agent
         
@@ -36,80 +58,262 @@ class SentimentAgentExecutor(AgentExecutor):
         # Identifiers for this agent instance
         self.app_name = "sentiment_analysis_app"
         self.user_id = "default_user"
-        self.session_id = "default_session"
-        
-    async def execute(self, context: RequestContext, event_queue: EventQueue):
-        """
-         Processes incoming A2A requests through our sentiment analysis agent.
-        """
-        # Create a task updater to manage the task's state
-        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
 
-        # Update the task status to reflect the current state
-        if not context.current_task:
-            await updater.update_status(TaskState.submitted)
-        await updater.update_status(TaskState.working)
+        # Per-stage timers, in-flight and error counts, served on /metrics
+        self.metrics = AgentMetrics("sentiment")
 
-        # Initialize or get existing session
-        current_session = await self.session_service.create_session(
-            app_name=self.app_name,
-            user_id=self.user_id,
-            session_id=self.session_id
-        )
+        # The runner is stateless across sessions: build it once, not per request
+        with self.metrics.stage("runner_setup"):
+            self.runner = Runner(
+                agent=self.agent,
+                app_name=self.app_name,
+                session_service=self.session_service,
+            )
 
-        print(f"\n Session {current_session.id} created successfully.")
+        # Identical concurrent requests share one LLM call
+        self.single_flight = SingleFlight()
+        self.metrics.track_single_flight(self.single_flight)
 
-        # Extract the text to analyze from the A2A request
-        user_input_text = context.get_user_input()
+        # Near-duplicates of earlier inputs reuse their result (A2A_SEMANTIC_CACHE)
+        self.semantic_cache = semantic_cache.from_env("sentiment")
+
+        # Document mode: texts longer than document_threshold (or requests with
+        # metadata {"mode": "document"}) are chunked and scored concurrently.
+        # Chunks go through the LLM agent unless a local scorer is supplied.
+        self.scorer = scorer or self.score_chunk
+        self.document_threshold = document_threshold
+        self.max_chunk_chars = max_chunk_chars
+        self.max_concurrency = max_concurrency
+
+        # Batch requests: items run through the local scorer if there is one,
+        # otherwise pack_size at a time in one LLM prompt (pack_size=1: one call each)
+        self.local_scorer = scorer
+        self.pack_size = pack_size
+
+    async def analyze(self, text: str) -> str | None:
+        """
+        Runs the ADK sentiment agent on a text and returns its final response text.
+
+        Each call gets its own throwaway session, so concurrent requests never
+        see each other's history in the model context.
+        """
+        with self.metrics.stage("session"):
+            session = await self.session_service.create_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=str(uuid.uuid4()),
+            )
 
         # Format the input for our ADK agent
         content = types.Content(
             role="user",
-            parts=[types.Part(text=user_input_text)]
-        )
-
-        # Set up the ADK runner to process our request
-        runner = Runner(
-            agent=self.agent,
-            app_name=self.app_name,
-            session_service=self.session_service,
+            parts=[types.Part(text=text)]
         )
 
         final_response_text = None
+        try:
+            with self.metrics.stage("run"), tracer.start_as_current_span("adk.run"):
+                # The run is read to its end (the final response is its last event)
+                # and closed here even on cancellation: a generator left to the
+                # garbage collector ends its spans in the wrong context
+                async with aclosing(self.runner.run_async(
+                    user_id=self.user_id,
+                    session_id=session.id,
+                    new_message=content,
+                )) as events:
+                    async for event in events:
+                        if event.is_final_response():
+                            if event.content and event.content.parts:
+                                # Capture the full response text (JSON, thanks to the output schema)
+                                final_response_text = event.content.parts[0].text
+        finally:
+            await self.session_service.delete_session(
+                app_name=self.app_name,
+                user_id=self.user_id,
+                session_id=session.id,
+            )
+        return final_response_text
 
-        async for event in runner.run_async(
-            user_id=self.user_id,
-            session_id=self.session_id,
-            new_message=content,
-        ):
-            if event.is_final_response():
-                if event.content and event.content.parts:
-                    # Capture the full response text, which might include markdown fences
-                    final_response_text = event.content.parts[0].text
-                break
-
-        # Handle the response
+    async def analyze_and_cache(self, text: str) -> str | None:
+        """
+        analyze(), adding the result to the semantic cache: run once per
+        single-flight call, not by every request attached to it.
+        """
+        final_response_text = await self.analyze(text)
         if final_response_text is not None:
-            # Use a regex to clean the text from any JSON markdown fences
-            pattern = r"^```json\n|```$"
-            cleaned_json_string = re.sub(pattern, "", final_response_text, flags=re.MULTILINE).strip()
-
-            # Create a structured message using A2A parts
-            # Since the response is expected to be a JSON string, we create a TextPart
-            # and wrap it in a Part object to conform to the A2A message structure.
-            text_part = TextPart(text=cleaned_json_string)
-            parts = [Part(root=text_part)]
-
-            await event_queue.enqueue_event(
-                new_agent_parts_message(parts)
+            try:
+                result = parse_model(final_response_text, SentimentResult)
+            except JSONRepairError:
+                # Reported by each attached request
+                return final_response_text
+            await self.semantic_cache.put_async(text, result)
+        return final_response_text
+
+    async def classify(self, text: str) -> SentimentResult:
+        """Labels one text with the LLM agent, sharing identical in-flight calls."""
+        final_response_text = await self.single_flight.do(
+            normalize_key(text),
+            lambda: self.analyze(text),
+        )
+        if final_response_text is None:
+            raise RuntimeError("No final response received from the agent.")
+        return parse_model(final_response_text, SentimentResult)
+
+    async def score_chunk(self, text: str) -> str:
+        """Labels one chunk of a document with the LLM agent (the default document scorer)."""
+        return (await self.classify(text)).sentiment
+
+    async def score_locally(self, text: str) -> SentimentResult:
+        return SentimentResult(sentiment=await self.local_scorer(text))
+
+    def is_document(self, context: RequestContext, text: str) -> bool:
+        mode = (context.message.metadata or {}).get("mode") if context.message else None
+        return mode == "document" or len(text) > self.document_threshold
+
+    async def execute_document(self, text: str, updater: TaskUpdater):
+        """
+        Map-reduce path for long documents: scores chunks concurrently and
+        streams every segment as a working-status update as soon as it is done.
+        """
+        async def stream_segment(segment):
+            await updater.update_status(
+                TaskState.working,
+                message=updater.new_agent_message([to_data_part(segment)]),
             )
-            
-            # Mark the task as completed
-            await updater.update_status(TaskState.completed, final=True)
-        else:
+
+        try:
+            result = await score_document(
+                text,
+                self.scorer,
+                max_chars=self.max_chunk_chars,
+                max_concurrency=self.max_concurrency,
+                on_segment=stream_segment,
+            )
+        except Exception as e:
             await updater.update_status(TaskState.failed, final=True)
-            raise RuntimeError("No final response received from the agent.")
+            raise RuntimeError(f"Document sentiment analysis failed: {e}")
+
+        await updater.add_artifact([to_data_part(result)], name="sentiment")
+        await updater.update_status(TaskState.completed, final=True)
+
+    async def execute_batch(self, texts: list, updater: TaskUpdater):
+        """
+        Batch path: labels every text of the request and ships them as one
+        ordered SentimentBatchResult, with per-item errors.
+        """
+        if self.local_scorer is not None:
+            outcomes = await run_batch(
+                "sentiment",
+                texts,
+                self.score_locally,
+                max_concurrency=self.max_concurrency,
+                cache=self.semantic_cache,
+            )
+        else:
+            outcomes = await run_batch(
+                "sentiment",
+                texts,
+                self.classify,
+                process_pack=sentiment_pack,
+                pack_size=self.pack_size,
+                max_concurrency=self.max_concurrency,
+                cache=self.semantic_cache,
+            )
+        result = SentimentBatchResult(items=[
+            SentimentBatchItem(index=index, result=item, error=error)
+            for index, (item, error) in enumerate(outcomes)
+        ])
+        with self.metrics.stage("enqueue"):
+            await updater.add_artifact([to_data_part(result)], name="sentiment")
+            await updater.update_status(TaskState.completed, final=True)
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue):
+        """
+         Processes incoming A2A requests through our sentiment analysis agent.
+        """
+        # The startup warm-up request is left out of the metrics (and caches)
+        warm_up = is_warm_up(context.message)
+        with self.metrics.request(record=not warm_up) as request, server_span("sentiment", context.message):
+            # Create a task updater to manage the task's state
+            updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+
+            # Update the task status to reflect the current state
+            if not context.current_task:
+                await updater.update_status(TaskState.submitted)
+            await updater.update_status(TaskState.working)
+
+            # A DataPart {"texts": [...]} asks for a batch
+            try:
+                texts = batch_texts(context.message)
+            except ValueError as e:
+                request.fail("bad_batch")
+                await updater.update_status(
+                    TaskState.failed,
+                    message=updater.new_agent_message([Part(root=TextPart(text=str(e)))]),
+                    final=True,
+                )
+                raise RuntimeError(f"Invalid batch request: {e}")
+            if texts is not None:
+                with self.metrics.stage("batch"):
+                    await self.execute_batch(texts, updater)
+                return
+
+            # Extract the text to analyze from the A2A request
+            user_input_text = context.get_user_input()
+
+            # Long documents take the map-reduce path
+            if self.is_document(context, user_input_text):
+                try:
+                    await self.execute_document(user_input_text, updater)
+                except Exception:
+                    request.fail("document")
+                    raise
+                return
+
+            # A near-duplicate of an earlier input gets its result
+            if self.semantic_cache is not None and not warm_up:
+                with self.metrics.stage("cache"):
+                    cached = await self.semantic_cache.lookup_async(user_input_text)
+                if cached is not None:
+                    with self.metrics.stage("enqueue"):
+                        await updater.add_artifact([to_data_part(cached)], name="sentiment")
+                        await updater.update_status(TaskState.completed, final=True)
+                    return
+
+            # Attach to an identical in-flight analysis if there is one
+            analyze = self.analyze if self.semantic_cache is None or warm_up else self.analyze_and_cache
+            final_response_text = await self.single_flight.do(
+                normalize_key(user_input_text),
+                lambda: analyze(user_input_text),
+            )
+
+            # Handle the response
+            if final_response_text is not None:
+                # Validate once here, at the source, against the declared schema.
+                # The repair parser only kicks in if the model ignored the schema.
+                try:
+                    with self.metrics.stage("parse"):
+                        result = parse_model(final_response_text, SentimentResult)
+                except JSONRepairError as e:
+                    request.fail("schema")
+                    await updater.update_status(TaskState.failed, final=True)
+                    raise RuntimeError(f"Sentiment response does not match schema: {e}")
+
+                with self.metrics.stage("enqueue"):
+                    # Ship the typed result as a task artifact holding a DataPart
+                    await updater.add_artifact([to_data_part(result)], name="sentiment")
+
+                    # Mark the task as completed
+                    await updater.update_status(TaskState.completed, final=True)
+            else:
+                request.fail("no_response")
+                await updater.update_status(TaskState.failed, final=True)
+                raise RuntimeError("No final response received from the agent.")
 
 
     async def cancel(self, context: RequestContext, event_queue: EventQueue):
-        raise NotImplementedError("Cancellation is not supported for sentiment analysis agent.")
+        # The request handler then cancels this task's execute(): a request
+        # attached to a shared single-flight call only detaches from it, and the
+        # call stops with its last waiter
+        updater = TaskUpdater(event_queue, context.task_id, context.context_id)
+        await updater.update_status(TaskState.canceled, final=True)
@@ -0,0 +1,121 @@
+# Map-reduce sentiment for long documents.
+# The text is split into bounded chunks, the chunks are scored concurrently by
+# any async scorer (the LLM agent or a local model), and the per-chunk labels
+# are reduced into one overall label. Framework-agnostic: no A2A or ADK here.
+import asyncio
+import re
+from typing import Awaitable, Callable, List, Optional
+
+from my_a2a.multi_a2a.common.schemas import DocumentSentimentResult, SegmentSentiment
+
+# Scorer: takes a chunk of text, returns "POS", "NEG" or "NEU"
+Scorer = Callable[[str], Awaitable[str]]
+
+_SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+_LABEL_SCORES = {"POS": 1.0, "NEU": 0.0, "NEG": -1.0}
+
+
+def split_text(text: str, max_chars: int = 2000) -> List[tuple[int, int]]:
+    """
+    Splits text into chunks of at most `max_chars`, preferring sentence and
+    paragraph boundaries.
+
+    Args:
+        text: The document to split.
+        max_chars: Upper bound on the length of a chunk.
+
+    Returns:
+        A list of (start, end) character spans covering the text in order.
+    """
+    boundaries = [match.end() for match in _SENTENCE_END_PATTERN.finditer(text)] + [len(text)]
+
+    spans = []
+    start = 0
+    last_boundary = 0
+    for boundary in boundaries:
+        if boundary - start > max_chars and last_boundary > start:
+            spans.append((start, last_boundary))
+            start = last_boundary
+        # A single sentence longer than the limit is cut hard
+        while boundary - start > max_chars:
+            spans.append((start, start + max_chars))
+            start += max_chars
+        last_boundary = boundary
+    if start < len(text):
+        spans.append((start, len(text)))
+
+    # Whitespace-only chunks carry no sentiment
+    return [(s, e) for s, e in spans if text[s:e].strip()]
+
+
+def reduce_segments(segments: List[SegmentSentiment], threshold: float = 0.2) -> str:
+    """
+    Reduces per-segment labels into an overall label.
+
+    Each segment votes with its length as weight; the weighted mean score
+    (POS=+1, NEU=0, NEG=-1) beyond +/- threshold decides the label.
+    """
+    total = sum(segment.end - segment.start for segment in segments)
+    if not total:
+        return "NEU"
+    score = sum(
+        _LABEL_SCORES[segment.sentiment] * (segment.end - segment.start)
+        for segment in segments
+    ) / total
+    if score > threshold:
+        return "POS"
+    if score < -threshold:
+        return "NEG"
+    return "NEU"
+
+
+async def score_document(
+    text: str,
+    scorer: Scorer,
+    max_chars: int = 2000,
+    max_concurrency: int = 8,
+    on_segment: Optional[Callable[[SegmentSentiment], Awaitable[None]]] = None,
+) -> DocumentSentimentResult:
+    """
+    Scores a long document chunk by chunk, concurrently.
+
+    Latency is bounded by ceil(chunks / max_concurrency) scorer round trips
+    rather than by the document length.
+
+    Args:
+        text: The document to score.
+        scorer: Async callable labelling one chunk.
+        max_chars: Upper bound on the length of a chunk.
+        max_concurrency: How many chunks are scored at the same time.
+        on_segment: Optional async callback invoked with each segment as soon
+            as it is scored (in completion order), e.g. to stream partial results.
+
+    Returns:
+        The overall label and the per-segment breakdown in document order.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def score(index: int, start: int, end: int) -> SegmentSentiment:
+        async with semaphore:
+            label = await scorer(text[start:end])
+        return SegmentSentiment(index=index, start=start, end=end, sentiment=label)
+
+    tasks = [
+        asyncio.ensure_future(score(index, start, end))
+        for index, (start, end) in enumerate(split_text(text, max_chars))
+    ]
+    segments = []
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            segment = await next_done
+            segments.append(segment)
+            if on_segment is not None:
+                await on_segment(segment)
+    finally:
+        # On failure or cancellation, don't leave chunks running in the background
+        for task in tasks:
+            task.cancel()
+
+    segments.sort(key=lambda segment: segment.index)
+    return DocumentSentimentResult(sentiment=reduce_segments(segments), segments=segments)
@@ -1,21 +1,28 @@
-# Standard FastAPI-based server for A2A
-import uvicorn
+# Server runtime: tuned uvicorn, optionally pre-forked into several workers
+from my_a2a.multi_a2a.common.runtime import ServerSettings, serve
+from my_a2a.multi_a2a.common.tracing import setup_tracing
+from my_a2a.multi_a2a.common.warmup import WarmUp
 
 # Core A2A components for building agent servers
 from a2a.server.apps import A2AStarletteApplication  # Base server application
-from a2a.server.request_handlers import DefaultRequestHandler  # Handles incoming requests
+from my_a2a.multi_a2a.common.idempotency import IdempotentRequestHandler  # Handles incoming requests, once per message
+from my_a2a.multi_a2a.common.push import WebhookDispatcher  # Delivers push notifications to webhooks
 from a2a.server.tasks import InMemoryTaskStore  # Stores task states temporarily
 
 # A2A type definitions for agent capabilities and metadata
 from a2a.types import AgentCapabilities, AgentCard, AgentSkill
 
 # Our custom agent implementation
-from my_a2a.simple_a2a.agent_executor import SentimentAgentExecutor
+from my_a2a.multi_a2a.sentiment_agent.agent_executor import SentimentAgentExecutor
 
 
-def main():
+# Input of the synthetic request run through the agent at startup
+WARM_UP_TEXT = "The weather is great today!"
+
+
+def build_server(url: str = "http://localhost:8003/") -> A2AStarletteApplication:
     """
-    Sets up and runs an A2A-compliant sentiment analysis server.
+    Builds an A2A-compliant sentiment analysis server.
     This server can:
     1. Accept text input from other agents
     2. Return sentiment analysis results
@@ -31,24 +38,43 @@ def main():
         examples=["POS", "NEG", "NEU"],
     )
 
+    # Many texts in one task: a DataPart {"texts": [...]}, answered with a
+    # SentimentBatchResult holding one result or error per text, in order
+    batch_skill = AgentSkill(
+        id="sentiment_batch",
+        name="Batch Sentiment Analysis",
+        description="Return the sentiment of every text in a list, in order, with per-item errors",
+        tags=["sentiment analysis", "text", "batch"],
+        examples=['{"texts": ["I love it", "The food was cold"]}'],
+        input_modes=["application/json"],
+        output_modes=["application/json"],
+    )
+
     # Create the agent's "business card"
     # This tells other agents everything they need to know about our capabilities
     agent_card = AgentCard(
         name="Sentiment Analysis Agent",  # Agent's name
         description="A simple agent that returns the sentiment of the input text.",
-        url="http://localhost:8003/",     # Where to find this agent
+        url=url,                          # Where to find this agent
         defaultInputModes=["text"],       # What input we accept
-        defaultOutputModes=["text"],      # What output we provide
-        skills=[skill],                   # What we can do
+        defaultOutputModes=["application/json"],  # Structured SentimentResult
+        skills=[skill, batch_skill],      # What we can do
         version="1.0.0",                  # For compatibility checking
-        capabilities=AgentCapabilities(), # Additional features (none needed here)
+        capabilities=AgentCapabilities(push_notifications=True),  # Results can be pushed to a webhook
     )
 
+    # Posts task updates to the webhooks of non-blocking callers (see common/push.py)
+    push_sender = WebhookDispatcher("sentiment")
+
     # Set up request handling
     # This connects incoming requests to our agent's logic
-    request_handler = DefaultRequestHandler(
+    # Retried messages get the original run's result (see common/idempotency.py)
+    request_handler = IdempotentRequestHandler(
+        "sentiment",
         agent_executor=SentimentAgentExecutor(),  # Our custom agent logic
         task_store=InMemoryTaskStore(),          # Temporary task storage
+        push_config_store=push_sender.config_store,
+        push_sender=push_sender,
     )
 
     # Initialize the A2A server
@@ -58,7 +84,19 @@ def main():
         agent_card=agent_card,        # Exposes our capabilities
     )
 
-    uvicorn.run(server.build(), host="0.0.0.0", port=8003)
+    return server
+
+
+def main():
+    # A2A_TRACE exports this agent's spans
+    setup_tracing("sentiment")
+    server = build_server()
+
+    # Serve /ready only after a synthetic request has gone through the agent
+    warm_up = WarmUp()
+    warm_up.add_agent("sentiment", server, WARM_UP_TEXT)
+
+    serve(warm_up.build(server), ServerSettings.from_env(port=8003, name="sentiment"))
 
 
 if __name__ == "__main__":
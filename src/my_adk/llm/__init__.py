@@ -1,3 +1,3 @@
-from .model import model
+from .model import get_model
 
-__all__ = ['model']
+__all__ = ['get_model']
@@ -0,0 +1,262 @@
+# Record/replay model wrapper for deterministic performance runs.
+# In record mode every request/response pair that goes through the wrapped
+# model is appended to a cassette: one compact JSON line per interaction,
+# holding each response chunk with its offset from the start of the request.
+# In replay mode the cassette answers instead of the model, with the original
+# chunk timing (optionally scaled) and no network access.
+#
+# Usable anywhere a model object is, e.g. CassetteLlm(inner=model, path=...),
+# or for every model of a process via the environment:
+#   A2A_LLM_CASSETTE=traces/prod.jsonl.gz A2A_LLM_CASSETTE_MODE=record python -m my_a2a.multi_a2a.host
+#   A2A_LLM_CASSETTE=traces/prod.jsonl.gz A2A_LLM_CASSETTE_SCALE=0 python benchmarks/components.py
+#
+# Each recording process writes its own shard next to the cassette
+# (traces/prod.<pid>.jsonl.gz), so pre-forked workers never interleave writes;
+# loading a cassette merges it with all its shards. A shard whose process was
+# killed mid-write is read up to its last complete line.
+import asyncio
+import atexit
+import glob
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from typing import Any, AsyncGenerator, Literal, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import BaseModel, PrivateAttr
+
+
+class CassetteMiss(LookupError):
+    """Raised in replay mode when the cassette holds no response for a request."""
+
+
+def _strip_ids(value: Any) -> Any:
+    # ADK gives function calls and responses fresh ids on every run
+    if isinstance(value, dict):
+        return {key: _strip_ids(item) for key, item in value.items() if key != "id"}
+    if isinstance(value, list):
+        return [_strip_ids(item) for item in value]
+    return value
+
+
+def request_key(llm_request: LlmRequest) -> str:
+    """
+    A stable hash of what determines a model's answer: model name, contents,
+    system instruction, output schema and MIME type, and the declared tools.
+    """
+    config = llm_request.config
+    schema = config.response_schema if config else None
+    if isinstance(schema, type) and issubclass(schema, BaseModel):
+        schema = schema.__name__
+    elif schema is not None and hasattr(schema, "model_dump"):
+        schema = schema.model_dump(mode="json", exclude_none=True)
+    tools = sorted(
+        declaration.name
+        for tool in (config.tools or [] if config else [])
+        for declaration in (getattr(tool, "function_declarations", None) or [])
+    )
+    system_instruction = config.system_instruction if config else None
+    if system_instruction is not None and not isinstance(system_instruction, str):
+        system_instruction = json.dumps(_strip_ids(system_instruction.model_dump(mode="json", exclude_none=True)))
+    material = {
+        "model": llm_request.model,
+        "contents": [_strip_ids(content.model_dump(mode="json", exclude_none=True)) for content in llm_request.contents],
+        "system_instruction": system_instruction,
+        "response_mime_type": config.response_mime_type if config else None,
+        "response_schema": schema,
+        "tools": tools,
+    }
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()[:32]
+
+
+_SUFFIXES = (".jsonl.gz", ".jsonl", ".gz")
+
+
+def _split(path: str) -> tuple[str, str]:
+    """A cassette path as (path without its suffix, suffix)."""
+    for suffix in _SUFFIXES:
+        if path.endswith(suffix):
+            return path[: -len(suffix)], suffix
+    return path, ""
+
+
+def shard_path(path: str, pid: int) -> str:
+    """The file a process records to: prod.jsonl.gz -> prod.<pid>.jsonl.gz."""
+    stem, suffix = _split(path)
+    return f"{stem}.{pid}{suffix}"
+
+
+def cassette_files(path: str) -> list[str]:
+    """The cassette file itself, if present, and all its recording shards."""
+    stem, suffix = _split(path)
+    shards = [
+        shard
+        for shard in glob.glob(f"{glob.escape(stem)}.*{suffix}")
+        if shard[len(stem) + 1 : len(shard) - len(suffix)].isdigit()
+    ]
+    return ([path] if os.path.exists(path) else []) + sorted(shards)
+
+
+def _open(path: str, mode: str):
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+class Cassette:
+    """
+    The on-disk store: JSON lines, gzip-compressed when the path ends in .gz.
+
+    Identical requests recorded several times are replayed in recording order,
+    wrapping around once every recording has been served.
+    """
+
+    def __init__(self, path: str, mode: Literal["record", "replay"]):
+        self.path = path
+        self.mode = mode
+        self.interactions: dict[str, list[dict]] = defaultdict(list)
+        self._cursor: dict[str, int] = defaultdict(int)
+        self._file = None
+        self._file_pid: Optional[int] = None
+        files = cassette_files(path)
+        for file in files:
+            self._load(file)
+        if not files and mode == "replay":
+            raise FileNotFoundError(f"No cassette at {path}")
+
+    def _load(self, file: str) -> None:
+        try:
+            with _open(file, "rt") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    try:
+                        interaction = json.loads(line)
+                    except json.JSONDecodeError:
+                        # The cut-off last line of a killed recorder
+                        continue
+                    self.interactions[interaction["key"]].append(interaction)
+        except EOFError:
+            # A gzip shard whose recorder was killed before closing it
+            pass
+
+    def next(self, key: str) -> Optional[dict]:
+        recordings = self.interactions.get(key)
+        if not recordings:
+            return None
+        index = self._cursor[key] % len(recordings)
+        self._cursor[key] += 1
+        return recordings[index]
+
+    def append(self, interaction: dict) -> None:
+        self.interactions[interaction["key"]].append(interaction)
+        # A pre-forked worker records to its own shard, not its parent's
+        if self._file is None or self._file_pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file_pid = os.getpid()
+            self._file = _open(shard_path(self.path, self._file_pid), "at")
+            # gzip only writes its end-of-stream marker on close
+            atexit.register(self.close)
+        self._file.write(json.dumps(interaction, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None and self._file_pid == os.getpid():
+            self._file.close()
+        self._file = None
+
+
+# One store per path, shared by every wrapper writing to or reading from it
+_cassettes: dict[str, Cassette] = {}
+
+
+def open_cassette(path: str, mode: Literal["record", "replay"]) -> Cassette:
+    path = os.path.abspath(path)
+    if path not in _cassettes:
+        _cassettes[path] = Cassette(path, mode)
+    return _cassettes[path]
+
+
+class CassetteLlm(BaseLlm):
+    """
+    Wraps a model to record its traffic to, or replay it from, a cassette.
+
+    In replay mode a request the cassette does not know raises CassetteMiss,
+    unless an `inner` model is given, which then answers it live.
+    `time_scale` multiplies the recorded chunk timings on replay (0 = instant).
+    """
+    inner: Optional[BaseLlm] = None
+    path: str
+    mode: Literal["record", "replay"] = "replay"
+    time_scale: float = 1.0
+
+    _cassette: Cassette = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        if self.mode == "record" and self.inner is None:
+            raise ValueError("Recording needs an inner model")
+        self._cassette = open_cassette(self.path, self.mode)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(llm_request)
+
+        if self.mode == "replay":
+            interaction = self._cassette.next(key)
+            if interaction is not None:
+                elapsed = 0.0
+                for chunk in interaction["chunks"]:
+                    delay = (chunk["t"] - elapsed) * self.time_scale
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    elapsed = chunk["t"]
+                    yield LlmResponse.model_validate(chunk["response"])
+                return
+            if self.inner is None:
+                raise CassetteMiss(f"No recorded response for request {key} in {self.path}")
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                yield response
+            return
+
+        started = time.perf_counter()
+        chunks = []
+        try:
+            async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                # Serialized before ADK post-processes (and mutates) the response
+                chunks.append({
+                    "t": round(time.perf_counter() - started, 4),
+                    "response": response.model_dump(mode="json", exclude_none=True),
+                })
+                yield response
+        finally:
+            # A caller that stops early has seen every chunk it needed
+            if chunks:
+                self._cassette.append({"key": key, "model": llm_request.model, "stream": stream, "chunks": chunks})
+
+
+def cassette_from_env(llm: Optional[BaseLlm], model_name: str) -> Optional[BaseLlm]:
+    """
+    Wraps `llm` in a CassetteLlm when A2A_LLM_CASSETTE names a cassette file.
+
+    A2A_LLM_CASSETTE_MODE is "replay" (default) or "record";
+    A2A_LLM_CASSETTE_SCALE scales replayed timings (default 1.0).
+    """
+    path = os.getenv("A2A_LLM_CASSETTE")
+    if not path:
+        return llm
+    mode = os.getenv("A2A_LLM_CASSETTE_MODE", "replay")
+    return CassetteLlm(
+        model=model_name,
+        # Replay never touches the network, so the live model is left out
+        inner=llm if mode == "record" else None,
+        path=path,
+        mode=mode,
+        time_scale=float(os.getenv("A2A_LLM_CASSETTE_SCALE", "1.0")),
+    )
@@ -1,8 +1,4 @@
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # from google.adk.models.lite_llm import LiteLlm
 # Initialize the LiteLlm model with the Groq API key and base URL
@@ -11,8 +7,29 @@ load_dotenv()
 #     api_key=os.getenv("GROQ_API_KEY"),
 # )
 
-from google.adk.models.google_llm import Gemini
-model = Gemini(
-    model="gemini-2.0-flash",
-    api_key=os.getenv("GEMINI_API_KEY")
-)
\ No newline at end of file
+
+def get_model():
+    """Returns the Gemini model, constructing it (and loading .env) on first use."""
+    global model
+    if "model" not in globals():
+        from dotenv import load_dotenv
+        from google.adk.models.google_llm import Gemini
+        from my_adk.llm.cassette import cassette_from_env
+        from my_adk.llm.stub import stub_from_env
+
+        # Load environment variables from .env file
+        load_dotenv()
+        # A2A_STUB_LLM swaps in the offline stub model (e.g. to benchmark the
+        # front door), A2A_LLM_CASSETTE records the model's traffic or replays it
+        model = cassette_from_env(stub_from_env("gemini-2.0-flash") or Gemini(
+            model="gemini-2.0-flash",
+            api_key=os.getenv("GEMINI_API_KEY")
+        ), "gemini-2.0-flash")
+    return model
+
+
+def __getattr__(name: str):
+    # `from my_adk.llm.model import model` keeps working, lazily
+    if name == "model":
+        return get_model()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
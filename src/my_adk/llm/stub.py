@@ -0,0 +1,186 @@
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Any, AsyncGenerator, Callable, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+from pydantic import BaseModel, PrivateAttr
+
+# Ways a model answering in prose mode tends to mangle JSON, and how each one renders
+DEFECTS = {
+    "fence": lambda text, value: f"```json\n{text}\n```",
+    "prose": lambda text, value: f"Here is the JSON you asked for:\n{text}\nLet me know if you need more.",
+    "single_quotes": lambda text, value: repr(value),
+    "trailing_comma": lambda text, value: text[:-1] + "," + text[-1:],
+    "truncated": lambda text, value: text[: max(1, int(len(text) * 0.8))],
+    "refusal": lambda text, value: "Sorry, I can only describe the result in words.",
+}
+
+
+def prompt_text(llm_request: LlmRequest) -> str:
+    """Returns the text of the last user turn of a request."""
+    for content in reversed(llm_request.contents or []):
+        if content.role == "user" and content.parts:
+            return "".join(part.text or "" for part in content.parts)
+    return ""
+
+
+_POSITIVE_PATTERN = re.compile(r"\b(love|great|good|happy|fantastic|excellent|fine)\b", re.IGNORECASE)
+_NEGATIVE_PATTERN = re.compile(r"\b(hate|bad|awful|slow|cold|terrible|sad|poor)\b", re.IGNORECASE)
+_QUOTED_TEXT_PATTERN = re.compile(r'Text: "(.*)"', re.DOTALL)
+_AGENT_LINE_PATTERN = re.compile(r"^- (\w+)$", re.MULTILINE)
+_PLAN_INPUT_PATTERN = re.compile(r'Now, given the user request:\s*"(.*)"', re.DOTALL)
+_QUOTED_INPUT_PATTERN = re.compile(r"[\"'‘“](.{3,}?)[\"'’”]")
+_PLANNABLE_AGENTS = ("sentiment", "pos")
+_PACKED_ITEM_PATTERN = re.compile(r"^\[(\d+)\] (.*)$", re.MULTILINE)
+
+
+def _sentiment(text: str) -> dict:
+    positive = len(_POSITIVE_PATTERN.findall(text))
+    negative = len(_NEGATIVE_PATTERN.findall(text))
+    label = "POS" if positive > negative else "NEG" if negative > positive else "NEU"
+    return {"sentiment": label, "confidence": 0.9}
+
+
+def _pos_tags(text: str) -> list[dict]:
+    return [{"word": word, "tag": "NN"} for word in text.split()]
+
+
+def canned_response(prompt: str, schema: Optional[type] = None) -> Any:
+    """
+    A plausible answer for each of the repo's prompts, keyed on the requested
+    response schema: a sentiment label from keywords, naive POS tags, a plan
+    over the sentiment and POS agents, or a greeting when no schema is set.
+    Packed prompts (numbered batch items) get one answer per item.
+    """
+    name = schema.__name__ if isinstance(schema, type) and issubclass(schema, BaseModel) else None
+    if name == "SentimentResult":
+        return _sentiment(prompt)
+    if name == "PosTagResult":
+        quoted = _QUOTED_TEXT_PATTERN.search(prompt)
+        return {"tags": _pos_tags(quoted.group(1) if quoted else prompt)}
+    if name == "SentimentPack":
+        return {"items": [
+            {"index": int(index), **_sentiment(text)} for index, text in _PACKED_ITEM_PATTERN.findall(prompt)
+        ]}
+    if name == "PosTagPack":
+        return {"items": [
+            {"index": int(index), "tags": _pos_tags(text)} for index, text in _PACKED_ITEM_PATTERN.findall(prompt)
+        ]}
+    if name == "Plan":
+        agents = [agent for agent in _AGENT_LINE_PATTERN.findall(prompt) if agent in _PLANNABLE_AGENTS]
+        request = _PLAN_INPUT_PATTERN.search(prompt)
+        text = request.group(1) if request else prompt
+        # Like a real planner, hand the sub-agents only the quoted text if there is one
+        quoted = _QUOTED_INPUT_PATTERN.search(text)
+        text = quoted.group(1) if quoted else text
+        return {"steps": [{"agent": agent, "input": text} for agent in agents]}
+    if name is not None:
+        return {}
+    return "Hello! It's nice to hear from you."
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class StubLlm(BaseLlm):
+    """
+    Deterministic, offline stand-in for the Gemini model.
+
+    Answers every request with `responder(prompt)` serialized as JSON (or
+    canned_response() when no responder is given). When the request does not
+    ask for JSON output (prose mode), a seeded fraction of replies is mangled
+    the way real models mangle "strict JSON" instructions, which makes parse
+    failures reproducible without network access.
+
+    Timing follows a real model: `latency` seconds to the first token, then
+    `tokens_per_second` for the rest (0 means instantaneous). Streaming
+    requests receive one partial response per token chunk, then the full one.
+    """
+    model: str = "stub"
+    responder: Optional[Callable[[str], Any]] = None
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    prose_defect_rate: float = 0.0
+    json_defect_rate: float = 0.0
+    seed: int = 0
+
+    _rng: random.Random = PrivateAttr()
+    _calls: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def calls(self) -> int:
+        """Number of requests served so far."""
+        return self._calls
+
+    def render(self, value: Any, json_mode: bool) -> str:
+        """Serializes a response value, injecting a defect at the configured rate."""
+        if isinstance(value, str):
+            # Plain prose (e.g. a greeting) is returned as-is
+            return value
+        text = json.dumps(value)
+        rate = self.json_defect_rate if json_mode else self.prose_defect_rate
+        if self._rng.random() >= rate:
+            return text
+        # A model honoring a JSON MIME type can still be cut off, but never adds prose
+        defect = "truncated" if json_mode else self._rng.choice(sorted(DEFECTS))
+        return DEFECTS[defect](text, value)
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self._calls += 1
+        config = llm_request.config
+        json_mode = config is not None and config.response_mime_type == "application/json"
+        prompt = prompt_text(llm_request)
+        if self.responder is not None:
+            value = self.responder(prompt)
+        else:
+            value = canned_response(prompt, config.response_schema if config else None)
+        text = self.render(value, json_mode)
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        output_tokens = estimate_tokens(text)
+        if stream:
+            # Roughly four characters per token, a few tokens per chunk
+            chunk_chars = 16
+            for start in range(0, len(text), chunk_chars):
+                if self.tokens_per_second:
+                    await asyncio.sleep(estimate_tokens(text[start:start + chunk_chars]) / self.tokens_per_second)
+                yield LlmResponse(
+                    content=types.Content(role="model", parts=[types.Part(text=text[start:start + chunk_chars])]),
+                    partial=True,
+                )
+        elif self.tokens_per_second:
+            await asyncio.sleep(output_tokens / self.tokens_per_second)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[types.Part(text=text)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=estimate_tokens(prompt),
+                candidates_token_count=output_tokens,
+                total_token_count=estimate_tokens(prompt) + output_tokens,
+            ),
+        )
+
+
+def stub_from_env(model_name: str) -> Optional[StubLlm]:
+    """
+    Returns a StubLlm standing in for `model_name` when A2A_STUB_LLM is set,
+    so servers can run offline (benchmarks, load tests). The variable is "1"
+    or a JSON object of StubLlm settings, e.g. {"latency": 0.2, "tokens_per_second": 80}.
+    """
+    setting = os.getenv("A2A_STUB_LLM")
+    if not setting or setting == "0":
+        return None
+    options = json.loads(setting) if setting.strip().startswith("{") else {}
+    return StubLlm(model=model_name, **options)
@@ -1,14 +1,28 @@
+from typing import Literal
+
 from google.adk.agents import Agent
-from my_adk.llm import model
+from pydantic import BaseModel
+from my_adk.llm import get_model
+
+
+class SentimentOutput(BaseModel):
+    """Structured output of the sentiment agent."""
+    sentiment: Literal["POS", "NEG", "NEU"]
+
 
 # Initialize a simple sentiment analysis agent
 # Unlike stateful agents, this one processes each input independently
 # without maintaining conversation history or state
 agent = Agent(
     name="sentiment_agent",
-    model=model,
+    model=get_model(),
     description="Sentiment Agent",
-    instruction="Analyze the sentiment of text inputs and return a JSON object with fields: 'sentiment' (one of 'POS', 'NEG', 'NEU'). For example: {'sentiment': 'POS'}. Do not return any other text or explanation, just the JSON object.",
+    # Native structured output: ADK passes the schema and JSON MIME type to the model
+    output_schema=SentimentOutput,
+    # An agent with an output schema cannot transfer control to other agents
+    disallow_transfer_to_parent=True,
+    disallow_transfer_to_peers=True,
+    instruction="Analyze the sentiment of text inputs and return a JSON object with fields: 'sentiment' (one of 'POS', 'NEG', 'NEU'). For example: {\"sentiment\": \"POS\"}. Do not return any other text or explanation, just the JSON object.",
 )
 
 # ADK requires a root_agent to be defined
@@ -1 +1 @@
-from .agent import agent
\ No newline at end of file
+from .agent import agent, initial_state
\ No newline at end of file
@@ -1,5 +1,5 @@
 from google.adk.agents import Agent
-from my_adk.llm import model
+from my_adk.llm import get_model
 from datetime import datetime
 import pytz
 
@@ -9,6 +9,24 @@ def get_current_time():
     current_time = datetime.now(ist)
     return current_time.strftime("%Y-%m-%d %H:%M:%S %Z")
 
+def initial_state():
+    """The state a new expense session starts with: no expenses, every category at zero"""
+    return {
+        "state": {  # Nested under 'state' key as per ADK conventions
+            "expenses": [],  # Chronological list of all transactions
+            "categories": {  # Pre-defined expense categories with running totals
+                "food": 0.0,
+                "entertainment": 0.0,
+                "transportation": 0.0,
+                "shopping": 0.0,
+                "utilities": 0.0,
+                "others": 0.0  # Catch-all for miscellaneous expenses
+            },
+            "total_expenses": 0.0,  # Aggregate total across all categories
+            "last_updated": None    # Tracks most recent transaction timestamp
+        }
+    }
+
 class ExpenseManagerAgent(Agent):
     """
     Custom Agent for managing expenses. Extends ADK's Agent class to:
@@ -32,7 +50,7 @@ class ExpenseManagerAgent(Agent):
 # 4. instruction: Detailed instructions for how the agent should process inputs and format outputs
 agent = ExpenseManagerAgent(
     name="expense_manager_agent",
-    model=model,
+    model=get_model(),
     description="Expense Manager Agent",
     instruction="""Process expense-related queries using state dictionary.
 
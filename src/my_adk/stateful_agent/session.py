@@ -1,7 +1,7 @@
 # Core ADK components for building stateful agents
 from google.adk.sessions import InMemorySessionService  # Manages state persistence (in-memory for development)
 from google.adk.runners import Runner  # Orchestrates agent execution and state management
-from my_adk.stateful_agent.expense_manager_agent import expense_manager_agent  # Our custom expense tracking agent
+from my_adk.stateful_agent.expense_manager_agent import agent as expense_manager_agent, initial_state  # Our custom expense tracking agent
 from google.genai import types  # Structures for agent-user communication
 import asyncio  # Required for ADK's async operations
 
@@ -19,6 +19,16 @@ async def main():
     session_service_stateful = InMemorySessionService()
     input_text = None  # Controls the main interaction loop
 
+    # Initialize ADK Runner once, shared by every query and session:
+    # - Manages the lifecycle of agent interactions
+    # - Handles state updates automatically
+    # - Processes messages between user and agent
+    runner = Runner(
+        agent=expense_manager_agent,          # Our custom ExpenseManagerAgent
+        app_name="expense_manager_app",       # Must match session app_name
+        session_service=session_service_stateful,  # For state persistence
+    )
+
     # Main interaction loop - continues until user types 'exit'
     while input_text != "exit":
         print("\n=== New Query ===")
@@ -49,22 +59,8 @@ async def main():
                     app_name="expense_manager_app",
                     user_id=query_user_id,
                     session_id=query_session_id,
-                    # Initial state structure that our agent expects:
-                    state={
-                        "state": {  # Nested under 'state' key as per ADK conventions
-                            "expenses": [],  # Chronological list of all transactions
-                            "categories": {  # Pre-defined expense categories with running totals
-                                "food": 0.0,
-                                "entertainment": 0.0,
-                                "transportation": 0.0,
-                                "shopping": 0.0,
-                                "utilities": 0.0,
-                                "others": 0.0  # Catch-all for miscellaneous expenses
-                            },
-                            "total_expenses": 0.0,  # Aggregate total across all categories
-                            "last_updated": None    # Tracks most recent transaction timestamp
-                        }
-                    }
+                    # Initial state structure that our agent expects (see initial_state)
+                    state=initial_state(),
                 )
                 print(f"\nSession- {expense_session.id} created successfully!")
 
@@ -72,16 +68,6 @@ async def main():
             print(f"\nError creating session: {str(e)}")
             return
 
-        # Initialize ADK Runner:
-        # - Manages the lifecycle of agent interactions
-        # - Handles state updates automatically
-        # - Processes messages between user and agent
-        runner = Runner(
-            agent=expense_manager_agent,          # Our custom ExpenseManagerAgent
-            app_name="expense_manager_app",       # Must match session app_name
-            session_service=session_service_stateful,  # For state persistence
-        )
-
         # Get user's expense-related query
         input_text = input("Enter your expense query (or type 'exit' to quit): ")
         if input_text.lower() == "exit":